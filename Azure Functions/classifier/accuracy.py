@@ -0,0 +1,155 @@
+# ACCURACY.PY
+# Python script comparing the predictions of an inference backend against the Keras baseline.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Quantizing the model changes its outputs slightly, so before switching INFERENCE_BACKEND
+# we check how often each backend agrees with `model.predict` on the top-1 class.
+#
+# Usage (from the function folder):
+#   python -m classifier.accuracy --images path/to/images --backends keras-direct tflite-float16 tflite-int8
+#   python -m classifier.accuracy --picsum 50 --min-agreement 0.95
+
+import argparse
+import logging
+import os
+import sys
+from io import BytesIO
+
+import numpy as np
+import requests
+
+from .backends import BACKEND_NAMES, KerasBackend, load_backend
+from .preprocess import preprocess_image
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp")
+PREPROCESS_MODES = ("fast", "keras")
+
+
+def preprocess_image_bytes(data, mode="fast"):
+    """Preprocess encoded image bytes as the functions do with the given PREPROCESS_MODE.
+
+    Args:
+        data (bytes): An encoded image (JPEG, PNG, ...).
+        mode (str): "fast" for draft-mode decoding (classifier.preprocess, the functions'
+            default), or "keras" for the full decode with `load_img` and `preprocess_input`.
+
+    Returns:
+        np.ndarray: A float32 array of shape (224, 224, 3) scaled to [-1, 1].
+    """
+    if mode == "fast":
+        x, _ = preprocess_image(data)
+        return x[0]
+
+    from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
+    from tensorflow.keras.preprocessing import image
+
+    img = image.load_img(BytesIO(data), target_size=(224, 224))
+    return preprocess_input(image.img_to_array(img))
+
+
+def sample_images(image_dir=None, picsum=0, mode="fast"):
+    """Load and preprocess a set of sample images for calibration or evaluation.
+
+    Args:
+        image_dir (str, optional): A folder of image files to use.
+        picsum (int): Number of random images to download from picsum.photos in addition.
+        mode (str): Preprocessing mode, "fast" or "keras" (see `preprocess_image_bytes`).
+
+    Returns:
+        np.ndarray: A float32 array of shape (N, 224, 224, 3).
+
+    Raises:
+        ValueError: If no images could be loaded.
+    """
+    images = []
+
+    if image_dir:
+        for filename in sorted(os.listdir(image_dir)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                with open(os.path.join(image_dir, filename), "rb") as f:
+                    images.append(preprocess_image_bytes(f.read(), mode))
+
+    for i in range(picsum):
+        # The seed makes the sample reproducible between runs
+        response = requests.get(f"https://picsum.photos/seed/accuracy-{i}/640/480", timeout=30)
+        response.raise_for_status()
+        images.append(preprocess_image_bytes(response.content, mode))
+
+    if not images:
+        raise ValueError("No sample images loaded, pass --images and/or --picsum")
+    return np.stack(images).astype(np.float32)
+
+
+def _predict_in_batches(backend, x, batch_size):
+    return np.concatenate([backend.predict(x[i:i + batch_size]) for i in range(0, len(x), batch_size)])
+
+
+def top1_agreement(baseline, candidate, x, batch_size=16):
+    """Compare the top-1 predictions of two backends on the same inputs.
+
+    Args:
+        baseline: The reference backend (normally `KerasBackend`).
+        candidate: The backend being checked.
+        x (np.ndarray): Preprocessed inputs of shape (N, 224, 224, 3).
+        batch_size (int): Number of images per `predict` call.
+
+    Returns:
+        dict: A dictionary containing:
+            - `images` (int): Number of images compared.
+            - `top1_agreement` (float): Fraction of images with the same top-1 class.
+            - `top5_contains_top1` (float): Fraction of images where the baseline's top-1
+              class is in the candidate's top-5.
+            - `mean_abs_prob_diff` (float): Mean absolute difference between the probability
+              vectors.
+    """
+    base_preds = _predict_in_batches(baseline, x, batch_size)
+    cand_preds = _predict_in_batches(candidate, x, batch_size)
+
+    base_top1 = base_preds.argmax(axis=1)
+    cand_top1 = cand_preds.argmax(axis=1)
+    cand_top5 = np.argsort(cand_preds, axis=1)[:, -5:]
+
+    return {
+        "images": int(len(x)),
+        "top1_agreement": float(np.mean(base_top1 == cand_top1)),
+        "top5_contains_top1": float(np.mean((cand_top5 == base_top1[:, None]).any(axis=1))),
+        "mean_abs_prob_diff": float(np.mean(np.abs(base_preds - cand_preds))),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check top-1 agreement of inference backends against Keras.")
+    parser.add_argument("--backends", nargs="+", default=[n for n in BACKEND_NAMES if n != "keras"],
+                        choices=BACKEND_NAMES, help="Backends to compare against the Keras baseline")
+    parser.add_argument("--images", help="Folder of sample images")
+    parser.add_argument("--picsum", type=int, default=0, help="Number of random picsum.photos images to download")
+    parser.add_argument("--preprocess-mode", default="fast", choices=PREPROCESS_MODES,
+                        help="Preprocessing of the sample images, as PREPROCESS_MODE in the functions")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--min-agreement", type=float, default=0.0,
+                        help="Exit with status 1 if any backend's top-1 agreement is below this value")
+    args = parser.parse_args(argv)
+
+    x = sample_images(args.images, args.picsum, args.preprocess_mode)
+    print(f"Loaded {len(x)} sample images")
+
+    baseline = KerasBackend()
+    failed = False
+    for name in args.backends:
+        # Reuse the baseline model for the Keras backends rather than building it again
+        candidate = load_backend(name, model=baseline.model)
+        result = top1_agreement(baseline, candidate, x, args.batch_size)
+        print(f"{name}: {result}")
+        if result["top1_agreement"] < args.min_agreement:
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,271 @@
+# ADMISSION.PY
+# Python module with admission control and deadline-aware load shedding for the classify routes.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Without backpressure every request is accepted, so under overload (e.g. the 100-user
+# Locust runs) requests pile up behind slow inferences until the clients time out, and
+# the instance spends its time on answers nobody waits for any more.
+#
+# The AdmissionController allows at most `max_in_flight` requests through the pipeline at
+# a time. Further requests wait in a bounded queue for a free slot. A request can carry a
+# deadline, the time its client is still willing to wait, in the X-Deadline-Ms header.
+# Before queueing, the controller estimates when the request would finish: the expected
+# wait for a slot (from the queue length and the mean recent service time) plus the p95
+# of recent service times. A request that would miss its deadline, or finds the queue full,
+# is rejected at once with 429 Too Many Requests and a Retry-After hint, which costs
+# microseconds instead of a full inference. A queued request whose deadline runs out
+# before it gets a slot is rejected as expired. Admitted requests therefore see a bounded
+# queue wait, and their tail latency stays close to the service time under overload.
+#
+# Async routes use `acquire_async`, which waits on the controller's own thread pool (one
+# thread per slot and queue place, since further requests are rejected without waiting).
+# If the awaiting invocation is cancelled (timeout, client disconnect) while its thread is
+# still waiting, the slot that thread obtains is handed straight back instead of leaking.
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .config import env_float, env_int
+
+DEADLINE_HEADER = "X-Deadline-Ms"
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted.
+
+    Attributes:
+        reason (str): "queue_full", "deadline" (would miss its deadline) or "expired"
+            (the deadline ran out while queued).
+        retry_after (int): Suggested number of seconds before retrying.
+    """
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Request rejected ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def request_deadline(headers, default=None):
+    """Read the deadline of a request from its X-Deadline-Ms header.
+
+    Args:
+        headers (Mapping): The request headers (case-insensitive lookup).
+        default (float, optional): Deadline in seconds when the header is missing or invalid.
+
+    Returns:
+        float: Seconds the client is willing to wait, or `default`.
+    """
+    value = headers.get(DEADLINE_HEADER)
+    try:
+        deadline_ms = float(value)
+    except (TypeError, ValueError):
+        return default
+    return deadline_ms / 1000.0 if deadline_ms > 0 else default
+
+
+class Ticket:
+    """A slot held by an admitted request. Releasing it records the service time."""
+
+    def __init__(self, controller, deadline, start, queue_wait):
+        self.controller = controller
+        self.deadline = deadline
+        self.start = start
+        self.queue_wait = queue_wait
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.controller._release(self)
+
+    def abandon(self):
+        """Give the slot back without recording a service time, for a request that never ran."""
+        if not self._released:
+            self._released = True
+            self.controller._release(self, record=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AdmissionController:
+    """Bounded in-flight limit with a deadline-aware admission queue.
+
+    Args:
+        max_in_flight (int): Requests processed at the same time (0 = no limit).
+        max_queue (int): Requests allowed to wait for a slot. Beyond this they are rejected.
+        default_deadline (float, optional): Deadline in seconds for requests without one.
+        window (int): Number of recent service times used for the estimates.
+        min_samples (int): Service times needed before requests are rejected for their deadline.
+    """
+
+    def __init__(self, max_in_flight=8, max_queue=32, default_deadline=None, window=256, min_samples=10):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.default_deadline = default_deadline
+        self.min_samples = min_samples
+        self._service_times = deque(maxlen=window)
+        self._p95 = 0.0
+        self._mean = 0.0
+        self._in_flight = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+        # Threads for acquire_async; no threads are started until it is first used
+        self._waiters = ThreadPoolExecutor(max_workers=max(1, max_in_flight) + max(0, max_queue),
+                                           thread_name_prefix="admission")
+
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "deadline": 0}
+        self.expired = 0
+        self.late = 0
+
+    def _has_slot(self):
+        return self.max_in_flight <= 0 or self._in_flight < self.max_in_flight
+
+    def _estimated_wait(self, position):
+        # Time until the request with `position` requests queued ahead of it gets a slot,
+        # assuming slots free up at an even rate of max_in_flight per mean service time
+        if self._has_slot() and position == 0:
+            return 0.0
+        return (position + 1) * self._mean / self.max_in_flight
+
+    def _reject(self, reason, wait):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        raise AdmissionRejected(reason, max(1, math.ceil(wait)))
+
+    def acquire(self, deadline=None):
+        """Wait for a slot, or reject the request if it cannot be served in time.
+
+        Args:
+            deadline (float, optional): Seconds the client is willing to wait in total.
+                `default_deadline` if not given.
+
+        Returns:
+            Ticket: The slot, to be released (or used as a context manager) when done.
+
+        Raises:
+            AdmissionRejected: If the queue is full, the request would miss its deadline,
+                or its deadline ran out while it waited.
+        """
+        start = time.monotonic()
+        deadline = deadline if deadline is not None else self.default_deadline
+        with self._condition:
+            estimated_wait = self._estimated_wait(self._waiting)
+            if not self._has_slot() and self._waiting >= self.max_queue:
+                self._reject("queue_full", estimated_wait)
+            informed = len(self._service_times) >= self.min_samples
+            if deadline is not None and informed and estimated_wait + self._p95 > deadline:
+                self._reject("deadline", estimated_wait)
+
+            self._waiting += 1
+            try:
+                while not self._has_slot():
+                    timeout = None
+                    if deadline is not None:
+                        # Give up once the remaining time is too short for a typical request
+                        timeout = deadline - (time.monotonic() - start) - (self._p95 if informed else 0.0)
+                        if timeout <= 0:
+                            self.expired += 1
+                            # Pass on a wake-up this request may have taken from another waiter
+                            self._condition.notify()
+                            raise AdmissionRejected("expired", max(1, math.ceil(self._mean)))
+                    self._condition.wait(timeout)
+            finally:
+                self._waiting -= 1
+
+            self._in_flight += 1
+            self.admitted += 1
+        return Ticket(self, deadline, start, time.monotonic() - start)
+
+    async def acquire_async(self, deadline=None):
+        """Wait for a slot without blocking the event loop.
+
+        Args:
+            deadline (float, optional): As for `acquire`.
+
+        Returns:
+            Ticket: The slot, to be released (or used as a context manager) when done.
+
+        Raises:
+            AdmissionRejected: As for `acquire`.
+            asyncio.CancelledError: If the caller is cancelled while waiting. A slot obtained
+                after that is released at once.
+        """
+        future = self._waiters.submit(self.acquire, deadline)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(_abandon_ticket)
+            raise
+
+    def _release(self, ticket, record=True):
+        now = time.monotonic()
+        with self._condition:
+            self._in_flight -= 1
+            if record:
+                self._service_times.append(now - ticket.start - ticket.queue_wait)
+                if ticket.deadline is not None and now - ticket.start > ticket.deadline:
+                    self.late += 1
+                samples = np.fromiter(self._service_times, dtype=np.float64)
+                self._p95 = float(np.percentile(samples, 95))
+                self._mean = float(samples.mean())
+            self._condition.notify()
+
+    def stats(self):
+        """Return the admission counters and current estimates.
+
+        Returns:
+            dict: `in_flight`, `waiting`, `admitted`, `rejected` (per reason), `expired`,
+            `late` (admitted but finished after their deadline), and the recent
+            `service_p95` and `service_mean` in seconds.
+        """
+        with self._condition:
+            return {
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "expired": self.expired,
+                "late": self.late,
+                "service_p95": round(self._p95, 5),
+                "service_mean": round(self._mean, 5),
+            }
+
+
+def _abandon_ticket(future):
+    # Done-callback of an acquire whose caller was cancelled: nobody will use the slot
+    if not future.cancelled() and future.exception() is None:
+        future.result().abandon()
+
+
+def build_admission_controller():
+    """Create the admission controller from the ADMISSION_* settings.
+
+    Settings:
+        - `ADMISSION_MAX_IN_FLIGHT` (int): Requests processed at the same time (default 8, 0 = no limit).
+        - `ADMISSION_MAX_QUEUE` (int): Requests waiting for a slot before new ones are rejected (default 32).
+        - `ADMISSION_DEFAULT_DEADLINE_MS` (float): Deadline of requests without an X-Deadline-Ms
+          header (default 0, no deadline).
+
+    Returns:
+        AdmissionController: The controller.
+    """
+    default_deadline_ms = env_float("ADMISSION_DEFAULT_DEADLINE_MS", 0.0)
+    return AdmissionController(
+        max_in_flight=env_int("ADMISSION_MAX_IN_FLIGHT", 8),
+        max_queue=env_int("ADMISSION_MAX_QUEUE", 32),
+        default_deadline=default_deadline_ms / 1000.0 if default_deadline_ms > 0 else None,
+    )
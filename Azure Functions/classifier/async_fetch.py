@@ -0,0 +1,197 @@
+# ASYNC_FETCH.PY
+# Python module with the non-blocking HTTP client used by the async classify route.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# AsyncImageFetcher is the aiohttp counterpart of classifier.fetch.ImageFetcher, with the
+# same timeouts, byte cap, retries and per-host metrics. While an image downloads, the
+# event loop is free to serve other invocations instead of a worker thread blocking in
+# `requests.get`. The aiohttp session is created on first use, inside the event loop that
+# runs the function, and is reused for every later request on that loop.
+
+import asyncio
+import logging
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .config import env_float, env_int
+from .fetch import CHUNK_SIZE, RETRY_STATUSES, FetchResult, ImageTooLargeError, _HostMetrics
+
+# Errors worth retrying: connection failures, timeouts and connections dropped mid-body
+RETRY_ERRORS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+
+class AsyncImageFetcher:
+    """Downloads images over a shared aiohttp keep-alive connection pool.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections kept per host.
+        connect_timeout (float): Seconds to wait for a connection to be established.
+        read_timeout (float): Seconds to wait between bytes from the server.
+        max_bytes (int): Largest body accepted. Bigger downloads are aborted.
+        retries (int): Number of retries after a transient error.
+        backoff (float): Base delay in seconds for exponential backoff between retries.
+    """
+
+    def __init__(self, pool_size=16, connect_timeout=3.05, read_timeout=15.0, max_bytes=20 * 1024 * 1024,
+                 retries=2, backoff=0.2):
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.read_timeout = read_timeout
+        self.max_bytes = max_bytes
+        self.retries = retries
+        self.backoff = backoff
+
+        self._session = None
+        self._metrics = {}
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            # Count new and reused connections per host, like the urllib3 pool counters
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_created)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+            connector = aiohttp.TCPConnector(limit_per_host=self.pool_size, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout,
+                                                  trace_configs=[trace_config])
+        return self._session
+
+    async def _on_connection_created(self, session, context, params):
+        self._count_connection(context, opened=1)
+
+    async def _on_connection_reused(self, session, context, params):
+        self._count_connection(context, opened=0)
+
+    def _count_connection(self, context, opened):
+        host = getattr(context.trace_request_ctx, "host", None)
+        if host is None:
+            return
+        with self._lock:
+            counts = self._connections.setdefault(host, [0, 0])
+            counts[0] += opened
+            counts[1] += 1
+
+    async def get(self, url, headers=None):
+        """Download a URL, retrying transient failures.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (dict, optional): Extra request headers, e.g. conditional GET validators.
+
+        Returns:
+            FetchResult: The response. 4xx/5xx responses are returned rather than raised
+            (after retries for retryable statuses), so callers can inspect them.
+
+        Raises:
+            ImageTooLargeError: If the body is larger than `max_bytes`.
+            aiohttp.ClientError: If the request still fails after all retries.
+        """
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    result = await self._get_once(url, headers, host)
+                    if result.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                        self._record(host, start, len(result.content), retries=attempt)
+                        return result
+                    delay = self._retry_delay(attempt, result.headers.get("Retry-After"))
+                except RETRY_ERRORS as e:
+                    if attempt >= self.retries:
+                        raise
+                    delay = self._retry_delay(attempt)
+                    logging.warning(f"Retrying {host} after error: {e!r}")
+                attempt += 1
+                await asyncio.sleep(delay)
+        except Exception:
+            self._record(host, start, 0, retries=attempt, error=True)
+            raise
+
+    async def _get_once(self, url, headers, host):
+        session = self._get_session()
+        async with session.get(url, headers=headers, trace_request_ctx=SimpleNamespace(host=host)) as response:
+            # Reject early when the server announces a body that is too large
+            if response.content_length is not None and response.content_length > self.max_bytes:
+                raise ImageTooLargeError(f"Image is {response.content_length} bytes, limit is {self.max_bytes}")
+
+            # Enforce the cap while streaming, since Content-Length may be missing or wrong
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                body += chunk
+                if len(body) > self.max_bytes:
+                    raise ImageTooLargeError(f"Image exceeds the limit of {self.max_bytes} bytes")
+
+            return FetchResult(str(response.url), response.status, response.headers, bytes(body))
+
+    def _retry_delay(self, attempt, retry_after=None):
+        delay = self.backoff * (2 ** attempt)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        # Never sleep longer than the read timeout, the caller is waiting on us
+        return min(delay, self.read_timeout)
+
+    def _record(self, host, start, nbytes, retries=0, error=False):
+        with self._lock:
+            metrics = self._metrics.setdefault(host, _HostMetrics())
+            metrics.requests += 1
+            metrics.errors += int(error)
+            metrics.retries += retries
+            metrics.bytes += nbytes
+            metrics.seconds += time.perf_counter() - start
+
+    def host_stats(self, host=None):
+        """Return per-host connection metrics, in the same format as `ImageFetcher.host_stats`.
+
+        Args:
+            host (str, optional): Only return the metrics of this host (netloc).
+
+        Returns:
+            dict: Host -> `requests`, `errors`, `retries`, `bytes`, `mean_duration`,
+            `connections_opened` and `pooled_requests`.
+        """
+        with self._lock:
+            hosts = [host] if host is not None else sorted(set(self._metrics) | set(self._connections))
+            stats = {}
+            for name in hosts:
+                metrics = self._metrics.get(name, _HostMetrics())
+                opened, served = self._connections.get(name, (0, 0))
+                stats[name] = {
+                    "requests": metrics.requests,
+                    "errors": metrics.errors,
+                    "retries": metrics.retries,
+                    "bytes": metrics.bytes,
+                    "mean_duration": round(metrics.seconds / metrics.requests, 5) if metrics.requests else 0.0,
+                    "connections_opened": opened,
+                    "pooled_requests": served,
+                }
+            return stats
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+def build_async_fetcher():
+    """Create the async image fetcher from the same FETCH_* settings as `build_fetcher`.
+
+    Returns:
+        AsyncImageFetcher: The configured fetcher.
+    """
+    return AsyncImageFetcher(
+        pool_size=env_int("FETCH_POOL_SIZE", 16),
+        connect_timeout=env_float("FETCH_CONNECT_TIMEOUT", 3.05),
+        read_timeout=env_float("FETCH_READ_TIMEOUT", 15.0),
+        max_bytes=env_int("FETCH_MAX_BYTES", 20 * 1024 * 1024),
+        retries=env_int("FETCH_RETRIES", 2),
+        backoff=env_float("FETCH_BACKOFF", 0.2),
+    )
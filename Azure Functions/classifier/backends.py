@@ -0,0 +1,281 @@
+# BACKENDS.PY
+# Python module with interchangeable inference backends for MobileNetV2.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Every backend exposes the same small interface:
+#   - `name` (str): The backend name used in the INFERENCE_BACKEND setting.
+#   - `predict(x)`: Takes a preprocessed float32 batch of shape (N, 224, 224, 3) and
+#     returns ImageNet class probabilities of shape (N, 1000) as a NumPy array.
+#
+# Available backends:
+#   - "keras": `model.predict(x)` on the Keras MobileNetV2 (the original behaviour).
+#   - "keras-direct": `model(x, training=False)`, which skips the per-call overhead of
+#     `predict` (building a tf.data pipeline and a progress bar for every request).
+#   - "tflite-float16" / "tflite-int8": A converted, post-training quantized TFLite model
+#     run on the CPU interpreter. The .tflite files are produced offline by
+#     `python -m classifier.convert_tflite` and shipped in classifier/models/.
+#
+# Sharing weights between worker processes:
+#   Every worker process that imports the function builds its own copy of the model in
+#   private memory. With `shared_weights=True` the tflite-int8 backend runs the builtin
+#   kernels without the XNNPACK delegate, which would otherwise repack every weight tensor
+#   into a private buffer. The int8 kernels then read the weights in place from the model
+#   file, which the interpreter memory-maps read-only, so all workers on a host share the
+#   same page cache pages.
+#   This does not work for tflite-float16: its weights are stored as float16 constants
+#   behind DEQUANTIZE ops, which the builtin kernels evaluate once at Prepare into private
+#   float32 buffers, so every worker would still hold a full float32 copy of the weights
+#   (and run the slower kernels). Shared weights are therefore refused for it, with a
+#   warning, and the backend keeps XNNPACK.
+#   The Keras backends cannot use a mapped file (TensorFlow copies weights into its own
+#   tensors), but their pages are shared copy-on-write when the model is loaded once
+#   before the workers are forked. benchmark/measure_worker_memory.py compares both.
+
+import logging
+import os
+import threading
+
+import numpy as np
+
+from .labels import ARTIFACTS_DIR
+
+BACKEND_NAMES = ("keras", "keras-direct", "tflite-float16", "tflite-int8")
+
+# Backends whose kernels read their weights in place from the memory-mapped model file
+SHARED_WEIGHTS_BACKENDS = ("tflite-int8",)
+
+# Default location of converted TFLite models inside the function package
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+# Pre-serialized Keras model baked into the function package by classifier.bake_artifacts
+KERAS_MODEL_PATH = os.path.join(ARTIFACTS_DIR, "mobilenet_v2.keras")
+
+
+def tflite_model_path(quantization):
+    """Return the default path of the converted TFLite model for a quantization mode.
+
+    Args:
+        quantization (str): Either "float16" or "int8".
+
+    Returns:
+        str: Path of `mobilenet_v2_<quantization>.tflite` inside classifier/models/.
+    """
+    return os.path.join(MODELS_DIR, f"mobilenet_v2_{quantization}.tflite")
+
+
+def configure_tf_threads(intra_op_threads=0, inter_op_threads=0):
+    """Set the size of TensorFlow's thread pools.
+
+    By default TensorFlow sizes both pools to the number of cores, so several invocations
+    running at once each try to use every core and oversubscribe the CPU. Must be called
+    before the first model is built, since TensorFlow fixes its pools on first use.
+
+    Args:
+        intra_op_threads (int): Threads used inside one operation (e.g. a convolution), 0 = TF default.
+        inter_op_threads (int): Independent operations run at the same time, 0 = TF default.
+    """
+    if not intra_op_threads and not inter_op_threads:
+        return
+
+    import tensorflow as tf
+    try:
+        if intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        if inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    except RuntimeError as e:
+        # TensorFlow was already initialized, e.g. by a model built earlier in the process
+        logging.warning(f"Could not set TensorFlow thread pools: {e}")
+
+
+def build_keras_model(path=KERAS_MODEL_PATH):
+    """Load the Keras MobileNetV2 model with pretrained ImageNet weights.
+
+    Loads the baked model from classifier/artifacts/ when it exists, so no weights are
+    downloaded at startup. Otherwise builds MobileNetV2 from keras.applications, which
+    downloads the weights into ~/.keras on first use.
+
+    Args:
+        path (str): Location of the baked .keras model.
+
+    Returns:
+        tf.keras.Model: The model.
+    """
+    # TensorFlow is imported here rather than at module level, since the TFLite backends
+    # do not need it and importing it takes several seconds on a cold start
+    if os.path.exists(path):
+        from tensorflow.keras.models import load_model
+        return load_model(path, compile=False)
+
+    logging.warning(f"{path} not found, building MobileNetV2 with downloaded weights. "
+                    "Run `python -m classifier.bake_artifacts` before deploying.")
+    from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2
+    return MobileNetV2(weights='imagenet')
+
+
+class KerasBackend:
+    """Runs inference with `model.predict`, exactly as the functions originally did.
+
+    Args:
+        model (tf.keras.Model, optional): An already built model. Built with
+            `build_keras_model()` if not given.
+    """
+
+    name = "keras"
+
+    def __init__(self, model=None):
+        self.model = model if model is not None else build_keras_model()
+
+    def predict(self, x):
+        return self.model.predict(x)
+
+
+class DirectCallBackend(KerasBackend):
+    """Runs inference by calling the Keras model directly in inference mode.
+
+    `model.predict` is designed for large datasets and sets up a data pipeline and
+    callbacks on every call, which dominates the runtime for a handful of images.
+    """
+
+    name = "keras-direct"
+
+    def predict(self, x):
+        return self.model(x, training=False).numpy()
+
+
+def _load_tflite_interpreter(model_path, num_threads, shared_weights=False):
+    # Prefer the small tflite-runtime package when it is installed, since it avoids
+    # importing the whole of TensorFlow just to run the interpreter.
+    try:
+        from tflite_runtime.interpreter import Interpreter, OpResolverType
+    except ImportError:
+        from tensorflow.lite import Interpreter
+        from tensorflow.lite.experimental import OpResolverType
+
+    if shared_weights:
+        # Keep the weights in the memory-mapped model file instead of XNNPACK's packed copies
+        return Interpreter(model_path=model_path, num_threads=num_threads,
+                           experimental_op_resolver_type=OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES)
+    return Interpreter(model_path=model_path, num_threads=num_threads)
+
+
+class TFLiteBackend:
+    """Runs inference with a converted TFLite model on the CPU interpreter.
+
+    Handles both float16 models (float32 input/output, float16 weights) and full int8
+    models (quantized input/output), converting to and from the quantized
+    representation as needed.
+
+    Args:
+        quantization (str): Either "float16" or "int8".
+        model_path (str, optional): Path of the .tflite file. Defaults to
+            `tflite_model_path(quantization)`.
+        num_threads (int, optional): Number of interpreter threads. Defaults to the
+            interpreter's own choice.
+        shared_weights (bool): Read the weights from the memory-mapped model file so that
+            worker processes share them, at the cost of slower kernels than XNNPACK. Only
+            effective for int8 models (see SHARED_WEIGHTS_BACKENDS).
+
+    Raises:
+        FileNotFoundError: If the .tflite file does not exist.
+    """
+
+    def __init__(self, quantization, model_path=None, num_threads=None, shared_weights=False):
+        self.name = f"tflite-{quantization}"
+        self.shared_weights = shared_weights
+        self.model_path = model_path or tflite_model_path(quantization)
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(
+                f"TFLite model not found at {self.model_path}. "
+                f"Create it with `python -m classifier.convert_tflite --quantization {quantization}`."
+            )
+
+        self.interpreter = _load_tflite_interpreter(self.model_path, num_threads, shared_weights)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self.batch_size = int(self.input_details["shape"][0])
+
+        # The interpreter keeps its tensors in shared buffers, so only one call may run at a time
+        self._lock = threading.Lock()
+
+    def _resize_batch(self, batch_size):
+        # TFLite models have a static input shape, so reallocate when the batch size changes
+        shape = list(self.input_details["shape"])
+        shape[0] = batch_size
+        self.interpreter.resize_tensor_input(self.input_details["index"], shape)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self.batch_size = batch_size
+
+    def predict(self, x):
+        with self._lock:
+            if x.shape[0] != self.batch_size:
+                self._resize_batch(x.shape[0])
+
+            # Quantize the input if the model expects integers
+            input_dtype = self.input_details["dtype"]
+            if input_dtype in (np.int8, np.uint8):
+                scale, zero_point = self.input_details["quantization"]
+                info = np.iinfo(input_dtype)
+                x = np.clip(np.round(x / scale + zero_point), info.min, info.max).astype(input_dtype)
+            else:
+                x = x.astype(input_dtype, copy=False)
+
+            self.interpreter.set_tensor(self.input_details["index"], x)
+            self.interpreter.invoke()
+            preds = self.interpreter.get_tensor(self.output_details["index"])
+
+            # Dequantize the output back to probabilities
+            if self.output_details["dtype"] in (np.int8, np.uint8):
+                scale, zero_point = self.output_details["quantization"]
+                preds = (preds.astype(np.float32) - zero_point) * scale
+            return np.array(preds, dtype=np.float32)
+
+
+def load_backend(name, model=None, intra_op_threads=0, inter_op_threads=0, shared_weights=False):
+    """Create the inference backend selected by name.
+
+    Args:
+        name (str): One of `BACKEND_NAMES`.
+        model (tf.keras.Model, optional): An already built Keras model to reuse for the
+            Keras backends.
+        intra_op_threads (int): TensorFlow intra-op threads, or TFLite interpreter threads
+            (0 = the library default).
+        inter_op_threads (int): TensorFlow inter-op threads (0 = the TensorFlow default,
+            not used by TFLite).
+        shared_weights (bool): For the backends in SHARED_WEIGHTS_BACKENDS, read the weights
+            from the memory-mapped model file so that worker processes on a host share them.
+            Ignored, with a warning, for the other backends.
+
+    Returns:
+        An object with a `name` attribute and a `predict(x)` method.
+
+    Raises:
+        ValueError: If `name` is not a known backend.
+    """
+    if name not in BACKEND_NAMES:
+        raise ValueError(f"Unknown inference backend {name!r}, expected one of {', '.join(BACKEND_NAMES)}")
+
+    if shared_weights and name not in SHARED_WEIGHTS_BACKENDS:
+        logging.warning(f"Shared weights need one of {', '.join(SHARED_WEIGHTS_BACKENDS)}, "
+                        f"{name} keeps its weights in private memory")
+        shared_weights = False
+
+    if name == "keras":
+        configure_tf_threads(intra_op_threads, inter_op_threads)
+        backend = KerasBackend(model)
+    elif name == "keras-direct":
+        configure_tf_threads(intra_op_threads, inter_op_threads)
+        backend = DirectCallBackend(model)
+    else:
+        backend = TFLiteBackend(name.split("-", 1)[1], num_threads=intra_op_threads or None,
+                                shared_weights=shared_weights)
+
+    logging.info(f"Using inference backend: {backend.name}")
+    return backend
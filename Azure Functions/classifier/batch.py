@@ -0,0 +1,178 @@
+# BATCH.PY
+# Python module with batch classification of many images in one request.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# A batch request carries either a JSON list of image URLs or multipart/form-data image
+# uploads. Items are downloaded and preprocessed concurrently by a bounded thread pool;
+# their forward passes go through the shared MicroBatcher, so concurrent items end up in
+# the same batched inference call. One NDJSON line is produced per image as soon as it
+# finishes, and a failing item produces an error line instead of failing the batch.
+#
+# Every item is admitted through the AdmissionController like a single request, so a batch
+# of hundreds of images cannot bypass the in-flight limit, and the service time of each
+# image feeds the same estimates. The batch's deadline counts from the start of the
+# request, so later items get what is left of it. An item that is not admitted gets a
+# "rejected" line with status code 429 and a Retry-After hint.
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.parser import BytesParser
+from email.policy import HTTP
+
+from .admission import AdmissionRejected
+from .config import env_int
+
+
+class BatchRequestError(ValueError):
+    """Raised when a batch request body cannot be understood."""
+
+
+class BatchItem:
+    """One image in a batch request.
+
+    Attributes:
+        index (int): Position of the item in the request.
+        url (str): The image URL, for URL items.
+        filename (str): The uploaded file name, for upload items.
+        content (bytes): The uploaded image, for upload items.
+    """
+
+    def __init__(self, index, url=None, filename=None, content=None):
+        self.index = index
+        self.url = url
+        self.filename = filename
+        self.content = content
+
+    def describe(self):
+        return {"url": self.url} if self.url is not None else {"filename": self.filename}
+
+
+def _parse_json(body):
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise BatchRequestError(f"Invalid JSON body: {e}")
+
+    # Accept either a bare list of URLs or {"urls": [...]}
+    urls = payload.get("urls") if isinstance(payload, dict) else payload
+    if not isinstance(urls, list) or not all(isinstance(url, str) and url for url in urls):
+        raise BatchRequestError('Expected a JSON list of image URLs or {"urls": [...]}')
+    return [BatchItem(i, url=url) for i, url in enumerate(urls)]
+
+
+def _parse_multipart(body, content_type):
+    # The email package understands MIME multipart bodies, so reuse it rather than a form library
+    message = BytesParser(policy=HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+    )
+    if not message.is_multipart():
+        raise BatchRequestError("Invalid multipart body")
+
+    items = []
+    for part in message.iter_parts():
+        filename = part.get_filename()
+        payload = part.get_payload(decode=True) or b""
+        if filename is not None:
+            items.append(BatchItem(len(items), filename=filename, content=payload))
+        elif part.get_param("name", header="content-disposition") in ("url", "urls"):
+            # Plain form fields may carry URLs, one per line
+            for url in payload.decode("utf-8").split():
+                items.append(BatchItem(len(items), url=url))
+    return items
+
+
+def parse_batch_request(body, content_type):
+    """Parse the body of a batch classification request.
+
+    Args:
+        body (bytes): The raw request body.
+        content_type (str): The request Content-Type header.
+
+    Returns:
+        list: A list of BatchItem objects.
+
+    Raises:
+        BatchRequestError: If the body is malformed, empty or has too many items
+            (more than the BATCH_MAX_ITEMS setting, default 500).
+    """
+    if (content_type or "").lower().startswith("multipart/form-data"):
+        items = _parse_multipart(body, content_type)
+    else:
+        items = _parse_json(body)
+
+    max_items = env_int("BATCH_MAX_ITEMS", 500)
+    if not items:
+        raise BatchRequestError("The batch contains no images")
+    if len(items) > max_items:
+        raise BatchRequestError(f"The batch contains {len(items)} images, the limit is {max_items}")
+    return items
+
+
+def _classify_item(pipeline, item):
+    if item.url is not None:
+        return pipeline.classify_url(item.url)
+    return pipeline.classify_bytes(item.content)
+
+
+def _admit_and_classify(pipeline, item, admission, deadline, start):
+    if admission is None:
+        return _classify_item(pipeline, item)
+    remaining = None if deadline is None else max(0.0, deadline - (time.monotonic() - start))
+    with admission.acquire(remaining):
+        return _classify_item(pipeline, item)
+
+
+def classify_batch(pipeline, items, max_concurrency=8, admission=None, deadline=None):
+    """Classify batch items concurrently, yielding each result as soon as it is ready.
+
+    Args:
+        pipeline (ImagePipeline): The shared classification pipeline.
+        items (list): BatchItem objects from `parse_batch_request`.
+        max_concurrency (int): Maximum number of items fetched and preprocessed at once.
+        admission (AdmissionController, optional): Admits every item as a request of its own.
+        deadline (float, optional): Seconds the client is willing to wait for the whole
+            batch, or None for the controller's default deadline.
+
+    Yields:
+        dict: One result per item, in completion order, containing `index`, the item's
+        `url` or `filename`, `status` ("ok", "error" or "rejected") and either the stage
+        timings and `predictions`, or an `error` message. Rejected items also have
+        `status_code` 429 and `retry_after` in seconds.
+    """
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="batch") as executor:
+        futures = {
+            executor.submit(_admit_and_classify, pipeline, item, admission, deadline, start): item
+            for item in items
+        }
+        for future in as_completed(futures):
+            item = futures[future]
+            line = {"index": item.index, **item.describe()}
+            try:
+                stages = future.result()
+            except AdmissionRejected as e:
+                logging.info(f"Batch item {item.index}: {e}")
+                line.update({"status": "rejected", "status_code": 429, "retry_after": e.retry_after,
+                             "error": f"Too many requests ({e.reason})"})
+            except Exception as e:
+                logging.error(f"Batch item {item.index} failed: {e}")
+                line.update({"status": "error", "error": str(e) or type(e).__name__})
+            else:
+                line["status"] = "ok"
+                line.update({
+                    name: round(value, 5) if isinstance(value, float) else value
+                    for name, value in stages.items() if name != "connections"
+                })
+            yield line
+
+
+def ndjson_lines(results):
+    """Encode results as newline-delimited JSON, one encoded line per result."""
+    for result in results:
+        yield (json.dumps(result) + "\n").encode("utf-8")
@@ -0,0 +1,157 @@
+# BUFFERS.PY
+# Python module with a pool of preallocated model input buffers.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# The original preprocessing allocated several fresh arrays per image: img_to_array made
+# a float32 copy, expand_dims a new array and preprocess_input another scaled copy, each
+# 600 KB for a 224x224x3 input, and the micro-batcher concatenated the inputs of a batch
+# into yet another array. Under sustained load that churn adds allocator and page-fault
+# work to every request.
+#
+# A BufferArena hands out float32 arrays shaped for the model from per-shape free lists:
+# preprocessing writes the resized pixels straight into a (1, 224, 224, 3) buffer and
+# normalizes it in place, and the micro-batcher assembles batches in (N, 224, 224, 3)
+# buffers. Buffers go back to their free list once the forward pass has consumed them,
+# so after warm-up almost every request reuses memory instead of allocating it.
+
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from .config import env_bool, env_int
+
+
+class BufferPool:
+    """A free list of preallocated arrays of one shape and dtype.
+
+    Args:
+        shape (tuple): Shape of every buffer.
+        dtype: NumPy dtype of every buffer.
+        max_free (int): Largest number of idle buffers kept. Buffers released beyond this
+            are dropped, so a burst does not pin its peak memory forever.
+    """
+
+    def __init__(self, shape, dtype=np.float32, max_free=16):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.max_free = max_free
+        self._free = []
+        self._lock = threading.Lock()
+        self.allocated = 0
+        self.acquired = 0
+        self.reused = 0
+        self.in_use = 0
+
+    def acquire(self):
+        """Return an idle buffer, or allocate a new one if none is free.
+
+        The contents are whatever the previous user left in it, so callers must
+        overwrite the whole buffer.
+        """
+        with self._lock:
+            self.acquired += 1
+            self.in_use += 1
+            if self._free:
+                self.reused += 1
+                return self._free.pop()
+            self.allocated += 1
+        return np.empty(self.shape, dtype=self.dtype)
+
+    def release(self, buffer):
+        """Return a buffer obtained from `acquire` to the pool."""
+        with self._lock:
+            self.in_use -= 1
+            if len(self._free) < self.max_free:
+                self._free.append(buffer)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "shape": list(self.shape),
+                "buffer_bytes": int(np.prod(self.shape)) * self.dtype.itemsize,
+                "allocated": self.allocated,
+                "free": len(self._free),
+                "in_use": self.in_use,
+                "acquired": self.acquired,
+                "reused": self.reused,
+                "reuse_rate": round(self.reused / self.acquired, 4) if self.acquired else 0.0,
+            }
+
+
+class BufferArena:
+    """Buffer pools for every input shape the model sees, created on demand.
+
+    Args:
+        dtype: NumPy dtype of the buffers (the model input type).
+        max_free (int): Idle buffers kept per shape (see BufferPool).
+    """
+
+    def __init__(self, dtype=np.float32, max_free=16):
+        self.dtype = dtype
+        self.max_free = max_free
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def pool(self, shape):
+        shape = tuple(shape)
+        pool = self._pools.get(shape)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.setdefault(shape, BufferPool(shape, self.dtype, self.max_free))
+        return pool
+
+    def acquire(self, shape):
+        return self.pool(shape).acquire()
+
+    def release(self, buffer):
+        self.pool(buffer.shape).release(buffer)
+
+    @contextmanager
+    def lease(self, shape):
+        """Context manager holding a buffer of `shape` for the duration of the block."""
+        buffer = self.acquire(shape)
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+    def stats(self):
+        """Return the totals over all pools plus each pool's own counters.
+
+        Returns:
+            dict: `allocated`, `acquired`, `reused`, `reuse_rate`, `pooled_bytes` (memory
+            held by the arena, idle or in use) and `pools` (a list of BufferPool stats).
+        """
+        with self._lock:
+            pools = [pool.stats() for pool in self._pools.values()]
+        allocated = sum(pool["allocated"] for pool in pools)
+        acquired = sum(pool["acquired"] for pool in pools)
+        reused = sum(pool["reused"] for pool in pools)
+        return {
+            "allocated": allocated,
+            "acquired": acquired,
+            "reused": reused,
+            "reuse_rate": round(reused / acquired, 4) if acquired else 0.0,
+            "pooled_bytes": sum(pool["buffer_bytes"] * (pool["free"] + pool["in_use"]) for pool in pools),
+            "pools": pools,
+        }
+
+
+def build_buffer_arena():
+    """Create the input buffer arena from the BUFFER_POOL_* settings.
+
+    Settings:
+        - `BUFFER_POOL_ENABLED` (bool): Pool input buffers (default true).
+        - `BUFFER_POOL_MAX_FREE` (int): Idle buffers kept per shape (default 16).
+
+    Returns:
+        BufferArena: The arena, or None if pooling is disabled.
+    """
+    if not env_bool("BUFFER_POOL_ENABLED", True):
+        return None
+    return BufferArena(max_free=env_int("BUFFER_POOL_MAX_FREE", 16))
@@ -0,0 +1,167 @@
+# CASCADE.PY
+# Python module with a confidence-gated cascade of a small MobileNetV2 and the full model.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Every request pays for a forward pass of the full MobileNetV2 (width multiplier 1.0,
+# 224x224 input), although many images are easy enough for a much smaller network.
+#
+# With the cascade, a small MobileNetV2 (width multiplier 0.35 at a 128x128 input, about a
+# tenth of the multiply-adds) classifies every image first. If its top-1 probability is at
+# least the threshold, its predictions are returned and the full model is never run.
+# Otherwise the image falls through to the full model as before. The response says which
+# tier answered.
+#
+# The small model takes the same (N, 224, 224, 3) input as every backend: a Resizing
+# layer in front of it scales the preprocessed input down to 128x128 inside the graph,
+# so preprocessing, the buffer arena and batching are unchanged. Both models are ImageNet
+# classifiers with the same 1000 classes, so the label table is shared.
+#
+# The threshold trades latency for agreement with the full model; use
+# `python -m classifier.evaluate_cascade` to measure both on sample images before
+# changing CASCADE_THRESHOLD.
+
+import logging
+import os
+import threading
+
+from .backends import DirectCallBackend
+from .batching import MicroBatcher
+from .config import env_bool, env_float
+from .labels import ARTIFACTS_DIR
+
+SMALL_ALPHA = 0.35
+SMALL_INPUT_SIZE = 128
+
+# Pre-serialized small model baked into the function package by classifier.bake_artifacts
+SMALL_MODEL_PATH = os.path.join(ARTIFACTS_DIR, "mobilenet_v2_035_128.keras")
+
+
+def build_small_model(path=SMALL_MODEL_PATH, input_size=224):
+    """Load the small MobileNetV2 of the cascade, taking the full model's input.
+
+    Loads the baked model from classifier/artifacts/ when it exists. Otherwise builds it
+    from keras.applications, which downloads the weights into ~/.keras on first use.
+
+    Args:
+        path (str): Location of the baked .keras model.
+        input_size (int): Width and height of the inputs the model receives.
+
+    Returns:
+        tf.keras.Model: A model mapping (N, input_size, input_size, 3) inputs scaled to
+        [-1, 1] to ImageNet class probabilities.
+    """
+    if os.path.exists(path):
+        from tensorflow.keras.models import load_model
+        return load_model(path, compile=False)
+
+    logging.warning(f"{path} not found, building the small MobileNetV2 with downloaded weights. "
+                    "Run `python -m classifier.bake_artifacts` before deploying.")
+    from tensorflow.keras import Input, Sequential
+    from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2
+    from tensorflow.keras.layers import Resizing
+
+    # Resizing is linear, so scaling the normalized input gives the same values as
+    # normalizing a 128x128 image
+    return Sequential([
+        Input(shape=(input_size, input_size, 3)),
+        Resizing(SMALL_INPUT_SIZE, SMALL_INPUT_SIZE, interpolation="bilinear", antialias=True),
+        MobileNetV2(alpha=SMALL_ALPHA, input_shape=(SMALL_INPUT_SIZE, SMALL_INPUT_SIZE, 3), weights="imagenet"),
+    ], name=f"mobilenet_v2_{SMALL_ALPHA}_{SMALL_INPUT_SIZE}")
+
+
+class SmallModelBackend(DirectCallBackend):
+    """Runs the small MobileNetV2 of the cascade by calling it directly.
+
+    Args:
+        model (tf.keras.Model, optional): An already built small model. Built with
+            `build_small_model()` if not given.
+    """
+
+    name = f"mobilenet_v2-{SMALL_ALPHA}-{SMALL_INPUT_SIZE}"
+
+    def __init__(self, model=None):
+        super().__init__(model if model is not None else build_small_model())
+
+
+class ModelCascade:
+    """The small-model tier of the cascade and its confidence threshold.
+
+    Args:
+        model: The small model backend, with a `name` and a `predict(x)` method.
+        batcher (MicroBatcher): Runs the forward passes of `model`.
+        threshold (float): Smallest top-1 probability of the small model that is returned
+            without running the full model.
+    """
+
+    def __init__(self, model, batcher, threshold=0.6):
+        self.model = model
+        self.batcher = batcher
+        self.threshold = threshold
+        self.name = f"cascade-{model.name}-{threshold:g}"
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.answered = 0
+
+    def accepts(self, preds):
+        """Whether the small model is confident enough in its predictions for one image.
+
+        Args:
+            preds (np.ndarray): Class probabilities of shape (1, 1000).
+
+        Returns:
+            bool: True if the top-1 probability is at least `threshold`.
+        """
+        accepted = float(preds[0].max()) >= self.threshold
+        with self._lock:
+            self.requests += 1
+            self.answered += accepted
+        return accepted
+
+    def stats(self):
+        """Return the cascade counters.
+
+        Returns:
+            dict: The `threshold`, the requests that reached the cascade, the number
+            `answered` by the small model and the `answer_rate`.
+        """
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "requests": self.requests,
+                "answered": self.answered,
+                "answer_rate": round(self.answered / self.requests, 5) if self.requests else 0.0,
+            }
+
+
+def build_cascade(batcher):
+    """Create the model cascade from the CASCADE_* settings.
+
+    The small model is batched with the same settings (and buffer arena) as `batcher`.
+
+    Settings:
+        - `CASCADE_ENABLED` (bool): Classify with the small model first (default false).
+        - `CASCADE_THRESHOLD` (float): Smallest top-1 probability the small model may answer
+          with (default 0.6).
+
+    Args:
+        batcher (MicroBatcher): The batcher of the full model.
+
+    Returns:
+        ModelCascade: The cascade, or None if disabled.
+    """
+    if not env_bool("CASCADE_ENABLED", False):
+        return None
+    model = SmallModelBackend()
+    small_batcher = MicroBatcher(
+        model.predict,
+        max_batch_size=batcher.max_batch_size,
+        max_wait_ms=batcher.max_wait * 1000.0,
+        arena=batcher.arena,
+    )
+    logging.info(f"Using model cascade: {model.name} first")
+    return ModelCascade(model, small_batcher, threshold=env_float("CASCADE_THRESHOLD", 0.6))
@@ -0,0 +1,87 @@
+# CONFIG.PY
+# Python module with helpers for reading function settings from environment variables.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Settings are passed as Application Settings on Azure and as `environment` entries in
+# OpenFaaS/stack.yaml, both of which reach the function as environment variables.
+
+import logging
+import os
+
+
+def env_str(name, default):
+    """Read a string setting from the environment.
+
+    Args:
+        name (str): Name of the environment variable.
+        default (str): Value to use if the variable is unset or empty.
+
+    Returns:
+        str: The configured value, or `default`.
+    """
+    value = os.environ.get(name, "").strip()
+    return value if value else default
+
+
+def env_int(name, default):
+    """Read an integer setting from the environment.
+
+    Args:
+        name (str): Name of the environment variable.
+        default (int): Value to use if the variable is unset or not a valid integer.
+
+    Returns:
+        int: The configured value, or `default`.
+    """
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logging.warning(f"Ignoring invalid integer setting {name}={value!r}, using {default}")
+        return default
+
+
+def env_float(name, default):
+    """Read a float setting from the environment.
+
+    Args:
+        name (str): Name of the environment variable.
+        default (float): Value to use if the variable is unset or not a valid number.
+
+    Returns:
+        float: The configured value, or `default`.
+    """
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logging.warning(f"Ignoring invalid float setting {name}={value!r}, using {default}")
+        return default
+
+
+def env_bool(name, default):
+    """Read a boolean setting from the environment.
+
+    Accepts 1/0, true/false, yes/no and on/off (case-insensitive).
+
+    Args:
+        name (str): Name of the environment variable.
+        default (bool): Value to use if the variable is unset or not recognised.
+
+    Returns:
+        bool: The configured value, or `default`.
+    """
+    value = os.environ.get(name, "").strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    return default
@@ -0,0 +1,166 @@
+# EVALUATE_CASCADE.PY
+# Python script measuring the latency savings and top-1 agreement of the model cascade.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# The cascade threshold decides how often the small model answers on its own: a lower
+# threshold saves more inference time, but more of its answers differ from the full model.
+# This script runs both models once per sample image (batch size 1, as a single request
+# would), then computes for every threshold at once:
+#   - `small_rate`: Fraction of images the small model answers.
+#   - `mean_latency`: Average inference time per image with the cascade (the small model
+#     for every image, plus the full model for the rest) and `savings` against the full
+#     model alone.
+#   - `agreement`: Fraction of images where the cascade's top-1 class is the full model's.
+# and suggests the lowest threshold that keeps the agreement above --target-agreement.
+#
+# Usage (from the function folder):
+#   python -m classifier.evaluate_cascade --images path/to/images --picsum 100
+#   python -m classifier.evaluate_cascade --picsum 200 --target-agreement 0.99 --output cascade_evaluation.csv
+
+import argparse
+import csv
+import logging
+import sys
+import time
+
+import numpy as np
+
+from .accuracy import PREPROCESS_MODES, sample_images
+from .backends import BACKEND_NAMES, load_backend
+from .cascade import SmallModelBackend
+
+DEFAULT_THRESHOLDS = np.round(np.arange(0.0, 1.0001, 0.05), 2)
+
+FIELDNAMES = ["threshold", "small_rate", "mean_latency", "savings", "agreement", "small_agreement"]
+
+
+def time_predictions(backend, x, repeats=3):
+    """Run a backend on every image on its own and time it.
+
+    Args:
+        backend: An inference backend with a `predict(x)` method.
+        x (np.ndarray): Preprocessed inputs of shape (N, 224, 224, 3).
+        repeats (int): Timed runs per image; the median is kept.
+
+    Returns:
+        tuple: `(preds, latencies)`, the class probabilities of shape (N, 1000) and the
+        inference time of every image in seconds.
+    """
+    # The first call builds the graph or allocates the interpreter tensors
+    backend.predict(x[:1])
+
+    preds, latencies = [], []
+    for image in x:
+        image = image[np.newaxis]
+        times = []
+        for _ in range(max(1, repeats)):
+            start = time.perf_counter()
+            pred = backend.predict(image)
+            times.append(time.perf_counter() - start)
+        preds.append(np.asarray(pred)[0])
+        latencies.append(np.median(times))
+    return np.stack(preds), np.asarray(latencies)
+
+
+def evaluate_thresholds(small_preds, small_latency, full_preds, full_latency, thresholds=DEFAULT_THRESHOLDS):
+    """Compute the cascade's latency and agreement with the full model for every threshold.
+
+    Args:
+        small_preds (np.ndarray): Probabilities of the small model, shape (N, 1000).
+        small_latency (np.ndarray): Inference time of the small model per image, shape (N,).
+        full_preds (np.ndarray): Probabilities of the full model, shape (N, 1000).
+        full_latency (np.ndarray): Inference time of the full model per image, shape (N,).
+        thresholds (array-like): Thresholds to evaluate.
+
+    Returns:
+        list: One dict per threshold with the FIELDNAMES keys. `small_agreement` is the
+        agreement over the images the small model answered (NaN if it answered none).
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    small_top1 = small_preds.argmax(axis=1)
+    full_top1 = full_preds.argmax(axis=1)
+    agrees = small_top1 == full_top1
+
+    # One row per threshold, one column per image
+    answered = small_preds.max(axis=1)[np.newaxis, :] >= thresholds[:, np.newaxis]
+    latency = small_latency[np.newaxis, :] + ~answered * full_latency[np.newaxis, :]
+    small_count = answered.sum(axis=1)
+    # Images the full model answers always agree with it
+    agreement = (answered & agrees).sum(axis=1) + (~answered).sum(axis=1)
+    answered_agreement = np.divide((answered & agrees).sum(axis=1), small_count,
+                                   out=np.full(len(thresholds), np.nan), where=small_count > 0)
+
+    mean_latency = latency.mean(axis=1)
+    return [
+        {
+            "threshold": float(threshold),
+            "small_rate": round(float(small_count[i]) / len(full_top1), 4),
+            "mean_latency": round(float(mean_latency[i]), 5),
+            "savings": round(1.0 - float(mean_latency[i]) / float(full_latency.mean()), 4),
+            "agreement": round(float(agreement[i]) / len(full_top1), 4),
+            "small_agreement": round(float(answered_agreement[i]), 4),
+        }
+        for i, threshold in enumerate(thresholds)
+    ]
+
+
+def suggest_threshold(rows, target_agreement):
+    """Return the row of the lowest threshold whose agreement is at least `target_agreement`, or None."""
+    candidates = [row for row in rows if row["agreement"] >= target_agreement]
+    return min(candidates, key=lambda row: row["threshold"]) if candidates else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the model cascade's latency and agreement per threshold.")
+    parser.add_argument("--images", help="Folder of sample images")
+    parser.add_argument("--picsum", type=int, default=0, help="Number of random picsum.photos images to download")
+    parser.add_argument("--preprocess-mode", default="fast", choices=PREPROCESS_MODES,
+                        help="Preprocessing of the sample images, as PREPROCESS_MODE in the functions")
+    parser.add_argument("--backend", default="keras-direct", choices=BACKEND_NAMES,
+                        help="Backend of the full model, as in INFERENCE_BACKEND")
+    parser.add_argument("--thresholds", nargs="+", type=float, default=list(DEFAULT_THRESHOLDS))
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per image and model")
+    parser.add_argument("--target-agreement", type=float, default=0.98,
+                        help="Top-1 agreement with the full model the suggested threshold must keep")
+    parser.add_argument("--output", help="CSV file for the results")
+    args = parser.parse_args(argv)
+
+    x = sample_images(args.images, args.picsum, args.preprocess_mode)
+    print(f"Loaded {len(x)} sample images")
+
+    full = load_backend(args.backend)
+    small = SmallModelBackend()
+    full_preds, full_latency = time_predictions(full, x, args.repeats)
+    small_preds, small_latency = time_predictions(small, x, args.repeats)
+    print(f"Mean inference time: {full.name} {full_latency.mean() * 1000:.2f} ms, "
+          f"{small.name} {small_latency.mean() * 1000:.2f} ms")
+
+    rows = evaluate_thresholds(small_preds, small_latency, full_preds, full_latency, sorted(args.thresholds))
+    print(f"{'threshold':>9} {'small_rate':>10} {'latency_ms':>10} {'savings':>8} {'agreement':>9}")
+    for row in rows:
+        print(f"{row['threshold']:>9.2f} {row['small_rate']:>10.1%} {row['mean_latency'] * 1000:>10.2f} "
+              f"{row['savings']:>8.1%} {row['agreement']:>9.1%}")
+
+    if args.output:
+        with open(args.output, "w", newline="") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Results saved to {args.output}")
+
+    best = suggest_threshold(rows, args.target_agreement)
+    if best is None:
+        print(f"No threshold keeps {args.target_agreement:.1%} agreement, keep the cascade disabled")
+        return 1
+    print(f"Suggested CASCADE_THRESHOLD={best['threshold']:g}: {best['savings']:.1%} less inference time, "
+          f"{best['agreement']:.1%} top-1 agreement")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
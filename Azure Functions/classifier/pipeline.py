@@ -0,0 +1,396 @@
+# PIPELINE.PY
+# Python module with the fetch -> preprocess -> inference pipeline shared by both functions.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+import asyncio
+import time
+from io import BytesIO
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from .cache import LRUCache, content_key
+from .config import env_bool, env_float, env_int, env_str
+from .labels import load_label_table
+from .phash import dhash
+from .preprocess import TARGET_SIZE, prepare_image, preprocess_image
+from .tracing import CPU_STAGES, ML_STAGES, RequestTrace
+
+
+class PredictionsEvicted(LookupError):
+    """Raised when a 304 Not Modified arrives but the cached predictions are gone."""
+
+
+def build_caches():
+    """Create the URL and prediction caches from the function settings.
+
+    Settings:
+        - `CACHE_ENABLED` (bool): Set to false to disable both caches (default true).
+        - `CACHE_MAX_BYTES` (int): Memory budget of each cache (default 16 MB).
+        - `CACHE_TTL_SECONDS` (float): Time-to-live of cache entries (default 3600, 0 = no expiry).
+        - `CACHE_DISK_DIR` (str): Folder for the on-disk tier, e.g. /tmp/classifier-cache (default off).
+        - `CACHE_DISK_MAX_BYTES` (int): Disk budget of each cache's on-disk tier (default 256 MB).
+
+    Returns:
+        tuple: `(url_cache, prediction_cache)`, both None if caching is disabled.
+    """
+    if not env_bool("CACHE_ENABLED", True):
+        return None, None
+
+    max_bytes = env_int("CACHE_MAX_BYTES", 16 * 1024 * 1024)
+    ttl = env_float("CACHE_TTL_SECONDS", 3600.0)
+    disk_dir = env_str("CACHE_DISK_DIR", "") or None
+    disk_max_bytes = env_int("CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024)
+    return (
+        LRUCache("urls", max_bytes=max_bytes, ttl=ttl, disk_dir=disk_dir, disk_max_bytes=disk_max_bytes),
+        LRUCache("predictions", max_bytes=max_bytes, ttl=ttl, disk_dir=disk_dir, disk_max_bytes=disk_max_bytes),
+    )
+
+
+class ImagePipeline:
+    """Fetches, preprocesses and classifies images, with caching of repeated work.
+
+    Args:
+        model: The inference backend (see classifier.backends), used for its name.
+        batcher (MicroBatcher): Runs the forward passes for `model`.
+        fetcher (ImageFetcher): Downloads images over the shared connection pool.
+        url_cache (LRUCache, optional): Cache of HTTP validators per image URL.
+        prediction_cache (LRUCache, optional): Cache of predictions per image content.
+        preprocess_mode (str): "fast" for draft-mode decoding (classifier.preprocess), or
+            "keras" for the original full decode with `load_img` and `preprocess_input`.
+        async_fetcher (AsyncImageFetcher, optional): Non-blocking client used by `classify_url_async`.
+        executor (concurrent.futures.Executor, optional): Bounded pool that runs the CPU and
+            inference work of `classify_url_async`. The event loop's default executor if not given.
+        arena (BufferArena, optional): Pool of model input buffers that the fast preprocessing
+            writes into, returned to the pool after inference.
+        near_duplicates (NearDuplicateIndex, optional): Perceptual-hash index whose predictions
+            are reused for resized or re-encoded copies of an image already classified.
+        decoder_factory (callable, optional): Creates a classifier.streaming.StreamingDecoder
+            per download, so the fast preprocessing decodes images while they download.
+        cascade (ModelCascade, optional): A small model that classifies every image first; only
+            images it is not confident about are run through `model`.
+    """
+
+    def __init__(self, model, batcher, fetcher, url_cache=None, prediction_cache=None, preprocess_mode="fast",
+                 async_fetcher=None, executor=None, arena=None, near_duplicates=None, decoder_factory=None,
+                 cascade=None):
+        self.model = model
+        self.batcher = batcher
+        self.fetcher = fetcher
+        self.url_cache = url_cache
+        self.prediction_cache = prediction_cache
+        self.preprocess_mode = preprocess_mode
+        self.async_fetcher = async_fetcher
+        self.executor = executor
+        self.arena = arena
+        self.near_duplicates = near_duplicates
+        # Streamed decoding produces the same pixels as the fast preprocessing, not the keras path
+        self.decoder_factory = decoder_factory if preprocess_mode == "fast" else None
+        self.cascade = cascade
+        # Predictions depend on the cascade and its threshold too, so they are part of the cache key
+        self.cache_name = model.name if cascade is None else f"{model.name}+{cascade.name}"
+        self.labels = load_label_table()
+
+    def _preprocess(self, content, trace, decoder=None):
+        if self.preprocess_mode == "fast":
+            out = self._acquire_input()
+            try:
+                if decoder is not None:
+                    # Most of the decode already ran during the download, finish what is left
+                    with trace.stage("decode"):
+                        img = decoder.close(content)
+                    x, timings = prepare_image(img, TARGET_SIZE, out=out)
+                else:
+                    x, timings = preprocess_image(content, TARGET_SIZE, out=out)
+            except Exception:
+                self._release_input(out)
+                raise
+            for stage, duration in timings.items():
+                trace.add(stage, duration)
+            return x
+
+        with trace.stage("preprocess"):
+            # Only the original preprocessing path needs TensorFlow, so import it on demand
+            from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
+            from tensorflow.keras.preprocessing import image
+
+            # Load and resize image to 224x224 (expected size for MobileNetV2)
+            img = image.load_img(BytesIO(content), target_size=(224, 224))
+            x = image.img_to_array(img)
+            x = np.expand_dims(x, axis=0)
+            return preprocess_input(x)
+
+    def _acquire_input(self):
+        if self.arena is None:
+            return None
+        width, height = TARGET_SIZE
+        return self.arena.acquire((1, height, width, 3))
+
+    def _release_input(self, x):
+        # Only inputs of the fast preprocessing path come from the arena
+        if self.arena is not None and x is not None and self.preprocess_mode == "fast":
+            self.arena.release(x)
+
+    def _fetch(self, image_url):
+        """Download the image, revalidating with a conditional GET when possible.
+
+        Returns:
+            tuple: `(content, key, url_status, decoder)` where `content` is the image bytes
+            (None when the server answered 304 Not Modified), `key` is the prediction cache
+            key, `url_status` is "hit" (304), "miss" or "disabled", and `decoder` is the
+            StreamingDecoder the body was fed into (None without `decoder_factory`).
+        """
+        headers, validators = self._conditional_headers(image_url)
+        response = self.fetcher.get(image_url, headers=headers, decoder_factory=self.decoder_factory)
+        return self._fetched(image_url, response, headers, validators) + (response.decoder,)
+
+    async def _fetch_async(self, image_url):
+        """The non-blocking version of `_fetch`, using `async_fetcher`.
+
+        Decoding is not streamed here, since it would run on the event loop between chunks.
+        """
+        headers, validators = self._conditional_headers(image_url)
+        response = await self.async_fetcher.get(image_url, headers=headers)
+        return self._fetched(image_url, response, headers, validators) + (None,)
+
+    def _conditional_headers(self, image_url):
+        headers = {}
+        validators = self.url_cache.get(image_url) if self.url_cache is not None else None
+        # Only revalidate if we still hold the predictions, otherwise a 304 would leave us with nothing
+        if validators and self.prediction_cache.contains(validators["content_key"]):
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+        return headers, validators
+
+    def _fetched(self, image_url, response, headers, validators):
+        # Turn a download into (content, key, url_status) and remember the URL's validators
+        if self.url_cache is None:
+            response.raise_for_status()
+            return response.content, None, "disabled"
+
+        if response.status_code == 304 and headers:
+            return None, validators["content_key"], "hit"
+        response.raise_for_status()
+
+        key = content_key(self.cache_name, response.content)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.url_cache.put(image_url, {"etag": etag, "last_modified": last_modified, "content_key": key})
+        return response.content, key, "miss"
+
+    def classify_url(self, image_url, trace=None):
+        """Classify the image at a URL.
+
+        Args:
+            image_url (str): The URL of the image to be classified.
+            trace (RequestTrace, optional): Records the fetch, decode, resize, normalize,
+                queue_wait, predict and topk stages. A new trace is used if not given.
+
+        Returns:
+            dict: A dictionary containing:
+                - `network_duration` (float): Time taken to fetch (or revalidate) the image, in seconds.
+                - `overlap_duration` (float): Part of `network_duration` spent decoding the image while
+                  it was still downloading, i.e. decode time hidden behind the transfer, in seconds.
+                - `cpu_duration` (float): Time taken to preprocess the image, in seconds.
+                - `ml_duration` (float): Time taken to run inference and decode the top-3, including batch
+                  queue wait, in seconds.
+                - `queue_wait_duration` (float): Part of `ml_duration` spent waiting in the batching queue, in seconds.
+                - `batch_size` (int): Number of images in the forward pass (0 if served from the cache).
+                - `tier` (str): Which model answered: "small" (the cascade's small model), "full"
+                  (`model`), or "cache" if the predictions came from a cache or the near-duplicate index.
+                - `cache` (dict): `url` and `predictions` cache outcomes ("hit", "miss" or "disabled"), and
+                  `near_duplicate`: "hit", "miss", "audit" (matched but classified to check the match),
+                  "skipped" (exact prediction cache hit) or "disabled".
+                - `connections` (dict): Connection metrics of the image host (see ImageFetcher.host_stats).
+                - `predictions` (list): The top-3 predictions, each with `label` and `probability`.
+        """
+        trace = trace if trace is not None else RequestTrace()
+
+        # Network-bound task: Fetch the image (or confirm our cached copy is still current),
+        # decoding it as the chunks arrive
+        with trace.stage("fetch"):
+            content, key, url_status, decoder = self._fetch(image_url)
+        if decoder is not None:
+            trace.add("decode_overlap", decoder.overlap_seconds)
+
+        try:
+            result = self.classify_bytes(content, key, trace, decoder=decoder)
+        except PredictionsEvicted:
+            # The predictions for a 304 response were evicted in the meantime, so download the image again
+            with trace.stage("fetch"):
+                content, key, url_status = self._fetched(image_url, self.fetcher.get(image_url), {}, None)
+            result = self.classify_bytes(content, key, trace)
+
+        result["network_duration"] = trace.seconds("fetch")
+        result["overlap_duration"] = trace.seconds("decode_overlap")
+        result["cache"]["url"] = url_status
+        result["connections"] = self.fetcher.host_stats(urlsplit(image_url).netloc)
+        return result
+
+    async def classify_url_async(self, image_url, trace=None):
+        """Classify the image at a URL without blocking the event loop.
+
+        The image is downloaded with `async_fetcher`, then preprocessing and inference run
+        on `executor`, so one worker can keep downloading images for some invocations
+        while others use the CPU.
+
+        Args:
+            image_url (str): The URL of the image to be classified.
+            trace (RequestTrace, optional): Records the stages, as for `classify_url`.
+
+        Returns:
+            dict: The same fields as `classify_url`.
+        """
+        trace = trace if trace is not None else RequestTrace()
+        loop = asyncio.get_running_loop()
+
+        # Network-bound task: Fetch the image (or confirm our cached copy is still current)
+        with trace.stage("fetch"):
+            content, key, url_status, _ = await self._fetch_async(image_url)
+
+        try:
+            result = await loop.run_in_executor(self.executor, self.classify_bytes, content, key, trace)
+        except PredictionsEvicted:
+            # The predictions for a 304 response were evicted in the meantime, so download the image again
+            with trace.stage("fetch"):
+                response = await self.async_fetcher.get(image_url)
+                content, key, url_status = self._fetched(image_url, response, {}, None)
+            result = await loop.run_in_executor(self.executor, self.classify_bytes, content, key, trace)
+
+        result["network_duration"] = trace.seconds("fetch")
+        result["cache"]["url"] = url_status
+        result["connections"] = self.async_fetcher.host_stats(urlsplit(image_url).netloc)
+        return result
+
+    def classify_bytes(self, content, key=None, trace=None, decoder=None):
+        """Classify an already downloaded (or uploaded) image.
+
+        Args:
+            content (bytes): The encoded image. May be None if `key` is expected to be a
+                prediction cache hit (after a 304 Not Modified).
+            key (str, optional): The prediction cache key, computed from `content` if not given.
+            trace (RequestTrace, optional): Records the preprocessing and inference stages.
+            decoder (StreamingDecoder, optional): The decoder `content` was streamed into while
+                it downloaded, whose image is used instead of decoding `content` again.
+
+        Returns:
+            dict: The same fields as `classify_url`, with `network_duration` 0 and without
+            `connections`.
+
+        Raises:
+            PredictionsEvicted: If `content` is None and `key` is not in the prediction cache.
+        """
+        trace = trace if trace is not None else RequestTrace()
+        cached = None
+        prediction_status = "disabled"
+        if self.prediction_cache is not None:
+            if key is None:
+                key = content_key(self.cache_name, content)
+            cached = self.prediction_cache.get(key)
+            prediction_status = "hit" if cached is not None else "miss"
+
+        result = {
+            "network_duration": 0.0,
+            "overlap_duration": 0.0,
+            "cpu_duration": 0.0,
+            "ml_duration": 0.0,
+            "queue_wait_duration": 0.0,
+            "batch_size": 0,
+            "tier": "cache",
+            "cache": {
+                "url": "disabled",
+                "predictions": prediction_status,
+                "near_duplicate": "disabled" if self.near_duplicates is None else "skipped",
+            },
+            "predictions": cached,
+        }
+        if cached is not None:
+            return result
+        if content is None:
+            raise PredictionsEvicted(f"No cached predictions for {key}")
+
+        # CPU-bound task: Preprocess the image
+        x = self._preprocess(content, trace, decoder)
+
+        # Reuse the predictions of a near-duplicate (the same picture at another size or encoding)
+        stored = None
+        if self.near_duplicates is not None:
+            with trace.stage("phash"):
+                image_hash = dhash(x)
+                slot, stored, distance, audit = self.near_duplicates.lookup(image_hash)
+            if stored is not None and not audit:
+                self._release_input(x)
+                result["cpu_duration"] = trace.seconds(*CPU_STAGES)
+                result["cache"]["near_duplicate"] = "hit"
+                result["predictions"] = stored
+                # Exact repeats of these bytes can then skip preprocessing too
+                if self.prediction_cache is not None:
+                    self.prediction_cache.put(key, stored)
+                return result
+        result["cpu_duration"] = trace.seconds(*CPU_STAGES)
+
+        # ML-inference task: Run prediction as part of a shared batch, split into queue wait and the forward pass
+        try:
+            preds, batch_stats, tier = self._predict(x, trace)
+        finally:
+            self._release_input(x)
+
+        with trace.stage("topk"):
+            predictions = [
+                {"label": pred[1], "probability": float(pred[2])} for pred in self.labels.decode(preds, top=3)[0]
+            ]
+        result["ml_duration"] = trace.seconds(*ML_STAGES)
+        result["queue_wait_duration"] = trace.seconds("queue_wait")
+        result["batch_size"] = batch_stats["batch_size"]
+        result["tier"] = tier
+        result["predictions"] = predictions
+
+        if self.prediction_cache is not None:
+            self.prediction_cache.put(key, predictions)
+        if self.near_duplicates is not None:
+            if stored is not None:
+                self.near_duplicates.audit_result(slot, stored, predictions, distance)
+                result["cache"]["near_duplicate"] = "audit"
+            else:
+                self.near_duplicates.add(image_hash, predictions)
+                result["cache"]["near_duplicate"] = "miss"
+        return result
+
+    def _predict(self, x, trace):
+        """Run inference, trying the cascade's small model first if there is one.
+
+        Returns:
+            tuple: `(preds, batch_stats, tier)` of the model that answered, "small" or "full".
+        """
+        if self.cascade is not None:
+            preds, batch_stats = self._predict_batched(self.cascade.batcher, x, trace, "cascade")
+            if self.cascade.accepts(preds):
+                return preds, batch_stats, "small"
+        preds, batch_stats = self._predict_batched(self.batcher, x, trace, "predict")
+        return preds, batch_stats, "full"
+
+    @staticmethod
+    def _predict_batched(batcher, x, trace, stage):
+        # Record the batching queue wait and the forward pass separately
+        start = time.perf_counter_ns()
+        preds, batch_stats = batcher.predict(x)
+        queue_wait_ns = int(batch_stats["queue_wait"] * 1e9)
+        trace.add_ns("queue_wait", queue_wait_ns)
+        trace.add_ns(stage, time.perf_counter_ns() - start - queue_wait_ns)
+        return preds, batch_stats
+
+    def cache_stats(self):
+        """Return the hit/miss counters of the caches and the near-duplicate index (if enabled)."""
+        stats = {}
+        if self.url_cache is not None:
+            stats.update(urls=self.url_cache.stats(), predictions=self.prediction_cache.stats())
+        if self.near_duplicates is not None:
+            stats["near_duplicates"] = self.near_duplicates.stats()
+        return stats
@@ -0,0 +1,95 @@
+# STARTUP.PY
+# Python module with cold-start instrumentation and model warm-up.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# A cold start is made up of several phases before the first request can be answered:
+# the platform starting the Python worker, importing our modules, loading the model and
+# (lazily, on the first predict call) tracing the TensorFlow graph. StartupProfile records
+# how long each phase takes so the first response of an instance can report it, and
+# warm_up runs a dummy inference so graph tracing happens before the first real request.
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def _process_age():
+    # Seconds since the worker process was started, read from /proc (Linux only)
+    try:
+        with open("/proc/self/stat") as f:
+            # The process name may contain spaces, so split after its closing bracket
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupProfile:
+    """Records the duration of each startup phase of a function instance.
+
+    Create it as early as possible in the module that the platform imports. The time
+    the process spent running before that point (interpreter and platform worker startup)
+    is recorded as the `worker_boot` phase where the operating system reports it.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        boot = _process_age()
+        if boot is not None:
+            self.phases["worker_boot"] = boot
+        self._first_request = True
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Time a startup phase.
+
+        Args:
+            name (str): Name of the phase, e.g. "imports", "model_load" or "warmup".
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+            logging.info(f"Startup phase {name} took {self.phases[name]:.3f}s")
+
+    def claim_first_request(self):
+        """Return True for exactly one caller: the first request served by this instance."""
+        with self._lock:
+            first = self._first_request
+            self._first_request = False
+            return first
+
+    def summary(self):
+        """Return the phase durations in seconds, plus their `total`."""
+        summary = {name: round(duration, 5) for name, duration in self.phases.items()}
+        summary["total"] = round(sum(self.phases.values()), 5)
+        return summary
+
+
+def warm_up(model, batch_sizes=(1,), input_shape=(224, 224, 3)):
+    """Run dummy inferences so one-off setup happens before the first real request.
+
+    The first `predict` call of a Keras model traces and optimizes its TensorFlow graph,
+    and a TFLite interpreter has to reallocate its tensors for every new batch size, so we
+    run one pass for each batch size we expect to see.
+
+    Args:
+        model: An inference backend with a `predict(x)` method.
+        batch_sizes (iterable): Batch sizes to warm up.
+        input_shape (tuple): The model input shape without the batch dimension.
+    """
+    for batch_size in sorted(set(batch_sizes)):
+        model.predict(np.zeros((batch_size,) + tuple(input_shape), dtype=np.float32))
@@ -1,4 +1,4 @@
-# FUNCTION_APP.PY                     
+# FUNCTION_APP.PY
 # Python file with Azure Function defined for Coursework 2.
 #
 # Name of Student: Vindhyaa Saravanan
@@ -6,91 +6,365 @@
 # Student ID: 201542641
 # Username: sc21vs
 
-import azure.functions as func 
+import azure.functions as func
 import logging
-import time
 import json
-import requests
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 
-import numpy as np
-from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2, preprocess_input, decode_predictions
-from tensorflow.keras.preprocessing import image
+from classifier.startup import StartupProfile, warm_up
 
-# Load the MobileNetV2 model with pretrained weights on ImageNet.
-model = MobileNetV2(weights='imagenet')
+# Time each startup phase so the first response of a cold instance can report where the time went.
+startup = StartupProfile()
+
+with startup.phase("imports"):
+    from classifier.admission import AdmissionRejected, build_admission_controller, request_deadline
+    from classifier.async_fetch import build_async_fetcher
+    from classifier.backends import load_backend
+    from classifier.batch import BatchRequestError, classify_batch, ndjson_lines, parse_batch_request
+    from classifier.batching import MicroBatcher
+    from classifier.buffers import build_buffer_arena
+    from classifier.cascade import build_cascade
+    from classifier.config import env_bool, env_float, env_int, env_str
+    from classifier.fetch import ImageTooLargeError, build_fetcher
+    from classifier.labels import load_label_table
+    from classifier.metrics import (RequestMetrics, admission_gauges, buffer_arena_gauges, cascade_gauges,
+                                    near_duplicate_gauges)
+    from classifier.phash import build_near_duplicate_index
+    from classifier.pipeline import ImagePipeline, build_caches
+    from classifier.streaming import UnsupportedImageError, build_decoder_factory
+    from classifier.tracing import RequestTrace, build_profile_sampler
+
+# Load MobileNetV2 (pretrained on ImageNet) with the configured inference backend:
+# "keras" (default), "keras-direct", "tflite-float16" or "tflite-int8".
+# The model and label table come from classifier/artifacts/ when baked (see classifier.bake_artifacts).
+# TF_INTRA_OP_THREADS / TF_INTER_OP_THREADS size TensorFlow's thread pools (0 = one thread per core).
+# MODEL_SHARED_WEIGHTS reads tflite-int8 weights from the memory-mapped model file, shared by all workers on a host.
+with startup.phase("model_load"):
+    model = load_backend(
+        env_str("INFERENCE_BACKEND", "keras"),
+        intra_op_threads=env_int("TF_INTRA_OP_THREADS", 0),
+        inter_op_threads=env_int("TF_INTER_OP_THREADS", 0),
+        shared_weights=env_bool("MODEL_SHARED_WEIGHTS", False),
+    )
+    load_label_table()
+
+# Reusable model input buffers for preprocessing and batch assembly (BUFFER_POOL_* settings).
+arena = build_buffer_arena()
+
+# Group concurrent invocations into batched forward passes (BATCH_MAX_SIZE=1 disables batching).
+batcher = MicroBatcher(
+    model.predict,
+    max_batch_size=env_int("BATCH_MAX_SIZE", 8),
+    max_wait_ms=env_float("BATCH_MAX_WAIT_MS", 10.0),
+    arena=arena,
+)
+
+# Model cascade: a small MobileNetV2 (width 0.35, 128x128 input) classifies every image first, and
+# `model` only runs on the images it is not confident about (CASCADE_ENABLED, CASCADE_THRESHOLD).
+with startup.phase("cascade_load"):
+    cascade = build_cascade(batcher)
+
+# Run dummy inferences now so graph tracing is not paid by the first real request (WARMUP_ENABLED).
+if env_bool("WARMUP_ENABLED", True):
+    with startup.phase("warmup"):
+        warm_up(model, batch_sizes=(1, batcher.max_batch_size))
+        if cascade is not None:
+            warm_up(cascade.model, batch_sizes=(1, batcher.max_batch_size))
+
+# Pooled keep-alive HTTP clients for downloading images (FETCH_* settings): a blocking one for
+# classify_image and a non-blocking one for classify_image_async.
+fetcher = build_fetcher()
+async_fetcher = build_async_fetcher()
+
+# Bounded pool running the preprocessing and inference of classify_image_async (ASYNC_MAX_WORKERS).
+executor = ThreadPoolExecutor(max_workers=env_int("ASYNC_MAX_WORKERS", 4), thread_name_prefix="classify")
+
+# Fetch -> preprocess -> inference pipeline, with URL and prediction caches (CACHE_* settings).
+# PREPROCESS_MODE is "fast" (draft-mode JPEG decoding, default) or "keras" (full decode with load_img).
+# With PHASH_ENABLED, resized or re-encoded copies of a classified image reuse its predictions (PHASH_* settings).
+url_cache, prediction_cache = build_caches()
+near_duplicates = build_near_duplicate_index()
+# Images are decoded while they download, and rejected from their header if unsupported or too
+# large (STREAM_DECODE_ENABLED, IMAGE_MAX_PIXELS, IMAGE_FORMATS settings).
+decoder_factory = build_decoder_factory()
+pipeline = ImagePipeline(
+    model, batcher, fetcher, url_cache, prediction_cache,
+    preprocess_mode=env_str("PREPROCESS_MODE", "fast"),
+    async_fetcher=async_fetcher, executor=executor, arena=arena, near_duplicates=near_duplicates,
+    decoder_factory=decoder_factory, cascade=cascade,
+)
+
+# Backpressure: a bounded number of requests in flight, and requests that would miss the deadline in
+# their X-Deadline-Ms header are rejected early with 429 and Retry-After (ADMISSION_* settings).
+admission = build_admission_controller()
+
+# Per-stage timing histograms served on the metrics route, and sampled profiling (PROFILE_* settings).
+metrics = RequestMetrics()
+if arena is not None:
+    metrics.register(*buffer_arena_gauges(arena))
+if near_duplicates is not None:
+    metrics.register(*near_duplicate_gauges(near_duplicates))
+metrics.register(*admission_gauges(admission))
+if cascade is not None:
+    metrics.register(*cascade_gauges(cascade))
+profiler = build_profile_sampler()
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
 
 @app.route(route="classify_image")
 def classify_image(req: func.HttpRequest) -> func.HttpResponse:
     """Route for classifying an image using MobileNetV2.
-    
+
     This function accepts an HTTP GET request with an image URL as a query parameter.
     It fetches the image from the provided URL, preprocesses it to match the input
     requirements of the MobileNetV2 model, performs inference to classify the image,
     and returns the top-3 predictions along with timing metrics.
 
+    Repeated requests are served from the URL and prediction caches where possible:
+    a URL seen before is revalidated with a conditional GET, and an image whose bytes
+    have been classified before skips preprocessing and inference. An image whose
+    perceptual hash is close to one classified before (the same picture at another size
+    or JPEG quality) skips inference and returns the stored predictions.
+
+    Under overload, at most ADMISSION_MAX_IN_FLIGHT requests are processed at a time and
+    the rest wait in a bounded queue. A request that would miss the deadline given in its
+    `X-Deadline-Ms` header, or finds the queue full, is rejected at once with 429 Too Many
+    Requests and a `Retry-After` header.
+
+    Every stage of the request is timed with a nanosecond clock and returned in the
+    `Server-Timing` header (admission_wait, fetch, decode_overlap, decode, resize, normalize, phash, queue_wait, cascade, predict,
+    topk, serialize, plus process cpu time and the total, in milliseconds), and aggregated into
+    the histograms served by the `metrics` route.
+
     Args:
         req (func.HttpRequest): The HTTP request object containing the query parameter `url`.
             - `url` (str): The URL of the image to be classified.
+            The optional `X-Deadline-Ms` header gives the time the client is willing to wait.
 
     Returns:
         func.HttpResponse: An HTTP response object containing:
             - `overall_duration` (float): Total time taken to process the request, in seconds.
             - `network_duration` (float): Time taken to fetch the image from the provided URL, in seconds.
+            - `overlap_duration` (float): Part of `network_duration` spent decoding the image while it was
+              still downloading (decode time hidden behind the transfer), in seconds.
             - `cpu_duration` (float): Time taken to preprocess the image (resize, normalize, etc.), in seconds.
             - `ml_duration` (float): Time taken to perform inference using the MobileNetV2 model, in seconds.
+              This includes any time spent waiting for a shared batch to start.
+            - `queue_wait_duration` (float): Part of `ml_duration` spent waiting in the batching queue, in seconds.
+            - `batch_size` (int): Number of images in the batched forward pass that served this request
+              (0 if the predictions came from the cache).
+            - `tier` (str): Which model answered: "small" (the small model of the cascade, if enabled), "full"
+              (MobileNetV2), or "cache" (the prediction cache or the near-duplicate index).
+            - `cache` (dict): Outcome of the `url` and `predictions` cache lookups ("hit", "miss" or "disabled")
+              and of the `near_duplicate` lookup, plus the cumulative counters of the caches and the
+              near-duplicate index (hit and audit disagreement rates) in `stats`.
+            - `connections` (dict): Keep-alive connection metrics for the image host (requests, retries, bytes,
+              connections opened, ...).
+            - `cold_start` (bool): Whether this was the first request served by this instance.
+            - `startup` (dict): Only on the first request, the duration of each startup phase in seconds
+              (`worker_boot`, `imports`, `model_load`, `cascade_load`, `warmup`) and their `total`.
             - `predictions` (list): A list of the top-3 predictions from the model, where each prediction is a dictionary:
                 - `label` (str): The human-readable label of the predicted class (e.g., "golden retriever").
                 - `probability` (float): The confidence score of the prediction, ranging from 0 to 1.
     """
-    overall_start = time.time()
+    trace = RequestTrace()
+    with profiler.capture():
+        response = classify(req, trace)
+    metrics.observe(trace, "classify_image", response.status_code)
+    return response
+
+def classify(req: func.HttpRequest, trace: RequestTrace) -> func.HttpResponse:
+    """Classify the image at the `url` query parameter, recording every stage in `trace`.
+
+    Returns:
+        func.HttpResponse: The response described in `classify_image`.
+    """
+    cold_start = startup.claim_first_request()
     try:
         # Extract the image URL from query parameters
         image_url = req.params.get('url')
         if not image_url:
             return func.HttpResponse("Missing image URL", status_code=400)
-        
-        # Network-bound task: Fetch the image
-        network_start = time.time()
-        response = requests.get(image_url)
-        network_duration = time.time() - network_start
-        
-        # CPU-bound task: Preprocess the image
-        cpu_start = time.time()
-        # Load and resize image to 224x224 (expected size for MobileNetV2)
-        img = image.load_img(BytesIO(response.content), target_size=(224, 224))
-        x = image.img_to_array(img)
-        x = np.expand_dims(x, axis=0)
-        x = preprocess_input(x)
-        cpu_duration = time.time() - cpu_start 
-
-        # ML-inference task: Run prediction
-        ml_start = time.time()
-        preds = model.predict(x)
-        predictions = decode_predictions(preds, top=3)[0]
-        ml_duration = time.time() - ml_start
-        
-        overall_duration = time.time() - overall_start
-        
-        # Return results as structured JSON response
-        result = {
-            "overall_duration": round(overall_duration, 5),
-            "network_duration": round(network_duration, 5),
-            "cpu_duration": round(cpu_duration, 5),
-            "ml_duration": round(ml_duration, 5),
-            "predictions": [
-                {"label": pred[1], "probability": float(pred[2])} for pred in predictions
-            ]
-        }
-        
-        return func.HttpResponse(
-            json.dumps(result),
-            mimetype="application/json",
-            status_code=200
-        )
-        
+
+        # Wait for an admission slot, or shed the request if it cannot finish before its deadline
+        with admission.acquire(request_deadline(req.headers)) as ticket:
+            trace.add("admission_wait", ticket.queue_wait)
+
+            # Fetch, preprocess and classify the image
+            stages = pipeline.classify_url(image_url, trace)
+        return classification_response(stages, trace, cold_start)
+
+    except AdmissionRejected as e:
+        logging.info(e)
+        return rejection_response(e)
+    except ImageTooLargeError as e:
+        logging.error(e)
+        return func.HttpResponse("Image too large", status_code=413)
+    except UnsupportedImageError as e:
+        logging.error(e)
+        return func.HttpResponse("Unsupported image format", status_code=415)
     except Exception as e:
         logging.error(e)
         return func.HttpResponse("Error processing image", status_code=500)
+
+def rejection_response(rejection: AdmissionRejected) -> func.HttpResponse:
+    """Build the 429 response of a request that was not admitted."""
+    return func.HttpResponse(
+        f"Too many requests ({rejection.reason})",
+        status_code=429,
+        headers={"Retry-After": str(rejection.retry_after)}
+    )
+
+def classification_response(stages: dict, trace: RequestTrace, cold_start: bool) -> func.HttpResponse:
+    """Build the JSON response of `classify_image` from the pipeline result."""
+    overall_duration = trace.elapsed()
+
+    # Return results as structured JSON response
+    result = {
+        "overall_duration": round(overall_duration, 5),
+        "network_duration": round(stages["network_duration"], 5),
+        "overlap_duration": round(stages["overlap_duration"], 5),
+        "cpu_duration": round(stages["cpu_duration"], 5),
+        "ml_duration": round(stages["ml_duration"], 5),
+        "queue_wait_duration": round(stages["queue_wait_duration"], 5),
+        "batch_size": stages["batch_size"],
+        "tier": stages["tier"],
+        "cache": dict(stages["cache"], stats=pipeline.cache_stats()),
+        "connections": stages["connections"],
+        "cold_start": cold_start,
+        "predictions": stages["predictions"]
+    }
+    if cold_start:
+        result["startup"] = startup.summary()
+
+    with trace.stage("serialize"):
+        body = json.dumps(result)
+
+    return func.HttpResponse(
+        body,
+        mimetype="application/json",
+        status_code=200,
+        headers={"Server-Timing": trace.server_timing()}
+    )
+
+@app.route(route="classify_image_async")
+async def classify_image_async(req: func.HttpRequest) -> func.HttpResponse:
+    """Route for classifying an image using MobileNetV2, without blocking the worker.
+
+    Behaves like `classify_image` and returns the same response, but runs as a coroutine
+    on the worker's event loop: the image is downloaded with a non-blocking HTTP client,
+    and preprocessing and inference run on a bounded thread pool (ASYNC_MAX_WORKERS). While
+    one invocation waits for its image, the worker can start others, instead of each
+    invocation holding a thread of the worker pool for its whole duration.
+
+    Sampled profiling is not applied here, since cProfile cannot follow a coroutine
+    across the threads it runs on.
+
+    Args:
+        req (func.HttpRequest): The HTTP request object containing the query parameter `url`.
+            - `url` (str): The URL of the image to be classified.
+
+    Returns:
+        func.HttpResponse: The same response as `classify_image`.
+    """
+    trace = RequestTrace()
+    cold_start = startup.claim_first_request()
+    try:
+        # Extract the image URL from query parameters
+        image_url = req.params.get('url')
+        if not image_url:
+            response = func.HttpResponse("Missing image URL", status_code=400)
+        else:
+            # Wait for an admission slot without blocking the event loop for other invocations
+            ticket = await admission.acquire_async(request_deadline(req.headers))
+            with ticket:
+                trace.add("admission_wait", ticket.queue_wait)
+
+                # Fetch without blocking, then preprocess and classify on the executor
+                stages = await pipeline.classify_url_async(image_url, trace)
+            response = classification_response(stages, trace, cold_start)
+
+    except AdmissionRejected as e:
+        logging.info(e)
+        response = rejection_response(e)
+    except ImageTooLargeError as e:
+        logging.error(e)
+        response = func.HttpResponse("Image too large", status_code=413)
+    except UnsupportedImageError as e:
+        logging.error(e)
+        response = func.HttpResponse("Unsupported image format", status_code=415)
+    except Exception as e:
+        logging.error(e)
+        response = func.HttpResponse("Error processing image", status_code=500)
+
+    metrics.observe(trace, "classify_image_async", response.status_code)
+    return response
+
+@app.route(route="metrics", methods=[func.HttpMethod.GET])
+def request_metrics(req: func.HttpRequest) -> func.HttpResponse:
+    """Route exposing the request metrics of this instance in the Prometheus text format.
+
+    Returns histograms of the request duration, each pipeline stage, process CPU time and
+    peak RSS growth per request, plus request counts by status. The metrics cover only
+    the instance that answers, since every instance of the app keeps its own.
+
+    Args:
+        req (func.HttpRequest): The HTTP request object (not used).
+
+    Returns:
+        func.HttpResponse: The metrics as `text/plain; version=0.0.4`.
+    """
+    return func.HttpResponse(
+        metrics.render(),
+        headers={"Content-Type": RequestMetrics.CONTENT_TYPE},
+        status_code=200
+    )
+
+@app.route(route="classify_batch", methods=[func.HttpMethod.POST])
+def classify_image_batch(req: func.HttpRequest) -> func.HttpResponse:
+    """Route for classifying many images in one request using MobileNetV2.
+
+    This function accepts an HTTP POST request whose body is either a JSON list of image
+    URLs (or `{"urls": [...]}`), or multipart/form-data with image file uploads (and
+    optionally `url` fields). Images are downloaded and preprocessed concurrently, up to
+    the BATCH_CONCURRENCY setting, and their inference runs through the shared micro-batcher.
+
+    The response is NDJSON: one JSON line per image, in completion order rather than
+    request order. A failing image produces an error line without affecting the rest of
+    the batch. Every image is admitted like a single request, sharing the batch's
+    X-Deadline-Ms deadline; an image that is not admitted gets a "rejected" line with
+    status code 429.
+
+    The lines are returned together once the batch has finished, as in the OpenFaaS
+    handler. Streaming them would need the HTTP streams extension, which switches every
+    HTTP route of the app to FastAPI request and response types.
+
+    Args:
+        req (func.HttpRequest): The HTTP request with the JSON or multipart body.
+
+    Returns:
+        func.HttpResponse: An `application/x-ndjson` body where each line contains:
+            - `index` (int): Position of the image in the request.
+            - `url` (str) or `filename` (str): Which image the line is about.
+            - `status` (str): "ok", "error" or "rejected".
+            - `error` (str): What went wrong, for failed and rejected images.
+            - `status_code` (int) and `retry_after` (int): 429 and the seconds to wait before
+              retrying, for rejected images.
+            - `network_duration`, `cpu_duration`, `ml_duration`, `queue_wait_duration` (float):
+              Stage timings in seconds, for successful images.
+            - `batch_size` (int), `tier` (str), `cache` (dict) and `predictions` (list): As for `classify_image`.
+        A malformed request gets status 400 and a single error line.
+    """
+    try:
+        items = parse_batch_request(req.get_body(), req.headers.get("Content-Type", ""))
+    except BatchRequestError as e:
+        logging.error(e)
+        return func.HttpResponse(
+            b"".join(ndjson_lines([{"status": "error", "error": str(e)}])),
+            mimetype="application/x-ndjson",
+            status_code=400
+        )
+
+    results = classify_batch(pipeline, items, max_concurrency=env_int("BATCH_CONCURRENCY", 8),
+                             admission=admission, deadline=request_deadline(req.headers))
+    return func.HttpResponse(b"".join(ndjson_lines(results)), mimetype="application/x-ndjson", status_code=200)
@@ -0,0 +1,14 @@
+# __INIT__.PY
+# Python package with the image classification pipeline shared by the Azure Function and the OpenFaaS function.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Each platform deploys its own folder, so this package is kept as an identical copy in
+# "Azure Functions/classifier" and "OpenFaaS/process-image/classifier". Modules inside the
+# package only use relative imports so that the same files work in both places:
+#   - Azure Functions imports it as a top-level package (`from classifier import ...`)
+#   - OpenFaaS imports it from inside the `function` package (`from .classifier import ...`)
+# Any change to one copy must be made to the other.
@@ -0,0 +1,47 @@
+# BAKE_ARTIFACTS.PY
+# Python script saving the model and label table into the function package before deployment.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Run this once before `func azure functionapp publish` / `faas-cli up` so that a cold
+# instance loads everything from its own package instead of downloading the ImageNet
+# weights and class index from the internet during startup.
+#
+# Usage (from the function folder):
+#   python -m classifier.bake_artifacts
+
+import os
+import shutil
+
+from .backends import KERAS_MODEL_PATH
+from .cascade import SMALL_MODEL_PATH, build_small_model
+from .labels import ARTIFACTS_DIR, CLASS_INDEX_PATH, CLASS_INDEX_URL
+
+
+def main():
+    from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2
+    from tensorflow.keras.utils import get_file
+
+    os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+
+    # Save the full model (architecture + weights) in the native Keras format
+    model = MobileNetV2(weights='imagenet')
+    model.save(KERAS_MODEL_PATH)
+    print(f"Saved model ({os.path.getsize(KERAS_MODEL_PATH) / 1e6:.1f} MB) to {KERAS_MODEL_PATH}")
+
+    # And the small model of the cascade (CASCADE_ENABLED)
+    small_model = build_small_model(path="")
+    small_model.save(SMALL_MODEL_PATH)
+    print(f"Saved small model ({os.path.getsize(SMALL_MODEL_PATH) / 1e6:.1f} MB) to {SMALL_MODEL_PATH}")
+
+    # Copy the class index that decode_predictions would otherwise download on first use
+    downloaded = get_file("imagenet_class_index.json", CLASS_INDEX_URL, cache_subdir="models")
+    shutil.copyfile(downloaded, CLASS_INDEX_PATH)
+    print(f"Saved label table to {CLASS_INDEX_PATH}")
+
+
+if __name__ == "__main__":
+    main()
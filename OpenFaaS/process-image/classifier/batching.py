@@ -0,0 +1,160 @@
+# BATCHING.PY
+# Python module with a dynamic micro-batching scheduler for model inference.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Both platforms run several invocations of the function concurrently in one worker
+# process (the Azure Python worker thread pool and the OpenFaaS HTTP server threads).
+# Without batching each invocation runs its own 1x224x224x3 forward pass. The MicroBatcher
+# collects inputs that arrive close together and runs them through the model in a single
+# forward pass, then hands each caller back its own rows of the output.
+
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class _PendingRequest:
+    """A single caller's input waiting in the batching queue."""
+
+    def __init__(self, x):
+        self.x = x
+        self.rows = x.shape[0]
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.preds = None
+        self.error = None
+        self.queue_wait = 0.0
+        self.batch_size = 0
+
+
+class MicroBatcher:
+    """Groups concurrent inference requests into batched forward passes.
+
+    The first request to arrive opens a batch. The worker thread then keeps adding
+    requests until either `max_batch_size` rows have been collected or `max_wait_ms`
+    milliseconds have passed since the batch was opened, whichever comes first.
+
+    Args:
+        predict_fn (callable): Function taking an array of shape (N, ...) and returning
+            an array of shape (N, ...), e.g. `model.predict`.
+        max_batch_size (int): Maximum number of rows in one forward pass. A value of 1
+            disables batching and calls `predict_fn` directly on the caller's thread.
+        max_wait_ms (float): Maximum time to hold a batch open waiting for more requests.
+        arena (BufferArena, optional): Pool of input buffers that batches are assembled in.
+            Without it every batch of more than one request allocates a new array.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=10.0, arena=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.arena = arena
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def predict(self, x):
+        """Run inference on `x` as part of a shared batch.
+
+        Blocks until the batch containing `x` has been processed.
+
+        Args:
+            x (np.ndarray): Preprocessed model input of shape (N, ...), usually N = 1.
+
+        Returns:
+            tuple: A pair `(preds, stats)` where:
+                - `preds` (np.ndarray): The model output rows belonging to `x`.
+                - `stats` (dict): Scheduling information for this call:
+                    - `queue_wait` (float): Time spent waiting for the batch to start, in seconds.
+                    - `batch_size` (int): Number of rows in the forward pass that served this call.
+        """
+        if self.max_batch_size == 1:
+            return self.predict_fn(x), {"queue_wait": 0.0, "batch_size": x.shape[0]}
+
+        self._ensure_worker()
+        pending = _PendingRequest(x)
+        self._queue.put(pending)
+        pending.done.wait()
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.preds, {"queue_wait": pending.queue_wait, "batch_size": pending.batch_size}
+
+    def _ensure_worker(self):
+        # The worker is started on first use rather than in __init__ so that creating a
+        # batcher at import time does not start threads before the host forks workers.
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self):
+        # Block for the first request, then gather more until the batch is full or the wait expires
+        first = self._queue.get()
+        batch = [first]
+        rows = first.rows
+        deadline = time.perf_counter() + self.max_wait
+
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            rows += pending.rows
+
+        return batch, rows
+
+    def _assemble(self, batch, rows):
+        # A single request is passed through as is, several are copied into one batch array
+        if len(batch) == 1:
+            return batch[0].x
+        inputs = [pending.x for pending in batch]
+        if self.arena is None:
+            return np.concatenate(inputs, axis=0)
+        out = self.arena.acquire((rows,) + inputs[0].shape[1:])
+        try:
+            return np.concatenate(inputs, axis=0, out=out)
+        except Exception:
+            self.arena.release(out)
+            raise
+
+    def _run(self):
+        while True:
+            batch, rows = self._collect_batch()
+            batch_start = time.perf_counter()
+            x = None
+            try:
+                x = self._assemble(batch, rows)
+                preds = self.predict_fn(x)
+
+                # Hand each caller back the rows that belong to its own input
+                offset = 0
+                for pending in batch:
+                    pending.preds = preds[offset:offset + pending.rows]
+                    offset += pending.rows
+            except Exception as e:
+                logging.error(f"Batched inference failed: {e}")
+                for pending in batch:
+                    pending.error = e
+            finally:
+                # The forward pass has consumed the batch input, so its buffer can be reused
+                if self.arena is not None and len(batch) > 1 and x is not None:
+                    self.arena.release(x)
+
+            for pending in batch:
+                pending.queue_wait = batch_start - pending.enqueued_at
+                pending.batch_size = rows
+                pending.done.set()
@@ -0,0 +1,277 @@
+# CACHE.PY
+# Python module with a bounded LRU/TTL cache used to skip repeated downloads and inference.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# The pipeline uses two instances of LRUCache:
+#   1. URL cache: image URL -> ETag / Last-Modified validators and the content key of the
+#      last response, so repeat requests can send a conditional GET and get a 304 back.
+#   2. Prediction cache: content key (backend name + SHA-256 of the image bytes) -> the
+#      final top-3 predictions, so the same picture is never preprocessed or classified twice.
+#
+# Each cache has a memory budget in bytes, least-recently-used eviction, a time-to-live
+# and hit/miss counters. An optional on-disk tier (e.g. under /tmp) keeps entries across
+# warm restarts of the function host, since /tmp survives while the instance is alive.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Rough per-entry bookkeeping overhead (dict slots, key objects, timestamps), in bytes
+ENTRY_OVERHEAD = 200
+
+
+class LRUCache:
+    """A thread-safe LRU cache with a byte budget, TTL and an optional disk tier.
+
+    Values must be JSON-serializable. Their size is estimated from the length of their
+    JSON encoding.
+
+    Args:
+        name (str): Name of the cache, used in logs and as the disk sub-folder.
+        max_bytes (int): Memory budget. Least-recently-used entries are evicted when the
+            estimated size of all entries exceeds it.
+        ttl (float): Time-to-live of an entry in seconds. 0 means entries never expire.
+        disk_dir (str, optional): Folder for the on-disk tier. Disabled if not given.
+        disk_max_bytes (int): Budget for the on-disk tier. The oldest files are removed
+            when it is exceeded.
+    """
+
+    def __init__(self, name, max_bytes=16 * 1024 * 1024, ttl=3600.0, disk_dir=None,
+                 disk_max_bytes=256 * 1024 * 1024):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_dir = os.path.join(disk_dir, name) if disk_dir else None
+        # Estimated bytes of the disk tier; the folder is only scanned once this exceeds the budget
+        self._disk_bytes = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+
+        # key -> (value, size, expires_at), ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expires_at(self):
+        return time.time() + self.ttl if self.ttl > 0 else float("inf")
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key):
+        """Look up a key, checking memory first and then the disk tier.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            The cached value, or None if the key is missing or has expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+                self.expirations += 1
+
+        value, expires_at = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, value, expires_at)
+            return value
+
+    def contains(self, key):
+        """Check whether an unexpired entry exists without updating recency or counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > time.time():
+                return True
+        if not self.disk_dir:
+            return False
+        # The file was written when the entry was stored, so it expires `ttl` after its mtime
+        try:
+            modified = os.stat(self._disk_path(key)).st_mtime
+        except OSError:
+            return False
+        return self.ttl <= 0 or modified + self.ttl > time.time()
+
+    def put(self, key, value):
+        """Store a value in memory and, if enabled, on disk.
+
+        Args:
+            key (str): The cache key.
+            value: A JSON-serializable value.
+        """
+        expires_at = self._expires_at()
+        with self._lock:
+            self._store(key, value, expires_at)
+        self._write_disk(key, value, expires_at)
+
+    def _store(self, key, value, expires_at):
+        if key in self._entries:
+            self._remove(key)
+
+        size = len(key) + len(json.dumps(value)) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (value, size, expires_at)
+        self._size += size
+
+        # Evict least-recently-used entries until we are back within budget
+        while self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def _read_disk(self, key, now):
+        if not self.disk_dir:
+            return None, None
+        path = self._disk_path(key)
+        try:
+            with open(path) as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None, None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable {self.name} cache file {path}: {e}")
+            return None, None
+
+        expires_at = record["expires_at"] if record["expires_at"] is not None else float("inf")
+        if record.get("key") != key or expires_at <= now:
+            self._unlink(path)
+            return None, None
+        return record["value"], expires_at
+
+    def _write_disk(self, key, value, expires_at):
+        if not self.disk_dir:
+            return
+        record = {"key": key, "value": value, "expires_at": expires_at if expires_at != float("inf") else None}
+        path = self._disk_path(key)
+        try:
+            # Write to a temporary file first so concurrent readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(record, f)
+                size = f.tell()
+            replaced = self._file_size(path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write {self.name} cache file {path}: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes += size - replaced
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self._prune_disk()
+
+    def _scan_disk(self):
+        # (mtime, size, path) of every cache file
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _prune_disk(self):
+        # Remove the oldest files once the disk tier is over its budget. Other workers
+        # share the folder, so the scan also corrects the in-memory estimate.
+        files = self._scan_disk()
+        total = sum(size for _, size, _ in files)
+        if total > self.disk_max_bytes:
+            for _, size, path in sorted(files):
+                self._remove_file(path)
+                total -= size
+                if total <= self.disk_max_bytes:
+                    break
+        with self._lock:
+            self._disk_bytes = total
+
+    def _unlink(self, path):
+        size = self._file_size(path)
+        if self._remove_file(path):
+            with self._lock:
+                self._disk_bytes -= size
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def stats(self):
+        """Return the cache counters.
+
+        Returns:
+            dict: Entry count, estimated size in bytes, and hit/miss/eviction counters.
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 5) if lookups else 0.0,
+            }
+
+
+def content_key(backend_name, content):
+    """Build the prediction cache key for some image bytes.
+
+    The backend name is part of the key since quantized backends can give slightly
+    different predictions for the same image.
+
+    Args:
+        backend_name (str): Name of the inference backend.
+        content (bytes): The downloaded image.
+
+    Returns:
+        str: A key of the form "<backend>:<sha256 hex digest>".
+    """
+    return f"{backend_name}:{hashlib.sha256(content).hexdigest()}"
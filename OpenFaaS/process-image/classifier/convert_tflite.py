@@ -0,0 +1,89 @@
+# CONVERT_TFLITE.PY
+# Python script converting MobileNetV2 to post-training quantized TFLite models.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# The converted models are written to classifier/models/ and deployed with the function,
+# where they are used by the "tflite-float16" and "tflite-int8" inference backends.
+#
+# Usage (from the function folder):
+#   python -m classifier.convert_tflite --quantization float16
+#   python -m classifier.convert_tflite --quantization int8 --images path/to/calibration/images
+#   python -m classifier.convert_tflite --quantization all --picsum 100
+
+import argparse
+import os
+
+from .accuracy import PREPROCESS_MODES, sample_images
+from .backends import MODELS_DIR, build_keras_model
+
+
+def convert(model, quantization, calibration_images=None):
+    """Convert a Keras model to a quantized TFLite flatbuffer.
+
+    Args:
+        model (tf.keras.Model): The model to convert.
+        quantization (str): "float16" to store weights as float16, or "int8" for full
+            integer quantization of weights and activations.
+        calibration_images (np.ndarray, optional): Preprocessed images of shape
+            (N, 224, 224, 3) used to calibrate activation ranges. Required for "int8".
+
+    Returns:
+        bytes: The serialized TFLite model.
+
+    Raises:
+        ValueError: If the quantization mode is unknown or int8 has no calibration images.
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if calibration_images is None or len(calibration_images) == 0:
+            raise ValueError("int8 quantization needs calibration images")
+
+        def representative_dataset():
+            for img in calibration_images:
+                yield [img[None, ...]]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    else:
+        raise ValueError(f"Unknown quantization {quantization!r}, expected 'float16' or 'int8'")
+
+    return converter.convert()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert MobileNetV2 to quantized TFLite models.")
+    parser.add_argument("--quantization", choices=["float16", "int8", "all"], default="all")
+    parser.add_argument("--images", help="Folder of calibration images (needed for int8)")
+    parser.add_argument("--picsum", type=int, default=0, help="Number of random picsum.photos calibration images")
+    parser.add_argument("--preprocess-mode", default="fast", choices=PREPROCESS_MODES,
+                        help="Preprocessing of the sample images, as PREPROCESS_MODE in the functions")
+    parser.add_argument("--output-dir", default=MODELS_DIR)
+    args = parser.parse_args(argv)
+
+    modes = ["float16", "int8"] if args.quantization == "all" else [args.quantization]
+    calibration_images = sample_images(args.images, args.picsum, args.preprocess_mode) if "int8" in modes else None
+
+    model = build_keras_model()
+    os.makedirs(args.output_dir, exist_ok=True)
+    for quantization in modes:
+        tflite_model = convert(model, quantization, calibration_images)
+        output_path = os.path.join(args.output_dir, f"mobilenet_v2_{quantization}.tflite")
+        with open(output_path, "wb") as f:
+            f.write(tflite_model)
+        print(f"Saved {quantization} model ({len(tflite_model) / 1e6:.1f} MB) to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
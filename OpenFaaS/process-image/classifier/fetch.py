@@ -0,0 +1,242 @@
+# FETCH.PY
+# Python module with the pooled, bounded HTTP client used to download images.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# `requests.get(url)` opens a new TCP (and TLS) connection for every image, waits forever
+# if the server stalls, and reads the whole body into memory however large it is.
+# ImageFetcher keeps one module-level requests.Session with a keep-alive connection pool,
+# applies connect/read timeouts, enforces a byte cap while streaming the body, retries
+# transient failures with exponential backoff, and keeps per-host metrics. Each chunk of a
+# successful response can also be handed to a decoder while the rest is still downloading
+# (see classifier.streaming).
+
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import env_float, env_int
+
+# HTTP status codes worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Errors worth retrying: connection failures, timeouts and connections dropped mid-body
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an image is larger than the fetcher's byte cap."""
+
+
+class FetchResult:
+    """The outcome of a successful download.
+
+    Attributes:
+        url (str): The final URL after redirects.
+        status_code (int): The HTTP status code.
+        headers (dict): The response headers.
+        content (bytes): The response body (empty for 304 Not Modified).
+        decoder (StreamingDecoder): The decoder the body was streamed into, if one was requested
+            and the response was 200 OK.
+    """
+
+    def __init__(self, url, status_code, headers, content, decoder=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.decoder = decoder
+
+    def raise_for_status(self):
+        """Raise requests.HTTPError for 4xx and 5xx responses."""
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error fetching {self.url}")
+
+
+class _HostMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+
+class ImageFetcher:
+    """Downloads images over a shared keep-alive connection pool.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections kept per host.
+        connect_timeout (float): Seconds to wait for a connection to be established.
+        read_timeout (float): Seconds to wait between bytes from the server.
+        max_bytes (int): Largest body accepted. Bigger downloads are aborted.
+        retries (int): Number of retries after a transient error.
+        backoff (float): Base delay in seconds for exponential backoff between retries.
+    """
+
+    def __init__(self, pool_size=16, connect_timeout=3.05, read_timeout=15.0, max_bytes=20 * 1024 * 1024,
+                 retries=2, backoff=0.2):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_bytes = max_bytes
+        self.retries = retries
+        self.backoff = backoff
+
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, decoder_factory=None):
+        """Download a URL, retrying transient failures.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (dict, optional): Extra request headers, e.g. conditional GET validators.
+            decoder_factory (callable, optional): Creates an object with a `feed(chunk)` method
+                (e.g. classifier.streaming.StreamingDecoder) that receives the body of a
+                200 OK response chunk by chunk as it downloads. A new one is created per attempt.
+
+        Returns:
+            FetchResult: The response. 4xx/5xx responses are returned rather than raised
+            (after retries for retryable statuses), so callers can inspect them.
+
+        Raises:
+            ImageTooLargeError: If the body is larger than `max_bytes`.
+            requests.RequestException: If the request still fails after all retries.
+            Any error raised by the decoder's `feed`, which aborts the download.
+        """
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    result = self._get_once(url, headers, decoder_factory)
+                    if result.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                        self._record(host, start, len(result.content), retries=attempt)
+                        return result
+                    delay = self._retry_delay(attempt, result.headers.get("Retry-After"))
+                except RETRY_ERRORS as e:
+                    if attempt >= self.retries:
+                        raise
+                    delay = self._retry_delay(attempt)
+                    logging.warning(f"Retrying {host} after error: {e}")
+                attempt += 1
+                time.sleep(delay)
+        except Exception:
+            self._record(host, start, 0, retries=attempt, error=True)
+            raise
+
+    def _get_once(self, url, headers, decoder_factory=None):
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            # Reject early when the server announces a body that is too large
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                raise ImageTooLargeError(f"Image is {declared} bytes, limit is {self.max_bytes}")
+
+            # Only stream real images into the decoder, not error pages or retried responses
+            decoder = decoder_factory() if decoder_factory is not None and response.status_code == 200 else None
+
+            # Enforce the cap while streaming, since Content-Length may be missing or wrong
+            body = bytearray()
+            for chunk in response.iter_content(CHUNK_SIZE):
+                body += chunk
+                if len(body) > self.max_bytes:
+                    raise ImageTooLargeError(f"Image exceeds the limit of {self.max_bytes} bytes")
+                if decoder is not None:
+                    decoder.feed(chunk)
+
+            return FetchResult(response.url, response.status_code, response.headers, bytes(body), decoder)
+
+    def _retry_delay(self, attempt, retry_after=None):
+        delay = self.backoff * (2 ** attempt)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        # Never sleep longer than the read timeout, the caller is waiting on us
+        return min(delay, self.timeout[1])
+
+    def _record(self, host, start, nbytes, retries=0, error=False):
+        with self._lock:
+            metrics = self._metrics.setdefault(host, _HostMetrics())
+            metrics.requests += 1
+            metrics.errors += int(error)
+            metrics.retries += retries
+            metrics.bytes += nbytes
+            metrics.seconds += time.perf_counter() - start
+
+    def host_stats(self, host=None):
+        """Return per-host connection metrics.
+
+        `connections_opened` and `pooled_requests` come from the urllib3 connection pools,
+        so comparing them shows how often keep-alive connections were reused. Hosts only
+        reached through redirects appear with pool counters but no request metrics.
+
+        Args:
+            host (str, optional): Only return the metrics of this host (netloc).
+
+        Returns:
+            dict: Host -> `requests`, `errors`, `retries`, `bytes`, `mean_duration`,
+            `connections_opened` and `pooled_requests`.
+        """
+        pools = {}
+        for key in self.adapter.poolmanager.pools.keys():
+            try:
+                pool = self.adapter.poolmanager.pools[key]
+            except KeyError:
+                continue  # Evicted while we were iterating
+            netloc = key.key_host if key.key_port in (None, 80, 443) else f"{key.key_host}:{key.key_port}"
+            opened, served = pools.get(netloc, (0, 0))
+            pools[netloc] = (opened + pool.num_connections, served + pool.num_requests)
+
+        with self._lock:
+            hosts = [host] if host is not None else sorted(set(self._metrics) | set(pools))
+            stats = {}
+            for name in hosts:
+                metrics = self._metrics.get(name, _HostMetrics())
+                opened, served = pools.get(name, (0, 0))
+                stats[name] = {
+                    "requests": metrics.requests,
+                    "errors": metrics.errors,
+                    "retries": metrics.retries,
+                    "bytes": metrics.bytes,
+                    "mean_duration": round(metrics.seconds / metrics.requests, 5) if metrics.requests else 0.0,
+                    "connections_opened": opened,
+                    "pooled_requests": served,
+                }
+            return stats
+
+
+def build_fetcher():
+    """Create the image fetcher from the function settings.
+
+    Settings:
+        - `FETCH_POOL_SIZE` (int): Pooled keep-alive connections per host (default 16).
+        - `FETCH_CONNECT_TIMEOUT` (float): Connect timeout in seconds (default 3.05).
+        - `FETCH_READ_TIMEOUT` (float): Read timeout in seconds (default 15).
+        - `FETCH_MAX_BYTES` (int): Largest image accepted (default 20 MB).
+        - `FETCH_RETRIES` (int): Retries after a transient error (default 2).
+        - `FETCH_BACKOFF` (float): Base backoff delay in seconds (default 0.2).
+
+    Returns:
+        ImageFetcher: The configured fetcher.
+    """
+    return ImageFetcher(
+        pool_size=env_int("FETCH_POOL_SIZE", 16),
+        connect_timeout=env_float("FETCH_CONNECT_TIMEOUT", 3.05),
+        read_timeout=env_float("FETCH_READ_TIMEOUT", 15.0),
+        max_bytes=env_int("FETCH_MAX_BYTES", 20 * 1024 * 1024),
+        retries=env_int("FETCH_RETRIES", 2),
+        backoff=env_float("FETCH_BACKOFF", 0.2),
+    )
@@ -0,0 +1,92 @@
+# LABELS.PY
+# Python module with the ImageNet label table used to decode model predictions.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# `decode_predictions` downloads imagenet_class_index.json the first time it is called,
+# which adds a network round trip (and a failure point) to the first request of every
+# cold instance. The label table is instead baked into the function package by
+# `python -m classifier.bake_artifacts` and read from disk at startup.
+
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts")
+CLASS_INDEX_PATH = os.path.join(ARTIFACTS_DIR, "imagenet_class_index.json")
+CLASS_INDEX_URL = "https://storage.googleapis.com/download.tensorflow.org/data/imagenet_class_index.json"
+
+
+class LabelTable:
+    """Maps the 1000 MobileNetV2 output indices to ImageNet class ids and names.
+
+    Args:
+        class_index (dict): The contents of imagenet_class_index.json, i.e.
+            {"0": ["n01440764", "tench"], ...}.
+    """
+
+    def __init__(self, class_index):
+        self.class_ids = [class_index[str(i)][0] for i in range(len(class_index))]
+        self.names = [class_index[str(i)][1] for i in range(len(class_index))]
+
+    def decode(self, preds, top=3):
+        """Decode model outputs into the top predictions of each row.
+
+        Gives the same result as `decode_predictions` from tensorflow.keras, without
+        needing TensorFlow or the network.
+
+        Args:
+            preds (np.ndarray): Class probabilities of shape (N, 1000).
+            top (int): Number of predictions to return per row.
+
+        Returns:
+            list: For each row, a list of `(class_id, name, probability)` tuples ordered by
+            decreasing probability.
+        """
+        preds = np.asarray(preds)
+        # argpartition finds the top-k in linear time, then only those k are sorted
+        top_indices = np.argpartition(preds, -top, axis=1)[:, -top:]
+        top_probs = np.take_along_axis(preds, top_indices, axis=1)
+        order = np.argsort(-top_probs, axis=1)
+        top_indices = np.take_along_axis(top_indices, order, axis=1)
+
+        return [
+            [(self.class_ids[i], self.names[i], float(row[i])) for i in indices]
+            for row, indices in zip(preds, top_indices)
+        ]
+
+
+_label_table = None
+_label_table_lock = threading.Lock()
+
+
+def load_label_table(path=CLASS_INDEX_PATH):
+    """Load the label table once per process.
+
+    Uses the baked copy in classifier/artifacts/ when it exists, and otherwise falls back
+    to the Keras download (cached under ~/.keras), logging a warning since that costs a
+    network request on cold starts.
+
+    Args:
+        path (str): Location of the baked imagenet_class_index.json.
+
+    Returns:
+        LabelTable: The shared label table.
+    """
+    global _label_table
+    with _label_table_lock:
+        if _label_table is None:
+            if not os.path.exists(path):
+                logging.warning(f"{path} not found, downloading the ImageNet class index. "
+                                "Run `python -m classifier.bake_artifacts` before deploying.")
+                from tensorflow.keras.utils import get_file
+                path = get_file("imagenet_class_index.json", CLASS_INDEX_URL, cache_subdir="models")
+            with open(path) as f:
+                _label_table = LabelTable(json.load(f))
+        return _label_table
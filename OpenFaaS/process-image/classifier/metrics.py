@@ -0,0 +1,247 @@
+# METRICS.PY
+# Python module with Prometheus-style histograms of request stage timings.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Every finished RequestTrace (see classifier.tracing) is added to a set of cumulative
+# histograms, which the functions serve in the Prometheus text exposition format:
+# the `metrics` route on Azure and the /metrics path on OpenFaaS. The metrics are kept
+# per worker process, so a scraper sees each instance separately.
+
+import math
+import threading
+from bisect import bisect_left
+
+# Bucket upper bounds in seconds, from sub-millisecond stages up to cold-start requests
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Bucket upper bounds in bytes for the peak RSS growth of a request
+MEMORY_BUCKETS = (0, 64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2, 64 * 1024 ** 2, 256 * 1024 ** 2)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """A cumulative histogram with optional labels, like a Prometheus histogram.
+
+    Args:
+        name (str): Metric name.
+        help (str): Description shown in the exposition format.
+        buckets (tuple): Increasing bucket upper bounds; +Inf is added automatically.
+        labelnames (tuple): Names of the labels passed to `observe`.
+    """
+
+    def __init__(self, name, help, buckets=DURATION_BUCKETS, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (made cumulative when rendered), sum and count
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Counter:
+    """A monotonically increasing counter with optional labels."""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """A value read when the metrics are rendered, e.g. the size of a pool.
+
+    Args:
+        name (str): Metric name.
+        help (str): Description shown in the exposition format.
+        read (callable): Returns the current value, or a dict of label values -> value.
+        labelnames (tuple): Names of the labels, when `read` returns a dict.
+        kind (str): Prometheus metric type, "counter" for values kept by another object
+            that only grow.
+    """
+
+    def __init__(self, name, help, read, labelnames=(), kind="gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        value = self.read()
+        if not self.labelnames:
+            return lines + [f"{self.name} {_format_value(value)}"]
+        for key, series_value in sorted(value.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {_format_value(series_value)}")
+        return lines
+
+
+def buffer_arena_gauges(arena):
+    """Return gauges reporting the size and reuse of a classifier.buffers.BufferArena."""
+    return [
+        Gauge("classifier_buffer_pool_bytes", "Memory held by the input buffer pools.",
+              lambda: arena.stats()["pooled_bytes"]),
+        Gauge("classifier_buffer_pool_allocated", "Input buffers allocated since start-up.",
+              lambda: arena.stats()["allocated"]),
+        Gauge("classifier_buffer_pool_reuse_ratio", "Fraction of input buffer requests served from the pool.",
+              lambda: arena.stats()["reuse_rate"]),
+    ]
+
+
+def near_duplicate_gauges(index):
+    """Return gauges reporting the hit and audit disagreement rates of a classifier.phash.NearDuplicateIndex."""
+    return [
+        Gauge("classifier_near_duplicate_entries", "Images in the near-duplicate index.",
+              lambda: index.stats()["entries"]),
+        Gauge("classifier_near_duplicate_hit_ratio", "Fraction of classified images matched to an indexed image.",
+              lambda: index.stats()["hit_rate"]),
+        Gauge("classifier_near_duplicate_disagreement_ratio",
+              "Fraction of audited near-duplicate matches whose top-1 label differed from the model.",
+              lambda: index.stats()["disagreement_rate"]),
+    ]
+
+
+def admission_gauges(controller):
+    """Return metrics reporting the outcomes and queue of a classifier.admission.AdmissionController."""
+    def outcomes():
+        stats = controller.stats()
+        counts = {("rejected_" + reason,): count for reason, count in stats["rejected"].items()}
+        counts.update({("admitted",): stats["admitted"], ("expired",): stats["expired"], ("late",): stats["late"]})
+        return counts
+
+    return [
+        Gauge("classifier_admission_requests_total",
+              "Admission outcomes: admitted, rejected_<reason>, expired while queued, late (admitted, missed deadline).",
+              outcomes, labelnames=("outcome",), kind="counter"),
+        Gauge("classifier_admission_in_flight", "Requests holding an admission slot.",
+              lambda: controller.stats()["in_flight"]),
+        Gauge("classifier_admission_waiting", "Requests queued for an admission slot.",
+              lambda: controller.stats()["waiting"]),
+        Gauge("classifier_admission_service_p95_seconds", "p95 of recent service times used for load shedding.",
+              lambda: controller.stats()["service_p95"]),
+    ]
+
+
+def cascade_gauges(cascade):
+    """Return gauges reporting how often the small model of a classifier.cascade.ModelCascade answers."""
+    return [
+        Gauge("classifier_cascade_requests_total", "Images classified by the small model of the cascade.",
+              lambda: cascade.stats()["requests"], kind="counter"),
+        Gauge("classifier_cascade_answered_total", "Images answered by the small model without the full model.",
+              lambda: cascade.stats()["answered"], kind="counter"),
+        Gauge("classifier_cascade_threshold", "Top-1 probability the small model needs to answer.",
+              lambda: cascade.stats()["threshold"]),
+    ]
+
+
+class RequestMetrics:
+    """The request metrics of one function instance.
+
+    Metrics:
+        - `classifier_requests_total{route, status}`: Requests served.
+        - `classifier_request_duration_seconds{route}`: Total request time.
+        - `classifier_stage_duration_seconds{stage}`: Time per pipeline stage.
+        - `classifier_request_cpu_seconds{route}`: Process CPU time during the request.
+        - `classifier_request_peak_rss_growth_bytes{route}`: Growth of the peak RSS during the request.
+        - Any metrics added with `register`.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self.requests = Counter("classifier_requests_total", "Requests served.", ("route", "status"))
+        self.duration = Histogram("classifier_request_duration_seconds", "Total request time.",
+                                  labelnames=("route",))
+        self.stages = Histogram("classifier_stage_duration_seconds", "Time spent in each pipeline stage.",
+                                labelnames=("stage",))
+        self.cpu = Histogram("classifier_request_cpu_seconds", "Process CPU time while the request ran.",
+                             labelnames=("route",))
+        self.rss = Histogram("classifier_request_peak_rss_growth_bytes",
+                             "Growth of the process peak RSS while the request ran.",
+                             buckets=MEMORY_BUCKETS, labelnames=("route",))
+        self.extra = []
+
+    def register(self, *metrics):
+        """Add metrics that are rendered after the request metrics, e.g. Gauges."""
+        self.extra.extend(metrics)
+
+    def observe(self, trace, route, status):
+        """Add a request's trace to the metrics.
+
+        Args:
+            trace (RequestTrace): The request's trace (finished here if it is not already).
+            route (str): Route name, e.g. "classify_image".
+            status (int): HTTP status code of the response.
+        """
+        trace.finish()
+        self.requests.inc(route=route, status=status)
+        self.duration.observe(trace.total_ns / 1e9, route=route)
+        self.cpu.observe(trace.cpu_ns / 1e9, route=route)
+        if trace.rss_delta is not None:
+            self.rss.observe(trace.rss_delta, route=route)
+        for stage, duration_ns in trace.stages.items():
+            self.stages.observe(duration_ns / 1e9, stage=stage)
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in (self.requests, self.duration, self.stages, self.cpu, self.rss, *self.extra):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
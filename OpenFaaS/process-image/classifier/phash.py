@@ -0,0 +1,200 @@
+# PHASH.PY
+# Python module with a perceptual-hash index for reusing predictions of near-duplicate images.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# The prediction cache is keyed on the SHA-256 of the image bytes, so the same picture at
+# another resolution or JPEG quality (e.g. picsum.photos/seed/x/700/800 and /1400/1600)
+# misses it and is classified again.
+#
+# A difference hash (dHash) captures the coarse structure of an image instead: the model
+# input is averaged down to a 9x8 grayscale grid, and each of the 64 bits records whether a
+# cell is brighter than its right-hand neighbour. Resizing and re-encoding change only a few
+# bits, so images within a small Hamming distance of each other are treated as the same
+# picture. The hash is computed from the already resized (1, 224, 224, 3) model input, so
+# it costs a fraction of a millisecond and no extra decoding.
+#
+# NearDuplicateIndex keeps the hashes bit-packed in a fixed-size (max_entries, 8) uint8
+# array and scans it in one vectorized XOR + popcount. Once full, the oldest entries are
+# overwritten, so memory is bounded. Every Nth hit is audited: the image is classified
+# anyway and the top-1 label compared with the stored one, so the rate of wrong reuses
+# can be monitored and the distance threshold tuned.
+#
+# Reusing a match changes the model output for that image, so the index is off by default.
+# Enable it per deployment once the audit disagreement rate has been measured on its traffic.
+
+import logging
+import threading
+
+import numpy as np
+
+from .config import env_bool, env_int
+
+HASH_SIZE = 8
+HASH_BYTES = HASH_SIZE * HASH_SIZE // 8
+
+# Number of set bits of every byte value, for popcounts of XORed hashes
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+# ITU-R BT.601 luma weights
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def dhash(pixels, hash_size=HASH_SIZE):
+    """Compute the difference hash of an image.
+
+    Args:
+        pixels (np.ndarray): An RGB image of shape (height, width, 3) or a model input of
+            shape (1, height, width, 3), in any value range.
+        hash_size (int): Number of rows of the grid; the hash has hash_size^2 bits.
+
+    Returns:
+        np.ndarray: The hash as hash_size^2 / 8 packed uint8 bytes.
+    """
+    if pixels.ndim == 4:
+        pixels = pixels[0]
+    gray = pixels @ _LUMA
+    height, width = gray.shape
+
+    # Average the image down to hash_size rows and hash_size + 1 columns
+    row_edges = np.linspace(0, height, hash_size + 1).astype(int)[:-1]
+    col_edges = np.linspace(0, width, hash_size + 2).astype(int)[:-1]
+    sums = np.add.reduceat(np.add.reduceat(gray, row_edges, axis=0), col_edges, axis=1)
+    counts = np.outer(np.diff(np.append(row_edges, height)), np.diff(np.append(col_edges, width)))
+    grid = sums / counts
+
+    return np.packbits(grid[:, 1:] > grid[:, :-1])
+
+
+def hamming_distances(hashes, query):
+    """Return the Hamming distance between each row of `hashes` and `query` (packed bytes)."""
+    return _POPCOUNT[np.bitwise_xor(hashes, query)].sum(axis=1, dtype=np.int32)
+
+
+def same_top1(a, b):
+    """Whether two prediction lists agree on the most likely label."""
+    return bool(a) and bool(b) and a[0]["label"] == b[0]["label"]
+
+
+class NearDuplicateIndex:
+    """Bounded index from perceptual hashes to predictions.
+
+    Args:
+        max_entries (int): Number of hashes kept. The oldest are replaced once it is full.
+        max_distance (int): Largest Hamming distance (out of 64 bits) counted as a match.
+        audit_every (int): Classify every Nth matched image anyway and compare the result
+            with the stored predictions (0 = never audit).
+    """
+
+    def __init__(self, max_entries=4096, max_distance=4, audit_every=20):
+        self.max_entries = max(1, int(max_entries))
+        self.max_distance = max_distance
+        self.audit_every = audit_every
+        self._hashes = np.zeros((self.max_entries, HASH_BYTES), dtype=np.uint8)
+        self._values = [None] * self.max_entries
+        self._count = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.audits = 0
+        self.disagreements = 0
+
+    def lookup(self, image_hash):
+        """Find the closest indexed image within `max_distance`.
+
+        Args:
+            image_hash (np.ndarray): Packed hash from `dhash`.
+
+        Returns:
+            tuple: `(slot, predictions, distance, audit)`. `slot` and `predictions` are None
+            when nothing is close enough. `audit` is True when the caller should classify
+            the image anyway and report the result with `audit_result`.
+        """
+        with self._lock:
+            self.lookups += 1
+            if self._count == 0:
+                return None, None, None, False
+            distances = hamming_distances(self._hashes[:self._count], image_hash)
+            slot = int(np.argmin(distances))
+            distance = int(distances[slot])
+            if distance > self.max_distance:
+                return None, None, distance, False
+            self.hits += 1
+            audit = self.audit_every > 0 and self.hits % self.audit_every == 0
+            return slot, self._values[slot], distance, audit
+
+    def add(self, image_hash, predictions):
+        """Index the predictions of an image, replacing the oldest entry if the index is full."""
+        with self._lock:
+            slot = self._next
+            self._hashes[slot] = image_hash
+            self._values[slot] = predictions
+            self._next = (slot + 1) % self.max_entries
+            self._count = min(self._count + 1, self.max_entries)
+
+    def audit_result(self, slot, stored, predictions, distance):
+        """Record whether an audited match agreed with the model's own predictions.
+
+        On disagreement the entry is updated with the model's predictions.
+
+        Returns:
+            bool: True if the top-1 labels agree.
+        """
+        agree = same_top1(stored, predictions)
+        with self._lock:
+            self.audits += 1
+            if not agree:
+                self.disagreements += 1
+                # Only overwrite the slot if it still holds the entry that was matched
+                if self._values[slot] is stored:
+                    self._values[slot] = predictions
+        if not agree:
+            logging.warning(f"Near-duplicate match at distance {distance} disagreed: "
+                            f"{stored[0]['label']} indexed, {predictions[0]['label']} predicted")
+        return agree
+
+    def stats(self):
+        """Return the index counters.
+
+        Returns:
+            dict: Entry count, memory used by the hashes, lookups, hits, `hit_rate`, and the
+            audits and `disagreement_rate` of audited hits.
+        """
+        with self._lock:
+            return {
+                "entries": self._count,
+                "hash_bytes": self._hashes.nbytes,
+                "max_distance": self.max_distance,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 5) if self.lookups else 0.0,
+                "audits": self.audits,
+                "disagreements": self.disagreements,
+                "disagreement_rate": round(self.disagreements / self.audits, 5) if self.audits else 0.0,
+            }
+
+
+def build_near_duplicate_index():
+    """Create the near-duplicate index from the PHASH_* settings.
+
+    Settings:
+        - `PHASH_ENABLED` (bool): Reuse predictions of near-duplicate images (default false).
+        - `PHASH_MAX_DISTANCE` (int): Largest Hamming distance counted as a match (default 4).
+        - `PHASH_MAX_ENTRIES` (int): Number of images indexed (default 4096).
+        - `PHASH_AUDIT_EVERY` (int): Classify every Nth match anyway to check it (default 20, 0 = off).
+
+    Returns:
+        NearDuplicateIndex: The index, or None if disabled.
+    """
+    if not env_bool("PHASH_ENABLED", False):
+        return None
+    return NearDuplicateIndex(
+        max_entries=env_int("PHASH_MAX_ENTRIES", 4096),
+        max_distance=env_int("PHASH_MAX_DISTANCE", 4),
+        audit_every=env_int("PHASH_AUDIT_EVERY", 20),
+    )
@@ -0,0 +1,165 @@
+# PREPROCESS.PY
+# Python module with fast image preprocessing for MobileNetV2.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# `image.load_img(..., target_size=(224, 224))` decodes the full image before resizing it,
+# so a 3200x3200 JPEG costs a 10-megapixel decode to produce 50 thousand pixels. JPEG
+# decoders can instead decode straight to 1/2, 1/4 or 1/8 scale by skipping the higher DCT
+# frequencies (Pillow's "draft" mode). We decode to the smallest such scale that is still
+# at least 224 px, finish with a high-quality resize, and normalize with in-place NumPy
+# operations.
+#
+# Small images are the exception: a source of at most SMALL_SOURCE_SCALE times 224 px
+# gains little or nothing from draft decoding, and a bicubic filter costs more than the
+# whole original decode (about 1 ms for 256x256 -> 224x224, slower than load_img at 256
+# and 512 px). They are resized with the nearest-neighbour filter load_img uses, so they
+# cost what they did before.
+#
+# Tolerance: `normalize` matches `preprocess_input` (x / 127.5 - 1) exactly for the same
+# pixels. Compared with the original `load_img` path (full decode + nearest-neighbour
+# resize) the pixels differ by design, since draft decoding and bicubic resizing both
+# average neighbouring pixels instead of picking one. The mean absolute difference must
+# stay below 0.05 on the [-1, 1] scale (PIXEL_TOLERANCE, checked for every image size by
+# latency_breakdown/benchmark_preprocess.py).
+
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+TARGET_SIZE = (224, 224)
+
+# Largest accepted mean absolute difference from the original load_img path, on the [-1, 1] scale
+PIXEL_TOLERANCE = 0.05
+
+# Formats whose decoders support reduced-resolution decoding through Image.draft
+DRAFT_FORMATS = ("JPEG",)
+
+# Sources up to this many times the target size are resized with the nearest-neighbour filter
+SMALL_SOURCE_SCALE = 2.5
+
+# Key of Image.info holding the (width, height) of the image before draft decoding
+SOURCE_SIZE_KEY = "source_size"
+
+
+def decode_image(data, target_size=TARGET_SIZE):
+    """Decode image bytes to an RGB image, at reduced resolution where the format allows it.
+
+    Args:
+        data (bytes): An encoded image (JPEG, PNG, ...).
+        target_size (tuple): The (width, height) the image will be resized to afterwards.
+
+    Returns:
+        PIL.Image.Image: The decoded RGB image, no smaller than `target_size` in either
+        dimension unless the original was smaller.
+    """
+    img = Image.open(BytesIO(data))
+    img.info[SOURCE_SIZE_KEY] = img.size
+    if img.format in DRAFT_FORMATS:
+        # Ask the decoder for the largest 1/2^n scale that is still at least target_size
+        img.draft("RGB", target_size)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    img.load()
+    return img
+
+
+def resize_image(img, target_size=TARGET_SIZE):
+    """Resize a decoded image to the model input size with bicubic filtering.
+
+    `reducing_gap` first shrinks the image by an integer factor with a cheap box filter
+    when it is still much larger than the target (e.g. PNGs, which have no draft mode),
+    then applies the bicubic filter to the remaining small image. Images whose source
+    (before draft decoding) was at most SMALL_SOURCE_SCALE times the target use the
+    nearest-neighbour filter instead, as load_img does.
+
+    Args:
+        img (PIL.Image.Image): The decoded image.
+        target_size (tuple): The (width, height) to resize to.
+
+    Returns:
+        PIL.Image.Image: The resized image.
+    """
+    if img.size == tuple(target_size):
+        return img
+    source_width, source_height = img.info.get(SOURCE_SIZE_KEY, img.size)
+    if max(source_width / target_size[0], source_height / target_size[1]) <= SMALL_SOURCE_SCALE:
+        return img.resize(target_size, Image.Resampling.NEAREST)
+    return img.resize(target_size, Image.Resampling.BICUBIC, reducing_gap=3.0)
+
+
+def normalize(pixels, out=None):
+    """Scale uint8 RGB pixels to the [-1, 1] range expected by MobileNetV2.
+
+    Equivalent to `preprocess_input` from tensorflow.keras.applications.mobilenet_v2,
+    but converts to float32 once and then works in place.
+
+    Args:
+        pixels (np.ndarray): An array of RGB pixel values in [0, 255].
+        out (np.ndarray, optional): A float32 array of the same shape to write into.
+
+    Returns:
+        np.ndarray: The normalized float32 array (`out` if given).
+    """
+    if out is None:
+        out = np.asarray(pixels, dtype=np.float32).copy()
+    else:
+        np.copyto(out, pixels, casting="unsafe")
+    np.divide(out, 127.5, out=out)
+    np.subtract(out, 1.0, out=out)
+    return out
+
+
+def preprocess_image(data, target_size=TARGET_SIZE, out=None):
+    """Decode, resize and normalize an image for MobileNetV2.
+
+    Args:
+        data (bytes): An encoded image.
+        target_size (tuple): The model input (width, height).
+        out (np.ndarray, optional): A float32 array of shape (1, height, width, 3) to write
+            the result into, e.g. a buffer from classifier.buffers.BufferArena.
+
+    Returns:
+        tuple: `(x, timings)` where `x` is a float32 array of shape (1, height, width, 3)
+        (`out` if given) and `timings` holds the `decode`, `resize` and `normalize`
+        durations in seconds.
+    """
+    start = time.perf_counter()
+    img = decode_image(data, target_size)
+    decoded = time.perf_counter()
+    x, timings = prepare_image(img, target_size, out)
+    return x, dict(decode=decoded - start, **timings)
+
+
+def prepare_image(img, target_size=TARGET_SIZE, out=None):
+    """Resize and normalize an already decoded image for MobileNetV2.
+
+    Args:
+        img (PIL.Image.Image): The decoded RGB image, e.g. from `decode_image` or a
+            classifier.streaming.StreamingDecoder.
+        target_size (tuple): The model input (width, height).
+        out (np.ndarray, optional): A float32 array of shape (1, height, width, 3) to write into.
+
+    Returns:
+        tuple: `(x, timings)` as for `preprocess_image`, with only the `resize` and
+        `normalize` durations.
+    """
+    start = time.perf_counter()
+    img = resize_image(img, target_size)
+    resized = time.perf_counter()
+    if out is None:
+        x = normalize(np.asarray(img))[np.newaxis, ...]
+    else:
+        x = out
+        normalize(np.asarray(img), out=x[0])
+    normalized = time.perf_counter()
+
+    return x, {
+        "resize": resized - start,
+        "normalize": normalized - resized,
+    }
@@ -0,0 +1,198 @@
+# STREAMING.PY
+# Python module with an incremental image decoder fed by the download stream.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Without streaming, the network and CPU stages run strictly one after the other: the whole
+# body is downloaded, and only then is the image decoded. For the 2560-3200 px images that
+# means several megabytes of transfer followed by a decode that could have started with
+# the first chunk.
+#
+# The fetcher passes every downloaded chunk to a StreamingDecoder:
+#   1. Header: as soon as enough bytes have arrived to parse the image header, the format
+#      and dimensions are checked. Unsupported formats and images with too many pixels
+#      are rejected right away, which aborts the download instead of finishing it.
+#   2. Decode: for JPEG, the decoder is set up at the draft scale used by
+#      classifier.preprocess and every later chunk is decoded as it arrives. While the
+#      decoder works on one chunk, the kernel keeps receiving the next ones, so most of
+#      the decode is hidden behind the transfer.
+#   3. Close: after the last chunk only the remaining decode work is left. Formats that
+#      cannot be decoded incrementally (PNG, progressive images Pillow reads in one go,
+#      ...) and streams that ended early fall back to classifier.preprocess.decode_image
+#      on the body the fetcher buffered.
+#
+# The decoder does not keep its own copy of the body: it holds the bytes received until
+# the header parses, then only the bytes the decoder has not consumed yet. Parsing the
+# header is retried only once the buffer has doubled, so a large header is not re-read
+# on every chunk.
+#
+# `overlap_seconds` records how much decode work ran during the download, which the
+# functions report as `overlap_duration` next to `network_duration`.
+#
+# Pillow's public incremental parser (ImageFile.Parser) does not decode JPEGs incrementally
+# and cannot use draft mode, so the decoder is driven the same way the parser does it,
+# through Image._getdecoder, `load_prepare`, `tile` and `decoderconfig`. These are Pillow
+# internals, so Pillow is pinned in both requirements.txt files, and handler_test.py
+# checks that JPEGs still take the incremental path (`incremental`) rather than silently
+# falling back.
+
+import functools
+import struct
+import time
+from io import BytesIO
+
+from PIL import Image
+
+from .config import env_bool, env_int, env_str
+from .fetch import ImageTooLargeError
+from .preprocess import DRAFT_FORMATS, SOURCE_SIZE_KEY, TARGET_SIZE, decode_image
+
+# Formats accepted by default
+DEFAULT_FORMATS = ("JPEG", "PNG", "WEBP", "GIF", "BMP")
+
+# Formats decoded chunk by chunk; others are only header-checked while streaming
+INCREMENTAL_FORMATS = ("JPEG",)
+
+# Stop looking for a header after this many bytes and decode the whole body at the end
+HEADER_MAX_BYTES = 1024 * 1024
+
+
+class UnsupportedImageError(ValueError):
+    """Raised when the image header shows a format that is not accepted."""
+
+
+class StreamingDecoder:
+    """Decodes an image incrementally from the chunks of its download.
+
+    Args:
+        target_size (tuple): The (width, height) the image will be resized to afterwards.
+        max_pixels (int): Largest number of pixels (width x height) accepted.
+        formats (tuple): Accepted Pillow format names, e.g. "JPEG".
+    """
+
+    def __init__(self, target_size=TARGET_SIZE, max_pixels=40_000_000, formats=DEFAULT_FORMATS):
+        self.target_size = target_size
+        self.max_pixels = max_pixels
+        self.formats = tuple(formats)
+
+        self.image = None
+        # True once the image is being decoded chunk by chunk
+        self.incremental = False
+        self.finished = False
+        self.overlap_seconds = 0.0
+
+        self._decoder = None
+        # Bytes received before the header parsed, then bytes not consumed by the decoder yet
+        self._header = bytearray()
+        self._next_parse = 0
+        self._pending = b""
+        self._error = False
+        self._header_done = False
+
+    def feed(self, chunk):
+        """Add a downloaded chunk, parsing the header or decoding as far as possible.
+
+        Raises:
+            UnsupportedImageError: If the header shows a format not in `formats`.
+            ImageTooLargeError: If the header shows more than `max_pixels` pixels.
+        """
+        start = time.perf_counter()
+        if not self._header_done:
+            self._header += chunk
+            if len(self._header) >= self._next_parse:
+                self._parse_header()
+        elif self._decoder is not None and not self.finished:
+            self._pending += chunk
+            self._decode_pending()
+        self.overlap_seconds += time.perf_counter() - start
+
+    def _parse_header(self):
+        try:
+            img = Image.open(BytesIO(self._header))
+        except Image.DecompressionBombError as e:
+            raise ImageTooLargeError(str(e))
+        except (OSError, SyntaxError, ValueError, struct.error):
+            # Not enough bytes for the header yet, or not an image (close() will tell)
+            if len(self._header) > HEADER_MAX_BYTES:
+                self._header_done = True
+                self._header = bytearray()
+            self._next_parse = 2 * len(self._header)
+            return
+
+        self._header_done = True
+        header, self._header = self._header, bytearray()
+        if img.format not in self.formats:
+            raise UnsupportedImageError(f"Unsupported image format {img.format}")
+        width, height = img.size
+        if width * height > self.max_pixels:
+            raise ImageTooLargeError(f"Image is {width}x{height} pixels, limit is {self.max_pixels}")
+
+        if img.format not in INCREMENTAL_FORMATS or len(img.tile) != 1:
+            return
+        img.info[SOURCE_SIZE_KEY] = img.size
+        if img.format in DRAFT_FORMATS:
+            # Decode at the same reduced scale as classifier.preprocess.decode_image
+            img.draft("RGB", self.target_size)
+
+        img.load_prepare()
+        decoder_name, extents, offset, args = img.tile[0]
+        img.tile = []
+        self._decoder = Image._getdecoder(img.mode, decoder_name, args, img.decoderconfig)
+        self._decoder.setimage(img.im, extents)
+        self.image = img
+        self.incremental = True
+        self._pending = bytes(memoryview(header)[offset:])
+        self._decode_pending()
+
+    def _decode_pending(self):
+        consumed, error = self._decoder.decode(self._pending)
+        if consumed < 0:
+            # End of the image (error >= 0) or a decoding error
+            self.finished = True
+            self._error = error < 0
+            self._pending = b""
+        else:
+            self._pending = self._pending[consumed:]
+
+    def close(self, data):
+        """Finish decoding once the download is complete.
+
+        Args:
+            data (bytes): The whole downloaded body, decoded in one go if the image could
+                not be decoded incrementally.
+
+        Returns:
+            PIL.Image.Image: The decoded RGB image, as `decode_image` would return it.
+        """
+        if self._decoder is not None:
+            self._decoder.cleanup()
+            self._decoder = None
+            if self.finished and not self._error:
+                return self.image if self.image.mode == "RGB" else self.image.convert("RGB")
+
+        # Not decodable incrementally, or the stream was cut short or corrupt
+        return decode_image(data, self.target_size)
+
+
+def build_decoder_factory():
+    """Create the factory of streaming decoders from the STREAM_* settings.
+
+    Settings:
+        - `STREAM_DECODE_ENABLED` (bool): Decode images while they download (default true).
+        - `IMAGE_MAX_PIXELS` (int): Largest image accepted, in pixels (default 40 million).
+        - `IMAGE_FORMATS` (str): Comma-separated accepted formats (default JPEG,PNG,WEBP,GIF,BMP).
+
+    Returns:
+        callable: Creates a StreamingDecoder per download, or None if streaming is disabled.
+    """
+    if not env_bool("STREAM_DECODE_ENABLED", True):
+        return None
+    formats = [name.strip().upper() for name in env_str("IMAGE_FORMATS", ",".join(DEFAULT_FORMATS)).split(",")]
+    return functools.partial(
+        StreamingDecoder,
+        max_pixels=env_int("IMAGE_MAX_PIXELS", 40_000_000),
+        formats=tuple(name for name in formats if name),
+    )
@@ -0,0 +1,196 @@
+# TRACING.PY
+# Python module with per-request stage tracing and sampled profiling.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# A RequestTrace follows one request through the pipeline. Every stage is timed with the
+# monotonic nanosecond clock (`time.perf_counter_ns`), so short stages like normalize and
+# top-k decoding are not lost to rounding. The trace also records the process CPU time
+# and the growth of the peak resident set size (RSS) while the request ran. Its timings
+# are returned to the client in a Server-Timing header and aggregated by classifier.metrics.
+#
+# Stages recorded by the pipeline and the handlers:
+#   fetch, decode, resize, normalize (or preprocess in the keras mode), queue_wait,
+#   predict, topk and serialize.
+
+import cProfile
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+from .config import env_int, env_str
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Stages that make up the `cpu_duration` and `ml_duration` fields of the responses
+CPU_STAGES = ("decode", "resize", "normalize", "preprocess", "phash")
+ML_STAGES = ("queue_wait", "cascade", "predict", "topk")
+
+
+def peak_rss_bytes():
+    """Return the peak resident set size of the process in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RequestTrace:
+    """Stage timings and resource usage of one request.
+
+    The trace starts when it is created. Stages can be timed with the `stage` context
+    manager or added from durations measured elsewhere (e.g. by the micro-batcher).
+    A stage that runs more than once, like fetch after a re-download, accumulates.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._start_ns = time.perf_counter_ns()
+        self._cpu_start_ns = time.process_time_ns()
+        self._rss_start = peak_rss_bytes()
+        self.total_ns = None
+        self.cpu_ns = None
+        self.rss_delta = None
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage of the request."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add_ns(name, time.perf_counter_ns() - start)
+
+    def add_ns(self, name, duration_ns):
+        self.stages[name] = self.stages.get(name, 0) + int(duration_ns)
+
+    def add(self, name, seconds):
+        self.add_ns(name, seconds * 1e9)
+
+    def seconds(self, *names):
+        """Return the total duration of the named stages, in seconds."""
+        return sum(self.stages.get(name, 0) for name in names) / 1e9
+
+    def elapsed(self):
+        """Return the time since the trace started, in seconds."""
+        return (time.perf_counter_ns() - self._start_ns) / 1e9
+
+    def finish(self):
+        """Record the total time, CPU time and peak RSS growth. Only the first call counts.
+
+        The CPU time is that of the whole process while the request ran, so it includes
+        work done for concurrent requests (and the shared inference batch).
+        """
+        if self.total_ns is None:
+            self.total_ns = time.perf_counter_ns() - self._start_ns
+            self.cpu_ns = time.process_time_ns() - self._cpu_start_ns
+            rss = peak_rss_bytes()
+            if rss is not None and self._rss_start is not None:
+                self.rss_delta = rss - self._rss_start
+        return self
+
+    def server_timing(self):
+        """Return the trace as a Server-Timing header value, with durations in milliseconds."""
+        self.finish()
+        metrics = [f"{name};dur={duration / 1e6:.3f}" for name, duration in self.stages.items()]
+        metrics.append(f"cpu;dur={self.cpu_ns / 1e6:.3f}")
+        metrics.append(f"total;dur={self.total_ns / 1e6:.3f}")
+        return ", ".join(metrics)
+
+
+class ProfileSampler:
+    """Captures a cProfile or tracemalloc profile of one in every N requests.
+
+    Profiles are written to `output_dir` as `<mode>-<request number>.prof` (cProfile,
+    open with pstats or snakeviz) or `.txt` (tracemalloc, top allocation sites). Only one
+    capture runs at a time; sampled requests that overlap a running capture are skipped.
+    cProfile only sees the request's own thread, so inference running on the
+    micro-batcher's worker thread shows up as time spent waiting.
+
+    Args:
+        every (int): Profile one in every `every` requests, 0 disables sampling.
+        mode (str): "cprofile" or "tracemalloc".
+        output_dir (str): Folder for the captured profiles.
+        top (int): Number of allocation sites written for tracemalloc captures.
+    """
+
+    def __init__(self, every=0, mode="cprofile", output_dir="/tmp/classifier-profiles", top=25):
+        if mode not in ("cprofile", "tracemalloc"):
+            raise ValueError(f"Unknown profile mode {mode!r}, expected 'cprofile' or 'tracemalloc'")
+        self.every = max(0, int(every))
+        self.mode = mode
+        self.output_dir = output_dir
+        self.top = top
+        self.captures = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+
+    def capture(self):
+        """Return a context manager that profiles the request if it is sampled."""
+        if not self.every:
+            return nullcontext()
+        with self._lock:
+            self._count += 1
+            request_number = self._count
+        if request_number % self.every or not self._busy.acquire(blocking=False):
+            return nullcontext()
+        return self._capture(request_number)
+
+    @contextmanager
+    def _capture(self, request_number):
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            if self.mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+                    path = os.path.join(self.output_dir, f"cprofile-{request_number}.prof")
+                    profiler.dump_stats(path)
+            else:
+                tracemalloc.start()
+                try:
+                    yield
+                finally:
+                    snapshot = tracemalloc.take_snapshot()
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    path = os.path.join(self.output_dir, f"tracemalloc-{request_number}.txt")
+                    with open(path, "w") as f:
+                        f.write(f"Peak traced memory: {peak} bytes\n")
+                        for stat in snapshot.statistics("lineno")[:self.top]:
+                            f.write(f"{stat}\n")
+            self.captures += 1
+            logging.info(f"Saved {self.mode} profile of request {request_number} to {path}")
+        finally:
+            self._busy.release()
+
+
+def build_profile_sampler():
+    """Create the profile sampler from the function settings.
+
+    Settings:
+        - `PROFILE_SAMPLE_EVERY` (int): Profile one in every N requests (default 0, off).
+        - `PROFILE_MODE` (str): "cprofile" (default) or "tracemalloc".
+        - `PROFILE_DIR` (str): Folder for the captured profiles (default /tmp/classifier-profiles).
+
+    Returns:
+        ProfileSampler: The sampler.
+    """
+    return ProfileSampler(
+        every=env_int("PROFILE_SAMPLE_EVERY", 0),
+        mode=env_str("PROFILE_MODE", "cprofile"),
+        output_dir=env_str("PROFILE_DIR", "/tmp/classifier-profiles"),
+    )
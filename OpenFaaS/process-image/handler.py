@@ -1,4 +1,4 @@
-# HANDLER.PY                     
+# HANDLER.PY
 # Python file with OpenFaaS Function defined for Coursework 2.
 #
 # Name of Student: Vindhyaa Saravanan
@@ -7,16 +7,98 @@
 # Username: sc21vs
 
 import logging
-from io import BytesIO
-import requests
-import time
 import json
-import numpy as np
-from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2, preprocess_input, decode_predictions
-from tensorflow.keras.preprocessing import image
 
-# Load the MobileNetV2 model with pretrained weights on ImageNet.
-model = MobileNetV2(weights='imagenet')
+from .classifier.startup import StartupProfile, warm_up
+
+# Time each startup phase so the first response of a cold instance can report where the time went.
+startup = StartupProfile()
+
+with startup.phase("imports"):
+    from .classifier.admission import AdmissionRejected, build_admission_controller, request_deadline
+    from .classifier.backends import load_backend
+    from .classifier.batch import BatchRequestError, classify_batch, ndjson_lines, parse_batch_request
+    from .classifier.batching import MicroBatcher
+    from .classifier.buffers import build_buffer_arena
+    from .classifier.cascade import build_cascade
+    from .classifier.config import env_bool, env_float, env_int, env_str
+    from .classifier.fetch import ImageTooLargeError, build_fetcher
+    from .classifier.labels import load_label_table
+    from .classifier.metrics import (RequestMetrics, admission_gauges, buffer_arena_gauges, cascade_gauges,
+                                     near_duplicate_gauges)
+    from .classifier.phash import build_near_duplicate_index
+    from .classifier.pipeline import ImagePipeline, build_caches
+    from .classifier.streaming import UnsupportedImageError, build_decoder_factory
+    from .classifier.tracing import RequestTrace, build_profile_sampler
+
+# Load MobileNetV2 (pretrained on ImageNet) with the configured inference backend:
+# "keras" (default), "keras-direct", "tflite-float16" or "tflite-int8".
+# The model and label table come from classifier/artifacts/ when baked (see classifier.bake_artifacts).
+# TF_INTRA_OP_THREADS / TF_INTER_OP_THREADS size TensorFlow's thread pools (0 = one thread per core).
+# MODEL_SHARED_WEIGHTS reads tflite-int8 weights from the memory-mapped model file, shared by all workers on a host.
+with startup.phase("model_load"):
+    model = load_backend(
+        env_str("INFERENCE_BACKEND", "keras"),
+        intra_op_threads=env_int("TF_INTRA_OP_THREADS", 0),
+        inter_op_threads=env_int("TF_INTER_OP_THREADS", 0),
+        shared_weights=env_bool("MODEL_SHARED_WEIGHTS", False),
+    )
+    load_label_table()
+
+# Reusable model input buffers for preprocessing and batch assembly (BUFFER_POOL_* settings).
+arena = build_buffer_arena()
+
+# Group concurrent invocations into batched forward passes (BATCH_MAX_SIZE=1 disables batching).
+batcher = MicroBatcher(
+    model.predict,
+    max_batch_size=env_int("BATCH_MAX_SIZE", 8),
+    max_wait_ms=env_float("BATCH_MAX_WAIT_MS", 10.0),
+    arena=arena,
+)
+
+# Model cascade: a small MobileNetV2 (width 0.35, 128x128 input) classifies every image first, and
+# `model` only runs on the images it is not confident about (CASCADE_ENABLED, CASCADE_THRESHOLD).
+with startup.phase("cascade_load"):
+    cascade = build_cascade(batcher)
+
+# Run dummy inferences now so graph tracing is not paid by the first real request (WARMUP_ENABLED).
+if env_bool("WARMUP_ENABLED", True):
+    with startup.phase("warmup"):
+        warm_up(model, batch_sizes=(1, batcher.max_batch_size))
+        if cascade is not None:
+            warm_up(cascade.model, batch_sizes=(1, batcher.max_batch_size))
+
+# Pooled keep-alive HTTP client for downloading images (FETCH_* settings).
+fetcher = build_fetcher()
+
+# Fetch -> preprocess -> inference pipeline, with URL and prediction caches (CACHE_* settings).
+# PREPROCESS_MODE is "fast" (draft-mode JPEG decoding, default) or "keras" (full decode with load_img).
+# With PHASH_ENABLED, resized or re-encoded copies of a classified image reuse its predictions (PHASH_* settings).
+url_cache, prediction_cache = build_caches()
+near_duplicates = build_near_duplicate_index()
+# Images are decoded while they download, and rejected from their header if unsupported or too
+# large (STREAM_DECODE_ENABLED, IMAGE_MAX_PIXELS, IMAGE_FORMATS settings).
+decoder_factory = build_decoder_factory()
+pipeline = ImagePipeline(
+    model, batcher, fetcher, url_cache, prediction_cache,
+    preprocess_mode=env_str("PREPROCESS_MODE", "fast"), arena=arena, near_duplicates=near_duplicates,
+    decoder_factory=decoder_factory, cascade=cascade,
+)
+
+# Backpressure: a bounded number of requests in flight, and requests that would miss the deadline in
+# their X-Deadline-Ms header are rejected early with 429 and Retry-After (ADMISSION_* settings).
+admission = build_admission_controller()
+
+# Per-stage timing histograms served on /metrics, and sampled profiling (PROFILE_* settings).
+metrics = RequestMetrics()
+if arena is not None:
+    metrics.register(*buffer_arena_gauges(arena))
+if near_duplicates is not None:
+    metrics.register(*near_duplicate_gauges(near_duplicates))
+metrics.register(*admission_gauges(admission))
+if cascade is not None:
+    metrics.register(*cascade_gauges(cascade))
+profiler = build_profile_sampler()
 
 def handle(event, context):
     """
@@ -27,26 +109,83 @@ def handle(event, context):
     requirements of the MobileNetV2 model, performs inference to classify the image,
     and returns the top-3 predictions along with timing metrics.
 
+    A POST request switches to batch mode (see `handle_batch`), which classifies a JSON
+    list of image URLs or multipart image uploads and returns NDJSON results. A GET request
+    to /metrics returns the instance's request metrics (see `handle_metrics`).
+
+    Under overload, at most ADMISSION_MAX_IN_FLIGHT requests are processed at a time and
+    the rest wait in a bounded queue. A request that would miss the deadline given in its
+    `X-Deadline-Ms` header, or finds the queue full, is rejected at once with 429 Too Many
+    Requests and a `Retry-After` header.
+
+    Every stage of the request is timed with a nanosecond clock and returned in the
+    `Server-Timing` header (admission_wait, fetch, decode_overlap, decode, resize, normalize, phash, queue_wait, cascade, predict,
+    topk, serialize, plus process cpu time and the total, in milliseconds).
+
+    Repeated requests are served from the URL and prediction caches where possible:
+    a URL seen before is revalidated with a conditional GET, and an image whose bytes
+    have been classified before skips preprocessing and inference. An image whose
+    perceptual hash is close to one classified before (the same picture at another size
+    or JPEG quality) skips inference and returns the stored predictions.
+
     Args:
         event (dict): The OpenFaaS event object containing the query parameter `url`.
             - `url` (str): The URL of the image to be classified.
+            The optional `X-Deadline-Ms` header gives the time the client is willing to wait.
         context (dict): The OpenFaaS context object (not used in this function).
 
     Returns:
         dict: A dictionary containing:
             - `statusCode` (int): The HTTP status code of the response.
+            - `headers` (dict): The `Server-Timing` header for successful requests, `Retry-After` for 429.
             - `body` (str): A JSON-encoded string containing:
                 - `overall_duration` (float): Total time taken to process the request, in seconds.
                 - `network_duration` (float): Time taken to fetch the image from the provided URL, in seconds.
+                - `overlap_duration` (float): Part of `network_duration` spent decoding the image while it was
+                  still downloading (decode time hidden behind the transfer), in seconds.
                 - `cpu_duration` (float): Time taken to preprocess the image (resize, normalize, etc.), in seconds.
                 - `ml_duration` (float): Time taken to perform inference using the MobileNetV2 model, in seconds.
+                  This includes any time spent waiting for a shared batch to start.
+                - `queue_wait_duration` (float): Part of `ml_duration` spent waiting in the batching queue, in seconds.
+                - `batch_size` (int): Number of images in the batched forward pass that served this request
+                  (0 if the predictions came from the cache).
+                - `tier` (str): Which model answered: "small" (the small model of the cascade, if enabled), "full"
+                  (MobileNetV2), or "cache" (the prediction cache or the near-duplicate index).
+                - `cache` (dict): Outcome of the `url` and `predictions` cache lookups ("hit", "miss" or "disabled")
+                  and of the `near_duplicate` lookup, plus the cumulative counters of the caches and the
+                  near-duplicate index (hit and audit disagreement rates) in `stats`.
+                - `connections` (dict): Keep-alive connection metrics for the image host (requests, retries, bytes,
+                  connections opened, ...).
+                - `cold_start` (bool): Whether this was the first request served by this instance.
+                - `startup` (dict): Only on the first request, the duration of each startup phase in seconds
+                  (`worker_boot`, `imports`, `model_load`, `cascade_load`, `warmup`) and their `total`.
                 - `predictions` (list): A list of the top-3 predictions from the model, where each prediction is a dictionary:
                     - `label` (str): The human-readable label of the predicted class (e.g., "golden retriever").
                     - `probability` (float): The confidence score of the prediction, ranging from 0 to 1.
 
     """
-    
-    overall_start = time.time()
+
+    # Batch mode: many images in one POST request
+    if event.method == "POST":
+        return handle_batch(event)
+
+    if event.path == "/metrics":
+        return handle_metrics()
+
+    trace = RequestTrace()
+    with profiler.capture():
+        response = classify(event, trace)
+    metrics.observe(trace, "classify_image", response["statusCode"])
+    return response
+
+def classify(event, trace):
+    """
+    Classify the image at the `url` query parameter, recording every stage in `trace`.
+
+    Returns:
+        dict: The OpenFaaS response described in `handle`.
+    """
+    cold_start = startup.claim_first_request()
     try:
         # Extract the image URL from query parameters
         image_url = event.query.get('url')
@@ -55,42 +194,60 @@ def handle(event, context):
                 "statusCode": 400,
                 "body": "Missing image URL"
             }
-        
-        # Network-bound task: Fetch the image
-        network_start = time.time()
-        response = requests.get(image_url)
-        network_duration = time.time() - network_start
-        
-        # CPU-bound task: Preprocess the image
-        cpu_start = time.time()
-        img = image.load_img(BytesIO(response.content), target_size=(224, 224))
-        x = image.img_to_array(img)
-        x = np.expand_dims(x, axis=0)
-        x = preprocess_input(x)
-        cpu_duration = time.time() - cpu_start  # Measure just the preprocessing time
-
-        # ML-inference task: Run prediction
-        ml_start = time.time()
-        preds = model.predict(x)
-        predictions = decode_predictions(preds, top=3)[0]
-        ml_duration = time.time() - ml_start
-        
-        overall_duration = time.time() - overall_start
-        
+
+        # Wait for an admission slot, or shed the request if it cannot finish before its deadline
+        with admission.acquire(request_deadline(event.headers)) as ticket:
+            trace.add("admission_wait", ticket.queue_wait)
+
+            # Fetch, preprocess and classify the image
+            stages = pipeline.classify_url(image_url, trace)
+
+        overall_duration = trace.elapsed()
+
         # Prepare the result in the same format as Azure function
         result = {
             "overall_duration": round(overall_duration, 5),
-            "network_duration": round(network_duration, 5),
-            "cpu_duration": round(cpu_duration, 5),
-            "ml_duration": round(ml_duration, 5),
-            "predictions": [
-                {"label": pred[1], "probability": float(pred[2])} for pred in predictions
-            ]
+            "network_duration": round(stages["network_duration"], 5),
+            "overlap_duration": round(stages["overlap_duration"], 5),
+            "cpu_duration": round(stages["cpu_duration"], 5),
+            "ml_duration": round(stages["ml_duration"], 5),
+            "queue_wait_duration": round(stages["queue_wait_duration"], 5),
+            "batch_size": stages["batch_size"],
+            "tier": stages["tier"],
+            "cache": dict(stages["cache"], stats=pipeline.cache_stats()),
+            "connections": stages["connections"],
+            "cold_start": cold_start,
+            "predictions": stages["predictions"]
         }
-        
+        if cold_start:
+            result["startup"] = startup.summary()
+
+        with trace.stage("serialize"):
+            body = json.dumps(result)
+
         return {
             "statusCode": 200,
-            "body": json.dumps(result)
+            "headers": {"Server-Timing": trace.server_timing()},
+            "body": body
+        }
+    except AdmissionRejected as e:
+        logging.info(e)
+        return {
+            "statusCode": 429,
+            "headers": {"Retry-After": str(e.retry_after)},
+            "body": f"Too many requests ({e.reason})"
+        }
+    except ImageTooLargeError as e:
+        logging.error(e)
+        return {
+            "statusCode": 413,
+            "body": "Image too large"
+        }
+    except UnsupportedImageError as e:
+        logging.error(e)
+        return {
+            "statusCode": 415,
+            "body": "Unsupported image format"
         }
     except Exception as e:
         logging.error(e)
@@ -98,3 +255,68 @@ def handle(event, context):
             "statusCode": 500,
             "body": "Error processing image"
         }
+
+def handle_batch(event):
+    """
+    Batch mode of the OpenFaaS function, for classifying many images in one request.
+
+    The request body is either a JSON list of image URLs (or `{"urls": [...]}`), or
+    multipart/form-data with image file uploads (and optionally `url` fields). Images are
+    downloaded and preprocessed concurrently, up to the BATCH_CONCURRENCY setting, and their
+    inference runs through the shared micro-batcher. Results are NDJSON lines in completion
+    order, and a failing image produces an error line without affecting the rest of the batch.
+    Every image is admitted like a single request, sharing the batch's X-Deadline-Ms
+    deadline; an image that is not admitted gets a "rejected" line with status code 429.
+
+    The python3-http template buffers the whole response body, so unlike the Azure
+    `classify_batch` route the lines are returned together once the batch has finished.
+
+    Args:
+        event (dict): The OpenFaaS event object with the JSON or multipart body.
+
+    Returns:
+        dict: A dictionary containing:
+            - `statusCode` (int): 200, or 400 for a malformed request.
+            - `headers` (dict): `Content-Type: application/x-ndjson`.
+            - `body` (str): One JSON line per image with `index`, `url` or `filename`, `status`
+              ("ok", "error" or "rejected"), and either `error` or the stage timings and
+              `predictions`. Rejected lines also have `status_code` 429 and `retry_after`.
+    """
+    headers = {"Content-Type": "application/x-ndjson"}
+    try:
+        items = parse_batch_request(event.body, event.headers.get("Content-Type", ""))
+    except BatchRequestError as e:
+        logging.error(e)
+        return {
+            "statusCode": 400,
+            "headers": headers,
+            "body": json.dumps({"status": "error", "error": str(e)}) + "\n"
+        }
+
+    results = classify_batch(pipeline, items, max_concurrency=env_int("BATCH_CONCURRENCY", 8),
+                             admission=admission, deadline=request_deadline(event.headers))
+    return {
+        "statusCode": 200,
+        "headers": headers,
+        "body": b"".join(ndjson_lines(results)).decode("utf-8")
+    }
+
+def handle_metrics():
+    """
+    Request metrics of this function instance, in the Prometheus text format.
+
+    Returns histograms of the request duration, each pipeline stage, process CPU time and
+    peak RSS growth per request, plus request counts by status. The metrics cover only
+    the instance that answers, since every replica keeps its own.
+
+    Returns:
+        dict: A dictionary containing:
+            - `statusCode` (int): 200.
+            - `headers` (dict): The Prometheus text format `Content-Type`.
+            - `body` (str): The metrics.
+    """
+    return {
+        "statusCode": 200,
+        "headers": {"Content-Type": RequestMetrics.CONTENT_TYPE},
+        "body": metrics.render()
+    }
@@ -1,4 +1,30 @@
+import asyncio
+import http.server
+import os
+import threading
+import time
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
 from .handler import handle
+from .classifier.admission import AdmissionController, AdmissionRejected, request_deadline
+from .classifier.backends import load_backend
+from .classifier.batch import BatchRequestError, classify_batch, parse_batch_request
+from .classifier.batching import MicroBatcher
+from .classifier.buffers import BufferArena
+from .classifier.cache import LRUCache
+from .classifier.cascade import ModelCascade
+from .classifier.evaluate_cascade import evaluate_thresholds, suggest_threshold
+from .classifier.fetch import ImageFetcher, ImageTooLargeError
+from .classifier.labels import LabelTable
+from .classifier.metrics import RequestMetrics, buffer_arena_gauges
+from .classifier.phash import NearDuplicateIndex, dhash
+from .classifier.preprocess import decode_image, normalize, preprocess_image
+from .classifier.streaming import StreamingDecoder, UnsupportedImageError
+from .classifier.tracing import ProfileSampler, RequestTrace
 
 # Test your handler here
 
@@ -8,3 +34,353 @@ from .handler import handle
 def test_handle():
     # assert handle("input") == "input"
     pass
+
+def test_micro_batcher_returns_each_caller_its_own_rows():
+    batch_sizes = []
+
+    def predict(x):
+        batch_sizes.append(x.shape[0])
+        return x.reshape(x.shape[0], -1)[:, :1] * 2
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=50)
+    results = {}
+
+    def call(i):
+        results[i] = batcher.predict(np.full((1, 2, 2, 3), i, dtype=np.float32))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(batch_sizes) == 8
+    assert max(batch_sizes) <= 4
+    for i, (preds, stats) in results.items():
+        assert preds[0, 0] == i * 2
+        assert 1 <= stats["batch_size"] <= 4
+        assert stats["queue_wait"] >= 0
+
+def test_load_backend_rejects_unknown_name():
+    with pytest.raises(ValueError):
+        load_backend("onnx")
+
+def test_lru_cache_evicts_least_recently_used_within_budget():
+    cache = LRUCache("test", max_bytes=1000, ttl=0)
+    for i in range(10):
+        cache.put(f"key-{i}", [{"label": "x" * 100, "probability": 0.5}])
+
+    assert cache.get("key-9") is not None
+    assert cache.get("key-0") is None
+    stats = cache.stats()
+    assert stats["bytes"] <= 1000
+    assert stats["evictions"] > 0
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+def test_lru_cache_disk_tier_survives_new_instance(tmp_path):
+    LRUCache("test", disk_dir=str(tmp_path)).put("key", ["value"])
+    cache = LRUCache("test", disk_dir=str(tmp_path))
+
+    assert cache.get("key") == ["value"]
+    assert cache.stats()["disk_hits"] == 1
+
+def test_lru_cache_disk_tier_expires_and_stays_within_budget(tmp_path):
+    expired = LRUCache("expired", ttl=60, disk_dir=str(tmp_path))
+    expired.put("key", ["value"])
+    path = expired._disk_path("key")
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    assert not LRUCache("expired", ttl=60, disk_dir=str(tmp_path)).contains("key")
+
+    cache = LRUCache("pruned", ttl=0, disk_dir=str(tmp_path), disk_max_bytes=1000)
+    for i in range(20):
+        cache.put(f"key-{i}", ["x" * 100])
+    files = os.listdir(os.path.join(str(tmp_path), "pruned"))
+    assert 0 < len(files) < 20
+    assert cache._disk_bytes == sum(os.path.getsize(os.path.join(str(tmp_path), "pruned", f)) for f in files)
+    assert cache._disk_bytes <= 1000
+
+def _serve(body):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_image_fetcher_reuses_connections_and_enforces_byte_cap():
+    server = _serve(b"x" * 2000)
+    host = f"127.0.0.1:{server.server_port}"
+    try:
+        small = ImageFetcher(max_bytes=4096)
+        for _ in range(3):
+            assert len(small.get(f"http://{host}/image").content) == 2000
+        stats = small.host_stats(host)[host]
+        assert stats["requests"] == 3
+        assert stats["connections_opened"] == 1
+
+        with pytest.raises(ImageTooLargeError):
+            ImageFetcher(max_bytes=1000).get(f"http://{host}/image")
+    finally:
+        server.shutdown()
+
+def test_normalize_matches_mobilenet_v2_preprocess_input():
+    pixels = np.arange(256, dtype=np.uint8).reshape(16, 16, 1).repeat(3, axis=2)
+    np.testing.assert_allclose(normalize(pixels), pixels.astype(np.float32) / 127.5 - 1.0, atol=1e-6)
+
+def test_preprocess_image_draft_decodes_large_jpeg_to_model_input():
+    buffer = BytesIO()
+    Image.new("RGB", (3200, 3200), (200, 100, 50)).save(buffer, "JPEG")
+
+    x, timings = preprocess_image(buffer.getvalue())
+
+    assert x.shape == (1, 224, 224, 3)
+    assert x.dtype == np.float32
+    np.testing.assert_allclose(x[0, 112, 112], np.array([200, 100, 50]) / 127.5 - 1.0, atol=0.05)
+    assert set(timings) == {"decode", "resize", "normalize"}
+
+    # Small images are resized like load_img does (nearest neighbour from the full decode)
+    pixels = np.random.default_rng(0).integers(0, 256, (256, 256, 3), dtype=np.uint8)
+    small = BytesIO()
+    Image.fromarray(pixels).save(small, "PNG")
+    expected = np.asarray(Image.fromarray(pixels).resize((224, 224), Image.Resampling.NEAREST))
+    np.testing.assert_allclose(preprocess_image(small.getvalue())[0][0], normalize(expected), atol=1e-6)
+
+def test_parse_batch_request_accepts_json_and_multipart():
+    items = parse_batch_request(b'{"urls": ["http://a/1.jpg", "http://a/2.jpg"]}', "application/json")
+    assert [item.url for item in items] == ["http://a/1.jpg", "http://a/2.jpg"]
+
+    body = (
+        b"--XX\r\nContent-Disposition: form-data; name=\"file\"; filename=\"cat.jpg\"\r\n\r\n"
+        b"\xff\xd8\r\nbinary\r\n--XX--\r\n"
+    )
+    items = parse_batch_request(body, "multipart/form-data; boundary=XX")
+    assert items[0].filename == "cat.jpg"
+    assert items[0].content == b"\xff\xd8\r\nbinary"
+
+    with pytest.raises(BatchRequestError):
+        parse_batch_request(b"[]", "application/json")
+
+def test_classify_batch_reports_failed_items_without_failing_the_batch():
+    class FakePipeline:
+        def classify_url(self, url):
+            if "broken" in url:
+                raise ValueError("cannot identify image file")
+            return {"ml_duration": 0.1, "predictions": [{"label": "tabby", "probability": 0.9}]}
+
+    items = parse_batch_request(b'["http://a/1.jpg", "http://a/broken.jpg", "http://a/3.jpg"]', "application/json")
+    lines = sorted(classify_batch(FakePipeline(), items, max_concurrency=2), key=lambda line: line["index"])
+
+    assert [line["status"] for line in lines] == ["ok", "error", "ok"]
+    assert lines[1]["error"] == "cannot identify image file"
+    assert lines[2]["predictions"][0]["label"] == "tabby"
+
+    # Every item is admitted on its own, so items beyond the in-flight limit and queue are shed
+    class SlowPipeline:
+        def classify_url(self, url):
+            time.sleep(0.05)
+            return {"predictions": []}
+
+    admission = AdmissionController(max_in_flight=1, max_queue=0)
+    items = parse_batch_request(b'["http://a/1.jpg", "http://a/2.jpg", "http://a/3.jpg"]', "application/json")
+    lines = list(classify_batch(SlowPipeline(), items, max_concurrency=3, admission=admission))
+
+    assert sorted(line["status"] for line in lines) == ["ok", "rejected", "rejected"]
+    rejected = [line for line in lines if line["status"] == "rejected"]
+    assert all(line["status_code"] == 429 and line["retry_after"] >= 1 for line in rejected)
+    assert admission.stats()["rejected"]["queue_full"] == 2
+
+def test_label_table_decodes_top_predictions_in_order():
+    labels = LabelTable({str(i): [f"n{i:08d}", f"class_{i}"] for i in range(10)})
+    preds = np.array([
+        [0.05, 0.6, 0.0, 0.1, 0.0, 0.2, 0.0, 0.0, 0.05, 0.0],
+        [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.1, 0.3, 0.6],
+    ])
+
+    decoded = labels.decode(preds, top=3)
+
+    assert [name for _, name, _ in decoded[0]] == ["class_1", "class_5", "class_3"]
+    assert decoded[1][0] == ("n00000009", "class_9", 0.6)
+
+def test_request_trace_server_timing_and_metrics():
+    trace = RequestTrace()
+    with trace.stage("fetch"):
+        pass
+    trace.add("decode", 0.002)
+    trace.add("decode", 0.001)
+
+    assert trace.seconds("decode") == pytest.approx(0.003)
+    header = trace.server_timing()
+    assert header.startswith("fetch;dur=")
+    assert "decode;dur=3.000" in header
+    assert "cpu;dur=" in header and header.split(", ")[-1].startswith("total;dur=")
+
+    metrics = RequestMetrics()
+    metrics.observe(trace, "classify_image", 200)
+    text = metrics.render()
+    assert 'classifier_requests_total{route="classify_image",status="200"} 1' in text
+    assert 'classifier_stage_duration_seconds_bucket{stage="decode",le="0.005"} 1' in text
+    assert 'classifier_stage_duration_seconds_bucket{stage="decode",le="0.0025"} 0' in text
+    assert 'classifier_stage_duration_seconds_count{stage="decode"} 1' in text
+
+def test_profile_sampler_captures_one_in_n_requests(tmp_path):
+    sampler = ProfileSampler(every=3, mode="cprofile", output_dir=str(tmp_path))
+    for _ in range(6):
+        with sampler.capture():
+            sum(range(1000))
+
+    assert sampler.captures == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cprofile-3.prof", "cprofile-6.prof"]
+
+def test_buffer_arena_reuses_preprocessing_buffers():
+    arena = BufferArena(max_free=2)
+    buffer = BytesIO()
+    Image.new("RGB", (320, 240), (255, 0, 0)).save(buffer, format="JPEG")
+
+    expected, _ = preprocess_image(buffer.getvalue())
+    for _ in range(3):
+        with arena.lease((1, 224, 224, 3)) as out:
+            x, _ = preprocess_image(buffer.getvalue(), out=out)
+            assert x is out
+            np.testing.assert_array_equal(x, expected)
+
+    stats = arena.stats()
+    assert (stats["allocated"], stats["acquired"], stats["reused"]) == (1, 3, 2)
+    assert stats["pooled_bytes"] == 224 * 224 * 3 * 4
+
+    metrics = RequestMetrics()
+    metrics.register(*buffer_arena_gauges(arena))
+    assert "classifier_buffer_pool_reuse_ratio 0.6667" in metrics.render()
+
+def test_near_duplicate_index_matches_resized_copies():
+    rng = np.random.default_rng(0)
+    coarse = rng.integers(0, 256, (12, 10, 3), dtype=np.uint8)
+    picture = Image.fromarray(coarse).resize((700, 800), Image.Resampling.BICUBIC)
+
+    def image_hash(img, quality):
+        buffer = BytesIO()
+        img.save(buffer, format="JPEG", quality=quality)
+        return dhash(preprocess_image(buffer.getvalue())[0])
+
+    index = NearDuplicateIndex(max_entries=2, max_distance=4, audit_every=2)
+    cat = [{"label": "tabby", "probability": 0.9}]
+    index.add(image_hash(picture, 90), cat)
+    index.add(image_hash(picture.rotate(90), 90), [{"label": "dog", "probability": 0.8}])
+
+    slot, stored, distance, audit = index.lookup(image_hash(picture.resize((350, 400)), 60))
+    assert stored == cat and distance <= 4 and not audit
+
+    # The second hit is audited, and a disagreeing model result replaces the stored predictions
+    slot, stored, distance, audit = index.lookup(image_hash(picture.resize((1400, 1600)), 75))
+    assert stored == cat and audit
+    assert not index.audit_result(slot, stored, [{"label": "tiger cat", "probability": 0.7}], distance)
+
+    stats = index.stats()
+    assert (stats["hits"], stats["lookups"], stats["disagreements"]) == (2, 2, 1)
+    assert stats["hash_bytes"] == 16
+
+    # Once full, the oldest entry is replaced
+    index.add(np.zeros(8, dtype=np.uint8), cat)
+    assert index.stats()["entries"] == 2
+
+def test_admission_controller_sheds_requests_that_would_miss_their_deadline():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, min_samples=1)
+    ticket = controller.acquire()
+    ticket.start -= 0.5  # Record a service time of about 0.5s
+    ticket.release()
+
+    assert request_deadline({"X-Deadline-Ms": "100"}) == 0.1
+    assert request_deadline({}, default=2.0) == 2.0
+
+    with controller.acquire(deadline=2.0):
+        # The only slot is taken and nothing may queue
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.acquire()
+        assert rejected.value.reason == "queue_full" and rejected.value.retry_after >= 1
+
+    # A free slot, but a typical request takes longer than the client will wait
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire(deadline=0.1)
+    assert rejected.value.reason == "deadline"
+
+    stats = controller.stats()
+    assert stats["admitted"] == 2
+    assert stats["rejected"] == {"queue_full": 1, "deadline": 1}
+    assert stats["in_flight"] == 0 and stats["service_p95"] > 0.1
+
+    # An async caller cancelled while queued does not keep the slot it gets afterwards
+    async def cancel_while_queued():
+        controller = AdmissionController(max_in_flight=1, max_queue=4)
+        held = controller.acquire()
+        waiting = asyncio.ensure_future(controller.acquire_async())
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        held.release()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if controller.stats()["admitted"] == 2:
+                break
+        return controller.stats()
+
+    stats = asyncio.run(cancel_while_queued())
+    assert stats["admitted"] == 2 and stats["in_flight"] == 0 and stats["waiting"] == 0
+
+def test_streaming_decoder_matches_full_decode_and_rejects_early():
+    rng = np.random.default_rng(0)
+    buffer = BytesIO()
+    Image.fromarray(rng.integers(0, 255, (900, 1200, 3), dtype=np.uint8)).save(buffer, format="JPEG")
+    data = buffer.getvalue()
+
+    decoder = StreamingDecoder()
+    decoder.feed(data[:16 * 1024])
+    # The JPEG must be decoded chunk by chunk; this fails if a Pillow upgrade breaks the
+    # internals streaming.py relies on and every image falls back to the full decode
+    assert decoder.incremental
+    for start in range(16 * 1024, len(data), 16 * 1024):
+        decoder.feed(data[start:start + 16 * 1024])
+    assert decoder.finished and decoder.overlap_seconds > 0
+    assert np.array_equal(np.asarray(decoder.close(data)), np.asarray(decode_image(data)))
+
+    # A stream cut short falls back to the full decode, which reports the error
+    decoder = StreamingDecoder()
+    decoder.feed(data[:len(data) // 2])
+    with pytest.raises(OSError):
+        decoder.close(data[:len(data) // 2])
+
+    # Formats and sizes are checked from the header, before the rest has arrived
+    with pytest.raises(UnsupportedImageError):
+        StreamingDecoder(formats=("PNG",)).feed(data[:4096])
+    with pytest.raises(ImageTooLargeError):
+        StreamingDecoder(max_pixels=1000 * 1000).feed(data[:4096])
+
+def test_model_cascade_answers_confident_images_and_evaluates_thresholds():
+    class FakeModel:
+        name = "fake"
+
+    cascade = ModelCascade(FakeModel(), batcher=None, threshold=0.6)
+    confident, unsure = np.full((1, 1000), 0.0), np.full((1, 1000), 0.0)
+    confident[0, 3], unsure[0, 3] = 0.9, 0.4
+    assert cascade.accepts(confident) and not cascade.accepts(unsure)
+    assert cascade.stats() == {"threshold": 0.6, "requests": 2, "answered": 1, "answer_rate": 0.5}
+
+    # Three images: the small model is confident and right, confident and wrong, unsure
+    small_preds, full_preds = np.zeros((3, 1000)), np.zeros((3, 1000))
+    small_preds[[0, 1, 2], [1, 2, 3]] = [0.9, 0.7, 0.3]
+    full_preds[[0, 1, 2], [1, 5, 3]] = 0.8
+    rows = evaluate_thresholds(small_preds, np.full(3, 0.01), full_preds, np.full(3, 0.04), [0.0, 0.5, 0.8, 1.0])
+
+    assert [row["small_rate"] for row in rows] == [1.0, 0.6667, 0.3333, 0.0]
+    assert [row["agreement"] for row in rows] == [0.6667, 0.6667, 1.0, 1.0]
+    # Every image pays for the small model, and the unanswered ones for the full model too
+    assert rows[0]["mean_latency"] == 0.01 and rows[3]["savings"] == -0.25
+    assert suggest_threshold(rows, 0.99)["threshold"] == 0.8
@@ -0,0 +1,126 @@
+# COMPARE_ASYNC_THROUGHPUT.PY
+# Python script comparing the throughput of the sync and async Azure classify routes.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# For each route and each number of concurrent users, every user sends requests back to
+# back (closed loop) for a fixed duration. The script reports completed requests per
+# second, p50/p95/p99 latency and errors, and saves them to a CSV file.
+#
+# Each request asks for a different image (a new seed), so the URL and prediction caches
+# cannot answer it and every request does the full fetch -> preprocess -> inference work.
+#
+# Usage:
+#   python compare_async_throughput.py --base-url http://localhost:7071      # `func start`
+#   python compare_async_throughput.py --base-url https://vin-image-processing-workflow.azurewebsites.net \
+#       --users 1 10 100 --duration 120
+# To compare TensorFlow thread settings, rerun with different TF_INTRA_OP_THREADS /
+# TF_INTER_OP_THREADS / ASYNC_MAX_WORKERS app settings and a different --label.
+
+import argparse
+import asyncio
+import csv
+import itertools
+import os
+import time
+
+import aiohttp
+import numpy as np
+
+AZURE_BASE_URL = "https://vin-image-processing-workflow.azurewebsites.net"
+ROUTES = {"sync": "/api/classify_image", "async": "/api/classify_image_async"}
+IMAGE_URL_TEMPLATE = "https://picsum.photos/seed/{seed}/700/800"
+
+FIELDNAMES = ["label", "route", "users", "duration", "requests", "errors", "throughput",
+              "p50_latency", "p95_latency", "p99_latency", "mean_server_duration"]
+
+
+async def user(session, url, image_urls, deadline, latencies, server_durations, errors):
+    """Send requests back to back until the deadline."""
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            async with session.get(url, params={"url": next(image_urls)}) as response:
+                data = await response.json(content_type=None) if response.status == 200 else None
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            data = None
+        if data is None:
+            errors.append(time.perf_counter() - start)
+            continue
+        latencies.append(time.perf_counter() - start)
+        server_durations.append(data.get("overall_duration", np.nan))
+
+
+async def run_level(base_url, route, users, duration, image_urls, timeout):
+    """Run `users` concurrent users against one route for `duration` seconds."""
+    latencies, server_durations, errors = [], [], []
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            user(session, base_url + ROUTES[route], image_urls, deadline, latencies, server_durations, errors)
+            for _ in range(users)
+        ))
+        elapsed = time.perf_counter() - start
+
+    percentiles = np.percentile(latencies, [50, 95, 99]) if latencies else [np.nan] * 3
+    return {
+        "route": route,
+        "users": users,
+        "duration": round(elapsed, 2),
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput": round(len(latencies) / elapsed, 3),
+        "p50_latency": round(float(percentiles[0]), 4),
+        "p95_latency": round(float(percentiles[1]), 4),
+        "p99_latency": round(float(percentiles[2]), 4),
+        "mean_server_duration": round(float(np.nanmean(server_durations)), 4) if server_durations else np.nan,
+    }
+
+
+async def main_async(args):
+    seeds = itertools.count(int(time.time()))
+    image_urls = (args.image_url_template.format(seed=seed) for seed in seeds)
+
+    new_file = not os.path.exists(args.output)
+    with open(args.output, "a", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+        if new_file:
+            writer.writeheader()
+
+        for users in args.users:
+            for route in args.routes:
+                print(f"Running {users} users against the {route} route for {args.duration}s...")
+                entry = await run_level(args.base_url, route, users, args.duration, image_urls, args.timeout)
+                entry["label"] = args.label
+                writer.writerow(entry)
+                csvfile.flush()
+                print(f"  {entry['throughput']} req/s, p50 {entry['p50_latency']}s, "
+                      f"p95 {entry['p95_latency']}s, {entry['errors']} errors")
+                # Let the instance drain queued work before the next level
+                await asyncio.sleep(args.pause)
+
+    print(f"Results saved to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare throughput of the sync and async classify routes.")
+    parser.add_argument("--base-url", default=AZURE_BASE_URL)
+    parser.add_argument("--routes", nargs="+", default=list(ROUTES), choices=list(ROUTES))
+    parser.add_argument("--users", nargs="+", type=int, default=[1, 10, 100])
+    parser.add_argument("--duration", type=float, default=60, help="Seconds per route and user level")
+    parser.add_argument("--pause", type=float, default=10, help="Seconds between levels")
+    parser.add_argument("--timeout", type=float, default=120, help="Timeout of each request (s)")
+    parser.add_argument("--image-url-template", default=IMAGE_URL_TEMPLATE,
+                        help="Image URL with a {seed} placeholder, so every request asks for a new image")
+    parser.add_argument("--label", default="default", help="Name of this configuration in the CSV")
+    parser.add_argument("--output", default="async_throughput_results.csv")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
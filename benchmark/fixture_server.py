@@ -0,0 +1,160 @@
+# FIXTURE_SERVER.PY
+# Python module with a local HTTP server serving deterministic test images.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Stands in for picsum.photos so benchmarks can run offline and always download exactly
+# the same bytes. Images are addressed as:
+#   /image/<width>x<height>.<format>?seed=<n>
+# where format is jpg, png or webp. Responses carry an ETag and Last-Modified header and
+# answer conditional GETs with 304, like a real CDN would.
+#
+# Usage:
+#   python fixture_server.py --port 8765
+#   curl "http://127.0.0.1:8765/image/1024x1024.jpg?seed=1" -o test.jpg
+
+import argparse
+import hashlib
+import re
+import threading
+from email.utils import formatdate
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+from PIL import Image
+
+FORMATS = {
+    "jpg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+IMAGE_PATH = re.compile(r"^/image/(\d+)x(\d+)\.(jpg|png|webp)$")
+
+# Fixed modification time, so Last-Modified never changes between runs
+LAST_MODIFIED = formatdate(1700000000, usegmt=True)
+
+# Refuse absurd sizes so a typo cannot exhaust the machine's memory
+MAX_DIMENSION = 8192
+
+
+@lru_cache(maxsize=64)
+def render_image(width, height, fmt="jpg", seed=0):
+    """Render a deterministic photo-like image: smooth colour regions plus fine grain.
+
+    Args:
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+        fmt (str): One of "jpg", "png" or "webp".
+        seed (int): Seed of the random generator, giving a different picture per seed.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    rng = np.random.default_rng([width, height, seed])
+    coarse = rng.integers(0, 256, (max(height // 64, 4), max(width // 64, 4), 3), dtype=np.uint8)
+    smooth = np.asarray(Image.fromarray(coarse).resize((width, height), Image.Resampling.BICUBIC), dtype=np.float32)
+    grain = rng.normal(0, 8, smooth.shape)
+    pixels = np.clip(smooth + grain, 0, 255).astype(np.uint8)
+
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, FORMATS[fmt][0], quality=90)
+    return buffer.getvalue()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        match = IMAGE_PATH.match(url.path)
+        if not match:
+            self._send(404, b"Not found", "text/plain")
+            return
+
+        width, height, fmt = int(match.group(1)), int(match.group(2)), match.group(3)
+        if not (0 < width <= MAX_DIMENSION and 0 < height <= MAX_DIMENSION):
+            self._send(400, b"Unsupported size", "text/plain")
+            return
+        seed = int(parse_qs(url.query).get("seed", ["0"])[0])
+
+        body = render_image(width, height, fmt, seed)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        headers = {"ETag": etag, "Last-Modified": LAST_MODIFIED, "Cache-Control": "public, max-age=3600"}
+
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", None, headers)
+            return
+        self._send(200, body, FORMATS[fmt][1], headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Runs the fixture server on a background thread.
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on, 0 picks a free port.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), FixtureHandler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def image_url(self, width, height, fmt="jpg", seed=0):
+        """Return the URL of a fixture image."""
+        return f"{self.base_url}/image/{width}x{height}.{fmt}?seed={seed}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fixture-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve deterministic test images over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = FixtureServer(args.host, args.port)
+    print(f"Serving fixture images at {server.base_url}/image/<width>x<height>.<jpg|png|webp>?seed=<n>")
+    server.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# INPROCESS.PY
+# Python module for calling the Azure and OpenFaaS entry points in-process.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# The benchmark imports function_app.py and handler.py directly and calls `classify_image`
+# and `handle` with request objects shaped like the ones each platform would pass in, so
+# the whole function runs without deploying it or starting the platform's host.
+
+import importlib
+import json
+import os
+import sys
+import time
+import types
+
+from requests.structures import CaseInsensitiveDict
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+AZURE_DIR = os.path.join(REPO_DIR, "Azure Functions")
+OPENFAAS_DIR = os.path.join(REPO_DIR, "OpenFaaS", "process-image")
+
+PLATFORMS = ("azure", "openfaas")
+
+
+class FakeEvent:
+    """Mimics the `event` object of the OpenFaaS python3-http template."""
+
+    def __init__(self, method="GET", path="/", query=None, headers=None, body=b""):
+        self.method = method
+        self.path = path
+        self.query = dict(query or {})
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.body = body
+
+
+class FakeContext:
+    """Mimics the `context` object of the OpenFaaS python3-http template."""
+
+    def __init__(self):
+        self.hostname = "localhost"
+
+
+def _user_function(fn):
+    # The Azure v2 programming model decorators wrap the function in a FunctionBuilder
+    if hasattr(fn, "build"):
+        return fn.build().get_user_function()
+    return fn
+
+
+def load_azure():
+    """Import the Azure Functions app and return the `classify_image` function."""
+    if AZURE_DIR not in sys.path:
+        sys.path.insert(0, AZURE_DIR)
+    function_app = importlib.import_module("function_app")
+    return _user_function(function_app.classify_image)
+
+
+def load_openfaas():
+    """Import the OpenFaaS handler and return the `handle` function.
+
+    The handler uses relative imports, so its folder is loaded as the `function` package,
+    the same name the python3-http template gives it.
+    """
+    if "function" not in sys.modules:
+        # The handler folder has no __init__.py of its own (the template build adds one),
+        # so register an empty package whose search path is the handler folder
+        package = types.ModuleType("function")
+        package.__path__ = [OPENFAAS_DIR]
+        sys.modules["function"] = package
+    return importlib.import_module("function.handler").handle
+
+
+class InProcessClient:
+    """Calls one platform's entry point in-process and normalizes the response.
+
+    Args:
+        platform (str): "azure" or "openfaas".
+    """
+
+    def __init__(self, platform):
+        if platform not in PLATFORMS:
+            raise ValueError(f"Unknown platform {platform!r}, expected one of {', '.join(PLATFORMS)}")
+        self.platform = platform
+        self.entry_point = load_azure() if platform == "azure" else load_openfaas()
+
+    def classify(self, image_url, headers=None):
+        """Classify an image URL through the entry point.
+
+        Args:
+            image_url (str): The image URL to pass as the `url` query parameter.
+            headers (dict, optional): Extra request headers.
+
+        Returns:
+            dict: A dictionary containing:
+                - `status` (int): The HTTP status code.
+                - `headers` (dict): The response headers.
+                - `body` (dict or str): The decoded JSON body, or the raw text if not JSON.
+                - `elapsed` (float): Wall-clock time of the call, in seconds.
+        """
+        start = time.perf_counter()
+        if self.platform == "azure":
+            status, response_headers, body = self._call_azure(image_url, headers)
+        else:
+            status, response_headers, body = self._call_openfaas(image_url, headers)
+        elapsed = time.perf_counter() - start
+
+        try:
+            body = json.loads(body)
+        except ValueError:
+            pass
+        return {"status": status, "headers": response_headers, "body": body, "elapsed": elapsed}
+
+    def _call_azure(self, image_url, headers):
+        import azure.functions as func
+
+        request = func.HttpRequest(
+            method="GET",
+            url="http://localhost/api/classify_image",
+            headers=headers or {},
+            params={"url": image_url},
+            body=b"",
+        )
+        response = self.entry_point(request)
+        return response.status_code, dict(response.headers), response.get_body().decode("utf-8")
+
+    def _call_openfaas(self, image_url, headers):
+        event = FakeEvent(query={"url": image_url}, headers=headers)
+        response = self.entry_point(event, FakeContext())
+        return response.get("statusCode", 200), dict(response.get("headers", {})), response.get("body", "")
@@ -0,0 +1,173 @@
+# MEASURE_WORKER_MEMORY.PY
+# Python script measuring the memory of N inference worker processes on one host.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# RSS counts every page a process maps, including pages shared with other processes, so
+# it overstates what each extra worker costs. PSS (proportional set size) divides every
+# shared page between the processes that map it, so the PSS of all workers adds up to the
+# memory they actually use together. This script starts 1, 2, 4 and 8 workers that each
+# load the model and run a few inferences, then reads /proc/<pid>/smaps_rollup of every
+# worker (Linux only) and reports RSS, PSS and USS (private pages) per worker.
+#
+# Strategies:
+#   - "private": Every worker is a fresh process that loads its own model, as the Azure
+#     Functions host does with FUNCTIONS_WORKER_PROCESS_COUNT > 1.
+#   - "preload": The parent loads the model once and forks the workers, which share its
+#     pages copy-on-write (like gunicorn --preload). The parent's own memory is included
+#     in `total_pss_mb`. TensorFlow is not fork-safe once its thread pools have started,
+#     so workers that do not become ready within --timeout are reported as failed.
+#   - "shared": Every worker is a fresh process that loads the tflite-int8 backend with
+#     shared_weights=True, reading the weights from the memory-mapped model file. Other
+#     backends do not support it (tflite-float16 dequantizes its weights into private
+#     float32 buffers), so the strategy is skipped for them.
+#
+# Usage:
+#   python measure_worker_memory.py --backend keras --strategies private preload
+#   python measure_worker_memory.py --backend tflite-int8 --strategies private preload shared
+
+import argparse
+import csv
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+import numpy as np
+
+# Make the classifier package from the Azure Functions folder importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Azure Functions"))
+from classifier.backends import BACKEND_NAMES, SHARED_WEIGHTS_BACKENDS, load_backend  # noqa: E402
+
+STRATEGIES = ("private", "preload", "shared")
+
+FIELDNAMES = ["strategy", "backend", "workers", "ready", "mean_rss_mb", "mean_pss_mb", "mean_uss_mb",
+              "parent_pss_mb", "total_pss_mb", "pss_per_worker_mb"]
+
+# The model loaded by the parent before forking (preload strategy)
+_preloaded = None
+
+
+def memory_usage(pid):
+    """Read the memory counters of a process from /proc/<pid>/smaps_rollup.
+
+    Returns:
+        dict: `rss`, `pss`, `uss` (private clean + dirty) and `shared` in bytes.
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            parts = value.split()
+            if len(parts) == 2 and parts[1] == "kB":
+                fields[name] = int(parts[0]) * 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+        "shared": fields["Shared_Clean"] + fields["Shared_Dirty"],
+    }
+
+
+def worker(backend_name, shared_weights, requests, ready, done):
+    """Load (or inherit) the model, run some inferences, then wait to be measured."""
+    backend = _preloaded if _preloaded is not None else load_backend(backend_name, shared_weights=shared_weights)
+    x = np.zeros((1, 224, 224, 3), dtype=np.float32)
+    for _ in range(requests):
+        backend.predict(x)
+    ready.put(os.getpid())
+    done.wait()
+
+
+def run_level(strategy, backend_name, workers, requests, timeout):
+    """Start `workers` worker processes with one strategy and measure them once all are ready."""
+    global _preloaded
+    context = multiprocessing.get_context("fork" if strategy == "preload" else "spawn")
+    if strategy == "preload" and _preloaded is None:
+        _preloaded = load_backend(backend_name)
+
+    ready, done = context.Queue(), context.Event()
+    processes = [
+        context.Process(target=worker, args=(backend_name, strategy == "shared", requests, ready, done), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    ready_pids = []
+    deadline = time.monotonic() + timeout
+    while len(ready_pids) < workers and time.monotonic() < deadline:
+        try:
+            ready_pids.append(ready.get(timeout=max(0.0, deadline - time.monotonic())))
+        except queue.Empty:
+            break
+
+    usage = [memory_usage(pid) for pid in ready_pids]
+    parent_pss = memory_usage(os.getpid())["pss"] if strategy == "preload" else 0
+
+    done.set()
+    for process in processes:
+        process.join(timeout=10)
+        if process.is_alive():
+            process.kill()
+
+    mb = 1024 ** 2
+    entry = {"strategy": strategy, "backend": backend_name, "workers": workers, "ready": len(ready_pids)}
+    if not usage:
+        return entry
+    total_pss = sum(u["pss"] for u in usage) + parent_pss
+    entry.update({
+        "mean_rss_mb": round(float(np.mean([u["rss"] for u in usage])) / mb, 1),
+        "mean_pss_mb": round(float(np.mean([u["pss"] for u in usage])) / mb, 1),
+        "mean_uss_mb": round(float(np.mean([u["uss"] for u in usage])) / mb, 1),
+        "parent_pss_mb": round(parent_pss / mb, 1),
+        "total_pss_mb": round(total_pss / mb, 1),
+        "pss_per_worker_mb": round(total_pss / len(usage) / mb, 1),
+    })
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure PSS/RSS per inference worker for 1-8 workers.")
+    parser.add_argument("--backend", default="keras", choices=BACKEND_NAMES)
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES), choices=STRATEGIES)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=5, help="Inferences each worker runs before it is measured")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for the workers to load")
+    parser.add_argument("--output", default="worker_memory_results.csv")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("This script needs /proc/<pid>/smaps_rollup (Linux 4.14 or later)")
+
+    results = []
+    for strategy in args.strategies:
+        if strategy == "shared" and args.backend not in SHARED_WEIGHTS_BACKENDS:
+            print(f"Skipping the shared strategy: it needs {', '.join(SHARED_WEIGHTS_BACKENDS)}, not {args.backend}")
+            continue
+        for workers in args.workers:
+            entry = run_level(strategy, args.backend, workers, args.requests, args.timeout)
+            print(entry)
+            if entry["ready"] < workers:
+                print(f"  Only {entry['ready']} of {workers} workers became ready")
+            results.append(entry)
+
+    # Imported only now so that pandas and pyarrow are not part of the measured memory
+    from results_store import ResultsStore
+    with ResultsStore().writer("worker_memory") as results_writer:
+        for entry in results:
+            results_writer.append(dict(entry, platform="local"))
+
+    with open(args.output, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(results)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# RESULTS_STORE.PY
+# Python module storing benchmark measurements in a partitioned Parquet dataset.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# The measurement scripts used to keep their results in a list and overwrite one CSV file
+# at the end of every run, so an interrupted run was lost and earlier runs could not be
+# compared. With this store:
+#   - Every measurement is appended as it arrives, as a small Parquet file in a
+#     Hive-partitioned dataset: <root>/experiment=<name>/platform=<platform>/<run_id>-<n>.parquet
+#   - Every row is tagged with the run id, commit and timestamp, so runs never overwrite
+#     each other.
+#   - `load` reads any subset back into a pandas DataFrame, and `aggregate` computes
+#     percentiles, means and confidence intervals per group with vectorized group-bys.
+#
+# Usage:
+#   store = ResultsStore()
+#   with store.writer("latency_breakdown") as writer:
+#       writer.append({"platform": "Azure", "image_size": "256x256", "overall_duration": 1.2})
+#   summary = aggregate(store.load("latency_breakdown"), ["platform", "image_size"], ["overall_duration"])
+
+import datetime
+import os
+import subprocess
+import uuid
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Default location of the dataset, next to this file
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+PARTITION_COLUMNS = ["experiment", "platform"]
+
+
+def git_commit():
+    """Return the short hash of the checked out commit, or None outside a git checkout."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def new_run_id():
+    """Return a run id that sorts by start time, e.g. 20250301T120000-1a2b3c."""
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+
+class ResultsWriter:
+    """Appends the measurements of one run to the dataset.
+
+    Rows are buffered per platform and written as a new Parquet file every `flush_every`
+    rows, on `flush()` and when the writer is closed. The default of one row per file
+    means nothing is lost if a long run is interrupted; the files are tiny, and reading
+    them back as one dataset stays fast for the few thousand rows an experiment produces.
+
+    Args:
+        root (str): Root directory of the dataset.
+        experiment (str): Experiment name, e.g. "latency_breakdown" or "cold_start".
+        run_id (str, optional): Id of the run. A new one is created if not given.
+        commit (str, optional): Commit the run measured. Defaults to the checked out commit.
+        flush_every (int): Number of buffered rows per platform that triggers a write.
+    """
+
+    def __init__(self, root, experiment, run_id=None, commit=None, flush_every=1):
+        self.root = root
+        self.experiment = experiment
+        self.run_id = run_id or new_run_id()
+        self.commit = commit if commit is not None else git_commit()
+        self.flush_every = flush_every
+        self.rows_written = 0
+        self._buffers = {}
+        self._file_counts = {}
+
+    def append(self, row):
+        """Add one measurement. `row` must contain a `platform` key."""
+        row = dict(row)
+        platform = row.pop("platform")
+        row.setdefault("timestamp", datetime.datetime.now(datetime.timezone.utc))
+        row["run_id"] = self.run_id
+        row["commit"] = self.commit
+
+        buffer = self._buffers.setdefault(platform, [])
+        buffer.append(row)
+        if len(buffer) >= self.flush_every:
+            self._write(platform)
+
+    def flush(self):
+        for platform in list(self._buffers):
+            self._write(platform)
+
+    def _write(self, platform):
+        rows = self._buffers.pop(platform, [])
+        if not rows:
+            return
+        directory = os.path.join(self.root, f"experiment={self.experiment}", f"platform={platform}")
+        os.makedirs(directory, exist_ok=True)
+
+        count = self._file_counts.get(platform, 0)
+        self._file_counts[platform] = count + 1
+        path = os.path.join(directory, f"{self.run_id}-{count:05d}.parquet")
+
+        # Write to a temporary name first, so readers never see a half-written file
+        pq.write_table(pa.Table.from_pylist(rows), path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self.rows_written += len(rows)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ResultsStore:
+    """A partitioned Parquet dataset of benchmark measurements.
+
+    Args:
+        root (str): Root directory of the dataset.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def writer(self, experiment, **kwargs):
+        """Return a `ResultsWriter` appending one run of `experiment` to this store."""
+        return ResultsWriter(self.root, experiment, **kwargs)
+
+    def experiments(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name.split("=", 1)[1] for name in os.listdir(self.root) if name.startswith("experiment="))
+
+    def load(self, experiment, platforms=None, run_ids=None, commits=None, columns=None):
+        """Read the measurements of an experiment into a DataFrame.
+
+        Args:
+            experiment (str): Experiment name.
+            platforms (list, optional): Only read these platforms.
+            run_ids (list, optional): Only read these runs.
+            commits (list, optional): Only read runs of these commits.
+            columns (list, optional): Only read these columns (partition columns are
+                always included).
+
+        Returns:
+            pd.DataFrame: One row per measurement, empty if nothing matches.
+        """
+        directory = os.path.join(self.root, f"experiment={experiment}")
+        if not os.path.isdir(directory):
+            return pd.DataFrame()
+
+        # Files of different runs may have gained columns over time, so unify their schemas
+        dataset = ds.dataset(directory, format="parquet", partitioning="hive", exclude_invalid_files=True)
+        schemas = [fragment.physical_schema for fragment in dataset.get_fragments()]
+        if not schemas:
+            return pd.DataFrame()
+        schema = pa.unify_schemas(schemas + [dataset.partitioning.schema], promote_options="permissive")
+        dataset = ds.dataset(directory, schema=schema, format="parquet", partitioning="hive")
+
+        expression = None
+        for column, values in [("platform", platforms), ("run_id", run_ids), ("commit", commits)]:
+            if values:
+                condition = ds.field(column).isin(list(values))
+                expression = condition if expression is None else expression & condition
+
+        if columns is not None:
+            columns = list(dict.fromkeys(["platform", "run_id", *columns]))
+        df = dataset.to_table(columns=columns, filter=expression).to_pandas()
+        df["platform"] = df["platform"].astype(str)
+        return df
+
+
+def aggregate(df, by, values, percentiles=(50, 95, 99), confidence=0.95):
+    """Summarise measurement columns per group.
+
+    All statistics are computed with pandas group-bys over whole columns, so the cost
+    does not grow with the number of groups in Python.
+
+    Args:
+        df (pd.DataFrame): Measurements, e.g. from `ResultsStore.load`.
+        by (list): Columns to group by, e.g. ["platform", "image_size"].
+        values (list): Measurement columns to summarise.
+        percentiles (tuple): Percentiles to compute for every column.
+        confidence (float): Confidence level of the interval around the mean.
+
+    Returns:
+        pd.DataFrame: One row per group with `<column>_p<q>`, `<column>_mean`,
+            `<column>_ci_low`, `<column>_ci_high` and `<column>_count` columns, plus
+            `runs` (the number of distinct runs in the group) when `run_id` is present.
+    """
+    grouped = df.groupby(by, observed=True, sort=True)[list(values)]
+
+    # quantile() with a list returns one row per (group, q), unstack q into columns
+    quantiles = grouped.quantile([q / 100 for q in percentiles]).unstack(level=-1)
+    quantiles.columns = [f"{column}_p{q * 100:g}" for column, q in quantiles.columns]
+
+    mean, std, count = grouped.mean(), grouped.std(ddof=1), grouped.count()
+
+    # Normal approximation of the confidence interval of the mean
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    half_width = z * std / np.sqrt(count.where(count > 0))
+
+    summary = pd.concat([
+        quantiles,
+        mean.add_suffix("_mean"),
+        (mean - half_width).add_suffix("_ci_low"),
+        (mean + half_width).add_suffix("_ci_high"),
+        count.add_suffix("_count"),
+    ], axis=1)
+
+    if "run_id" in df.columns:
+        summary["runs"] = df.groupby(by, observed=True, sort=True)["run_id"].nunique()
+    return summary.reset_index()
@@ -0,0 +1,202 @@
+# RUN_BENCHMARK.PY
+# Python script with an offline, in-process benchmark of the Azure and OpenFaaS functions.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Unlike measure_latency_breakdown.py and measure_cold_start.py, this benchmark needs
+# neither the deployed functions nor picsum.photos:
+#   1. A local fixture server serves deterministic images of each size and format.
+#   2. The `classify_image` and `handle` entry points are called in-process with fake
+#      request objects (see inprocess.py).
+#   3. Every case is repeated N times and the per-stage timings from the responses are
+#      summarised as percentiles in a JSON report.
+#   4. If a baseline report is given, p50/p95 of every stage are compared against it and
+#      the script exits with status 1 when any of them regressed beyond the tolerance.
+#
+# Usage (from the repository root, with the function requirements installed):
+#   python benchmark/run_benchmark.py --repeats 10 --output benchmark/report.json
+#   python benchmark/run_benchmark.py --baseline benchmark/baseline.json --tolerance 0.15
+#   python benchmark/run_benchmark.py --output benchmark/baseline.json   # record a new baseline
+
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from fixture_server import FORMATS, FixtureServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "latency_breakdown"))
+from measure_latency_breakdown import image_sizes  # noqa: E402
+
+# Timings reported in the function responses, plus the client-side wall-clock time
+STAGES = ["elapsed", "overall_duration", "network_duration", "cpu_duration", "ml_duration", "queue_wait_duration"]
+PERCENTILES = [50, 90, 95, 99]
+
+# Stage statistics compared against the baseline
+REGRESSION_STATS = ["p50", "p95"]
+
+
+def summarise(values):
+    """Summarise a list of durations as percentiles, mean, min and max (in seconds)."""
+    values = np.asarray(values, dtype=float)
+    summary = {f"p{p}": round(float(v), 6) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    summary.update({
+        "mean": round(float(values.mean()), 6),
+        "min": round(float(values.min()), 6),
+        "max": round(float(values.max()), 6),
+    })
+    return summary
+
+
+def case_id(case):
+    return f"{case['platform']}/{case['image_size']}/{case['format']}"
+
+
+def run_case(client, server, width, height, fmt, repeats, warmup):
+    """Run one platform/size/format case and summarise its stage timings."""
+    samples = {stage: [] for stage in STAGES}
+    errors = 0
+
+    for i in range(warmup + repeats):
+        # A different seed per repeat, so the prediction cache cannot short-circuit the run
+        result = client.classify(server.image_url(width, height, fmt, seed=i))
+        if i < warmup:
+            continue
+        if result["status"] != 200 or not isinstance(result["body"], dict):
+            errors += 1
+            continue
+        samples["elapsed"].append(result["elapsed"])
+        for stage in STAGES[1:]:
+            if result["body"].get(stage) is not None:
+                samples[stage].append(result["body"][stage])
+
+    return {
+        "platform": client.platform,
+        "image_size": f"{width}x{height}",
+        "format": fmt,
+        "repeats": repeats,
+        "errors": errors,
+        "stages": {stage: summarise(values) for stage, values in samples.items() if values},
+    }
+
+
+def compare(report, baseline, tolerance, min_delta):
+    """Compare a report against a baseline report.
+
+    A stage statistic counts as a regression when it is both more than `tolerance`
+    (relative) and more than `min_delta` seconds (absolute) slower than the baseline,
+    so that sub-millisecond noise on fast stages is not flagged.
+
+    Returns:
+        list: One dict per regression with `case`, `stage`, `stat`, `baseline`, `current` and `ratio`.
+    """
+    baseline_cases = {case_id(case): case for case in baseline["cases"]}
+    regressions = []
+    for case in report["cases"]:
+        base = baseline_cases.get(case_id(case))
+        if base is None:
+            continue
+        for stage, stats in case["stages"].items():
+            base_stats = base["stages"].get(stage)
+            if not base_stats:
+                continue
+            for stat in REGRESSION_STATS:
+                current, previous = stats[stat], base_stats[stat]
+                if current > previous * (1 + tolerance) and current - previous > min_delta:
+                    regressions.append({
+                        "case": case_id(case),
+                        "stage": stage,
+                        "stat": stat,
+                        "baseline": previous,
+                        "current": current,
+                        "ratio": round(current / previous, 3) if previous else None,
+                    })
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the functions in-process against a local image server.")
+    parser.add_argument("--platforms", nargs="+", default=["azure", "openfaas"], choices=["azure", "openfaas"])
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=image_sizes,
+                        help="Image sizes as WIDTHxHEIGHT (default: measure_latency_breakdown.image_sizes)")
+    parser.add_argument("--formats", nargs="+", default=["jpg"], choices=list(FORMATS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1, help="Unrecorded calls before each case")
+    parser.add_argument("--enable-cache", action="store_true", help="Keep the URL/prediction caches enabled")
+    parser.add_argument("--output", default="benchmark_report.json")
+    parser.add_argument("--baseline", help="Report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Relative slowdown counted as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="Absolute slowdown (s) counted as a regression")
+    args = parser.parse_args()
+
+    # Settings are read when the function modules are imported, so set them first
+    if not args.enable_cache:
+        os.environ["CACHE_ENABLED"] = "false"
+
+    from inprocess import InProcessClient
+
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "settings": {
+            "repeats": args.repeats,
+            "warmup": args.warmup,
+            "cache_enabled": args.enable_cache,
+            "environment": {name: value for name, value in os.environ.items()
+                            if name.startswith(("BATCH_", "CACHE_", "FETCH_", "INFERENCE_", "PREPROCESS_"))},
+        },
+        "cases": [],
+    }
+
+    with FixtureServer() as server:
+        for platform in args.platforms:
+            client = InProcessClient(platform)
+            for width, height in args.sizes:
+                for fmt in args.formats:
+                    case = run_case(client, server, width, height, fmt, args.repeats, args.warmup)
+                    report["cases"].append(case)
+                    overall = case["stages"].get("overall_duration", {})
+                    print(f"{case_id(case)}: p50={overall.get('p50')} p95={overall.get('p95')} errors={case['errors']}")
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["baseline"] = {"path": args.baseline, "commit": baseline.get("commit")}
+        report["regressions"] = compare(report, baseline, args.tolerance, args.min_delta)
+        for regression in report["regressions"]:
+            print(f"REGRESSION {regression['case']} {regression['stage']} {regression['stat']}: "
+                  f"{regression['baseline']} -> {regression['current']} (x{regression['ratio']})")
+        failed = bool(report["regressions"])
+        if not failed:
+            print("No regressions against the baseline")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to {args.output}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
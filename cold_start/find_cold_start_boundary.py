@@ -0,0 +1,278 @@
+# FIND_COLD_START_BOUNDARY.PY
+# Python script searching for the idle timeout after which Azure Functions and OpenFaaS cold start.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# measure_cold_start.py waits 1, 2, 4, ... 32 minutes one after the other, so a run takes
+# over an hour and only brackets the idle timeout to within a factor of two. This script
+# searches for it directly:
+#   - Each platform gets one or more probe lanes. A lane is a separate function instance
+#     or route (e.g. a second function app deployed from the same code), so lanes have
+#     independent idle timers and can be probed in parallel with asyncio.
+#   - A probe warms its lane with one call, waits for the idle time being tested and calls
+#     again. The second call is classified as cold or warm.
+#   - The search keeps an interval (warm, cold] around the timeout. Every round, each lane
+#     of a platform tests a different point inside it, so k lanes shrink the interval
+#     k + 1 times per round (binary search with a single lane), until it is narrower than
+#     --precision.
+#   - A call counts as cold if the function reports `cold_start`, or if the gap between the
+#     client's elapsed time and the server's `overall_duration` (time spent outside the
+#     function code: scheduling, instance start-up, imports) exceeds the lane's warm gap by
+#     more than --cold-margin seconds.
+#   - Every probe and every search round is appended to the CSV files as soon as it is done,
+#     so an interrupted run keeps everything measured so far.
+#
+# Usage:
+#   python find_cold_start_boundary.py
+#   python find_cold_start_boundary.py --lane Azure=https://app-a.azurewebsites.net/api/classify_image \
+#       --lane Azure=https://app-b.azurewebsites.net/api/classify_image --precision 15
+
+import argparse
+import asyncio
+import csv
+import os
+import statistics
+import time
+
+import aiohttp
+
+# Function URLs
+AZURE_FUNCTION_URL = "https://vin-image-processing-workflow.azurewebsites.net/api/classify_image"
+OPENFAAS_FUNCTION_URL = "http://20.26.125.107:8080/function/process-image"
+IMAGE_URL = "https://picsum.photos/400/500"
+
+PROBE_FIELDNAMES = [
+    "timestamp", "platform", "lane", "round", "wait_time", "elapsed_time", "total_duration",
+    "network_duration", "cpu_duration", "ml_duration", "gap", "warm_gap", "cold_start", "cold",
+]
+SEARCH_FIELDNAMES = ["timestamp", "platform", "round", "warm_bound", "cold_bound", "tested", "cold_results"]
+
+
+class CSVLog:
+    """Appends rows to a CSV file, writing the header only if the file is new."""
+
+    def __init__(self, filename, fieldnames):
+        new_file = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        self.file = open(filename, "a", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames, extrasaction="ignore")
+        if new_file:
+            self.writer.writeheader()
+            self.file.flush()
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class Lane:
+    """One function instance or route with its own idle timer.
+
+    Args:
+        platform (str): Platform name, lanes with the same name search together.
+        index (int): Lane number within the platform.
+        url (str): The function URL.
+    """
+
+    def __init__(self, platform, index, url):
+        self.platform = platform
+        self.index = index
+        self.url = url
+        self.warm_gap = None
+
+    async def call(self, session, image_url):
+        """Call the function once.
+
+        Returns:
+            dict: The response timings, with `elapsed_time`, `gap` (elapsed time minus
+                `overall_duration`) and the server's `cold_start` flag if reported.
+        """
+        start_time = time.perf_counter()
+        async with session.get(self.url, params={"url": image_url}) as response:
+            response.raise_for_status()
+            data = await response.json(content_type=None)
+        elapsed_time = time.perf_counter() - start_time
+
+        return {
+            "elapsed_time": elapsed_time,
+            "total_duration": data.get("overall_duration"),
+            "network_duration": data.get("network_duration"),
+            "cpu_duration": data.get("cpu_duration"),
+            "ml_duration": data.get("ml_duration"),
+            # Functions that do not report their duration count the whole elapsed time as gap
+            "gap": elapsed_time - (data.get("overall_duration") or 0),
+            "cold_start": data.get("cold_start"),
+        }
+
+    async def calibrate(self, session, image_url, calls):
+        """Measure the lane's warm gap as the median gap of back-to-back calls."""
+        await self.call(session, image_url)  # The first call may itself be cold
+        gaps = [(await self.call(session, image_url))["gap"] for _ in range(calls)]
+        self.warm_gap = statistics.median(gaps)
+        return self.warm_gap
+
+    def is_cold(self, result, margin):
+        if result["cold_start"] is not None:
+            return bool(result["cold_start"])
+        return result["gap"] - self.warm_gap > margin
+
+    async def probe(self, session, image_url, wait_time, margin):
+        """Warm the lane, stay idle for `wait_time` seconds and classify the next call."""
+        await self.call(session, image_url)
+        await asyncio.sleep(wait_time)
+        result = await self.call(session, image_url)
+        result.update({"wait_time": wait_time, "warm_gap": self.warm_gap, "cold": self.is_cold(result, margin)})
+        return result
+
+
+def probe_points(warm_bound, cold_bound, count):
+    """Split (warm_bound, cold_bound) into `count` evenly spaced test points.
+
+    Points are whole seconds and duplicates are merged, so a narrow interval is not
+    probed by several lanes at the same idle time.
+    """
+    step = (cold_bound - warm_bound) / (count + 1)
+    points = [round(warm_bound + step * (i + 1)) for i in range(count)]
+    return sorted({point for point in points if warm_bound < point < cold_bound}) or [round((warm_bound + cold_bound) / 2)]
+
+
+def narrow(warm_bound, cold_bound, results):
+    """Narrow the search interval from a round of (wait_time, cold) results.
+
+    The new cold bound is the shortest idle time that gave a cold start. The new warm
+    bound is the longest idle time below it that stayed warm, so an occasional early
+    eviction never pushes the warm bound above a cold result.
+    """
+    cold_waits = [wait for wait, cold in results if cold]
+    cold_bound = min(cold_waits + [cold_bound])
+    warm_waits = [wait for wait, cold in results if not cold and wait < cold_bound]
+    warm_bound = max(warm_waits + [warm_bound])
+    return warm_bound, cold_bound
+
+
+async def search_platform(session, platform, lanes, args, probe_log, search_log):
+    """Search for one platform's idle timeout using all of its lanes in parallel.
+
+    Lanes that fail to calibrate are left out of the search. Returns None bounds if no lane is left.
+    """
+    calibrated = []
+    for lane in lanes:
+        try:
+            warm_gap = await lane.calibrate(session, args.image_url, args.calibration_calls)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"{platform} lane {lane.index}: calibration failed, leaving the lane out - {e}")
+            continue
+        print(f"{platform} lane {lane.index}: warm gap {warm_gap:.3f}s")
+        calibrated.append(lane)
+    lanes = calibrated
+    if not lanes:
+        print(f"{platform}: no lane could be calibrated, skipping the search")
+        return platform, None, None
+
+    warm_bound, cold_bound = args.min_wait, args.max_wait
+    search_round = 0
+    while cold_bound - warm_bound > args.precision:
+        search_round += 1
+        points = probe_points(warm_bound, cold_bound, len(lanes))
+        print(f"{platform} round {search_round}: interval ({warm_bound}, {cold_bound}] s, testing {points}")
+
+        async def run_probe(lane, wait_time):
+            try:
+                result = await lane.probe(session, args.image_url, wait_time, args.cold_margin)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"{platform} lane {lane.index}: probe at {wait_time}s failed - {e}")
+                return None
+            result.update({
+                "timestamp": time.time(),
+                "platform": platform,
+                "lane": lane.index,
+                "round": search_round,
+            })
+            probe_log.write(result)
+            print(f"{platform} lane {lane.index}: {wait_time}s idle -> {'cold' if result['cold'] else 'warm'} "
+                  f"(gap {result['gap']:.3f}s)")
+            return wait_time, result["cold"]
+
+        results = await asyncio.gather(*(run_probe(lane, point) for lane, point in zip(lanes, points)))
+        results = [result for result in results if result is not None]
+        if not results:
+            print(f"{platform}: every probe in round {search_round} failed, stopping")
+            break
+        warm_bound, cold_bound = narrow(warm_bound, cold_bound, results)
+        search_log.write({
+            "timestamp": time.time(),
+            "platform": platform,
+            "round": search_round,
+            "warm_bound": warm_bound,
+            "cold_bound": cold_bound,
+            "tested": " ".join(str(wait) for wait, _ in results),
+            "cold_results": " ".join(str(wait) for wait, cold in results if cold),
+        })
+
+    if cold_bound == args.max_wait:
+        print(f"{platform}: no cold start seen below {args.max_wait}s, the idle timeout may be longer")
+    print(f"{platform}: idle timeout between {warm_bound}s and {cold_bound}s")
+    return platform, warm_bound, cold_bound
+
+
+def parse_lane(text):
+    platform, url = text.split("=", 1)
+    return platform, url
+
+
+async def run(args):
+    lanes = {}
+    for platform, url in args.lane or [("Azure", AZURE_FUNCTION_URL), ("OpenFaaS", OPENFAAS_FUNCTION_URL)]:
+        lanes.setdefault(platform, []).append(Lane(platform, len(lanes.get(platform, [])), url))
+
+    probe_log = CSVLog(args.output, PROBE_FIELDNAMES)
+    search_log = CSVLog(args.search_output, SEARCH_FIELDNAMES)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            boundaries = await asyncio.gather(*(
+                search_platform(session, platform, platform_lanes, args, probe_log, search_log)
+                for platform, platform_lanes in lanes.items()
+            ))
+    finally:
+        probe_log.close()
+        search_log.close()
+
+    print("\nIdle timeouts:")
+    for platform, warm_bound, cold_bound in boundaries:
+        if warm_bound is None:
+            print(f"  {platform}: not measured")
+        else:
+            print(f"  {platform}: ({warm_bound}, {cold_bound}] s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary-search the idle time after which functions cold start.")
+    parser.add_argument("--lane", action="append", type=parse_lane, metavar="PLATFORM=URL",
+                        help="A function URL to probe; repeat for more lanes (default: one Azure and one OpenFaaS lane)")
+    parser.add_argument("--image-url", default=IMAGE_URL)
+    parser.add_argument("--min-wait", type=int, default=60, help="Idle time (s) assumed to stay warm")
+    parser.add_argument("--max-wait", type=int, default=1920, help="Idle time (s) assumed to cause a cold start")
+    parser.add_argument("--precision", type=int, default=30, help="Stop when the interval is this narrow (s, at least 1)")
+    parser.add_argument("--cold-margin", type=float, default=1.0,
+                        help="Extra client/server gap (s) over the warm gap that counts as a cold start")
+    parser.add_argument("--calibration-calls", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300, help="Timeout of each call (s)")
+    parser.add_argument("--output", default="cold_start_probes.csv")
+    parser.add_argument("--search-output", default="cold_start_search.csv")
+    args = parser.parse_args()
+    # Test points are whole seconds, so a narrower interval could never be split
+    if args.precision < 1:
+        parser.error("--precision must be at least 1 second")
+
+    print("Starting cold start boundary search...")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
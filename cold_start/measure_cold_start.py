@@ -14,6 +14,12 @@ import requests
 import time
 import csv
 import json
+import os
+import sys
+
+# The results store lives in benchmark/, shared with the other measurement scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmark"))
+from results_store import ResultsStore
 
 # Function URLs
 AZURE_FUNCTION_URL = "https://vin-image-processing-workflow.azurewebsites.net/api/classify_image"
@@ -24,8 +30,9 @@ IMAGE_URL = "https://picsum.photos/400/500"
 initial_wait_time = 60  # Start at interval size of 1 min
 max_wait_time = 1920  # Test intervals upto 32 minutes long
 
-# Data storage
+# Data storage, and the results store that keeps every run as it is measured
 results = []
+results_writer = ResultsStore().writer("cold_start")
 
 print("Starting cold start detection...")
 
@@ -50,6 +57,7 @@ for platform, url in [("Azure", AZURE_FUNCTION_URL), ("OpenFaaS", OPENFAAS_FUNCT
                     "ml_duration": result["ml_duration"],
                 }
                 results.append(entry)
+                results_writer.append(entry)
                 print(f"{platform}: {entry}")
 
             else:
@@ -83,6 +91,7 @@ while wait_time <= max_wait_time:
                     "ml_duration": result["ml_duration"],
                 }
                 results.append(entry)
+                results_writer.append(entry)
                 print(f"{platform}: {entry}")
 
             else:
@@ -94,6 +103,9 @@ while wait_time <= max_wait_time:
     # Increase wait time exponentially
     wait_time *= 2  
 
+results_writer.close()
+print(f"Run {results_writer.run_id}: {results_writer.rows_written} results appended to the results store")
+
 # Save results to CSV
 csv_filename = "cold_start_times.csv"
 with open(csv_filename, "w", newline="") as csvfile:
@@ -1,13 +1,30 @@
+import os
+import sys
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# Load data
-df = pd.read_csv("cold_start_times.csv")
+# The results store lives in benchmark/, shared with the other measurement scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmark"))
+from results_store import ResultsStore, aggregate
+
+# Percentiles drawn for every point: a line at the median and a band between the outer two
+band_percentiles = (5, 50, 95)
+
+# Load every run from the results store, falling back to the single-run CSV file
+df = ResultsStore().load("cold_start")
+if df.empty:
+    df = pd.read_csv("cold_start_times.csv")
 
 # Convert wait_time to minutes for better readability
 df["wait_time_minutes"] = df["wait_time"] / 60
 
+# Percentiles over all runs for each platform and wait time
+measurements = ["elapsed_time", "total_duration", "network_duration", "cpu_duration", "ml_duration"]
+summary = aggregate(df, ["platform", "wait_time_minutes"], measurements, percentiles=band_percentiles)
+low, median, high = (f"p{q}" for q in band_percentiles)
+
 # Set seaborn style for better visuals
 sns.set_theme(style="whitegrid")
 
@@ -15,9 +32,12 @@ sns.set_theme(style="whitegrid")
 def plot_comparison(y_column, title, y_label, save_as):
     plt.figure(figsize=(8, 5))
     
-    # Line plots for Azure and OpenFaaS
-    sns.lineplot(data=df[df["platform"] == "Azure"], x="wait_time_minutes", y=y_column, label="Azure", marker="o")
-    sns.lineplot(data=df[df["platform"] == "OpenFaaS"], x="wait_time_minutes", y=y_column, label="OpenFaaS", marker="s")
+    # Median line and percentile band for Azure and OpenFaaS
+    for platform, marker in [("Azure", "o"), ("OpenFaaS", "s")]:
+        platform_df = summary[summary["platform"] == platform].sort_values("wait_time_minutes")
+        line, = plt.plot(platform_df["wait_time_minutes"], platform_df[f"{y_column}_{median}"], label=platform, marker=marker)
+        plt.fill_between(platform_df["wait_time_minutes"], platform_df[f"{y_column}_{low}"], platform_df[f"{y_column}_{high}"],
+                         color=line.get_color(), alpha=0.2, label=f"{platform} ({low}-{high})")
     
     plt.xlabel("Wait Time (minutes)")
     plt.ylabel(y_label)
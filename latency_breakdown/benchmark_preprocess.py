@@ -0,0 +1,147 @@
+# BENCHMARK_PREPROCESS.PY
+# Python script benchmarking the original and the draft-mode preprocessing paths.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# For every image size in measure_latency_breakdown.image_sizes this script times:
+#   - "original": image.load_img (full decode + nearest resize), img_to_array, preprocess_input
+#   - "fast": classifier.preprocess.preprocess_image (draft decode + bicubic resize + in-place
+#     normalize; nearest resize for sources up to SMALL_SOURCE_SCALE times the target)
+#   - "pooled": the fast path writing into a reused buffer from classifier.buffers.BufferArena,
+#     as the functions do, so no float32 input array is allocated per image
+# and checks that the fast path stays within PIXEL_TOLERANCE of the original output. The
+# summary lists the sizes where the fast path is slower than the original as well as the
+# ones where it is faster, since small images are a large share of real traffic.
+#
+# Images are generated locally (smooth, photo-like content saved as JPEG) so the benchmark
+# does not depend on the network. Pass --picsum to use real photos from picsum.photos instead.
+#
+# Usage:
+#   python benchmark_preprocess.py --repeats 20
+
+import argparse
+import csv
+import os
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+import requests
+from PIL import Image
+
+from measure_latency_breakdown import image_sizes
+
+# Make the classifier package from the Azure Functions folder importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Azure Functions"))
+from classifier.buffers import BufferArena  # noqa: E402
+from classifier.preprocess import PIXEL_TOLERANCE, TARGET_SIZE, preprocess_image  # noqa: E402
+
+
+def synthetic_jpeg(width, height, seed=0, quality=90):
+    """Generate a deterministic photo-like JPEG: smooth colour regions plus fine grain."""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (max(height // 64, 4), max(width // 64, 4), 3), dtype=np.uint8)
+    smooth = np.asarray(Image.fromarray(coarse).resize((width, height), Image.Resampling.BICUBIC), dtype=np.float32)
+    grain = rng.normal(0, 8, smooth.shape)
+    pixels = np.clip(smooth + grain, 0, 255).astype(np.uint8)
+
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def original_preprocess(data):
+    """The preprocessing originally done by both functions."""
+    try:
+        from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
+        from tensorflow.keras.preprocessing import image
+    except ImportError:
+        # Same operations as load_img's defaults (RGB, nearest interpolation) without TensorFlow
+        img = Image.open(BytesIO(data)).convert("RGB").resize(TARGET_SIZE, Image.Resampling.NEAREST)
+        return np.asarray(img, dtype=np.float32)[np.newaxis, ...] / 127.5 - 1.0
+
+    img = image.load_img(BytesIO(data), target_size=TARGET_SIZE)
+    x = np.expand_dims(image.img_to_array(img), axis=0)
+    return preprocess_input(x)
+
+
+def time_call(fn, data, repeats):
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = fn(data)
+        durations.append(time.perf_counter() - start)
+    return np.array(durations), output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark draft-mode preprocessing against load_img.")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--picsum", action="store_true", help="Use photos from picsum.photos instead of synthetic images")
+    parser.add_argument("--output", default="preprocess_benchmark_results.csv")
+    args = parser.parse_args()
+
+    arena = BufferArena()
+    input_shape = (1, TARGET_SIZE[1], TARGET_SIZE[0], 3)
+
+    def pooled_preprocess(data):
+        with arena.lease(input_shape) as out:
+            return preprocess_image(data, out=out)
+
+    results = []
+    for width, height in image_sizes:
+        if args.picsum:
+            data = requests.get(f"https://picsum.photos/seed/benchmark/{width}/{height}", timeout=60).content
+        else:
+            data = synthetic_jpeg(width, height, seed=width)
+
+        original_times, original_x = time_call(original_preprocess, data, args.repeats)
+        fast_times, (fast_x, _) = time_call(preprocess_image, data, args.repeats)
+        pooled_times, _ = time_call(pooled_preprocess, data, args.repeats)
+        _, stage_times = preprocess_image(data)
+
+        mean_abs_diff = float(np.mean(np.abs(original_x - fast_x)))
+        entry = {
+            "image_size": f"{width}x{height}",
+            "original_median": round(float(np.median(original_times)), 5),
+            "original_p95": round(float(np.percentile(original_times, 95)), 5),
+            "fast_median": round(float(np.median(fast_times)), 5),
+            "fast_p95": round(float(np.percentile(fast_times, 95)), 5),
+            "fast_p99": round(float(np.percentile(fast_times, 99)), 5),
+            "pooled_median": round(float(np.median(pooled_times)), 5),
+            "pooled_p95": round(float(np.percentile(pooled_times, 95)), 5),
+            "pooled_p99": round(float(np.percentile(pooled_times, 99)), 5),
+            "fast_decode": round(stage_times["decode"], 5),
+            "fast_resize": round(stage_times["resize"], 5),
+            "fast_normalize": round(stage_times["normalize"], 5),
+            "speedup": round(float(np.median(original_times) / np.median(fast_times)), 2),
+            "mean_abs_diff": round(mean_abs_diff, 5),
+            "within_tolerance": mean_abs_diff <= PIXEL_TOLERANCE,
+        }
+        results.append(entry)
+        print(entry)
+
+    with open(args.output, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"Results saved to {args.output}")
+    for entry in results:
+        verdict = "faster" if entry["speedup"] >= 1 else "SLOWER"
+        print(f"{entry['image_size']:>9}: {entry['speedup']:.2f}x ({verdict} than the original)")
+    regressions = [entry["image_size"] for entry in results if entry["speedup"] < 1]
+    if regressions:
+        print(f"The fast path is slower than the original for: {', '.join(regressions)}")
+    print(f"Buffer pool: {arena.stats()['allocated']} allocated, reuse rate {arena.stats()['reuse_rate']}")
+    if not all(entry["within_tolerance"] for entry in results):
+        print(f"Some image sizes exceeded the pixel tolerance of {PIXEL_TOLERANCE}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,11 @@ import requests
 import time
 import csv
 import json
+import os
+import sys
+
+# The results store lives in benchmark/, shared with the other measurement scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmark"))
 
 # Function URLs
 AZURE_FUNCTION_URL = "https://vin-image-processing-workflow.azurewebsites.net/api/classify_image"
@@ -20,47 +25,62 @@ image_sizes = [
     (3200, 3200)
 ]
 
-# Data storage list
-results = []
+def main():
+    from results_store import ResultsStore
+
+    # Data storage list, and the results store that keeps every run
+    results = []
+    results_writer = ResultsStore().writer("latency_breakdown")
+    print(f"Run id: {results_writer.run_id}")
+
+    print("Starting latency breakdown test with varying input sizes...")
+
+    for width, height in image_sizes:
+        # Build the image URL from Picsum with the current size
+        image_url = f"https://picsum.photos/{width}/{height}"
+        print(f"\nTesting with image size: {width}x{height}")
+
+        # Loop over both platforms
+        for platform, url in [("Azure", AZURE_FUNCTION_URL), ("OpenFaaS", OPENFAAS_FUNCTION_URL)]:
+            start_time = time.time()
+            try:
+                response = requests.get(url, params={"url": image_url})
+                elapsed_time = time.time() - start_time
 
-print("Starting latency breakdown test with varying input sizes...")
+                if response.status_code == 200:
+                    data = response.json()
+                    entry = {
+                        "platform": platform,
+                        "image_size": f"{width}x{height}",
+                        "elapsed_time": round(elapsed_time, 2),
+                        "overall_duration": data.get("overall_duration", None),
+                        "network_duration": data.get("network_duration", None),
+                        "overlap_duration": data.get("overlap_duration", None),
+                        "cpu_duration": data.get("cpu_duration", None),
+                        "ml_duration": data.get("ml_duration", None)
+                    }
+                    results.append(entry)
+                    results_writer.append(entry)
+                    print(f"{platform} ({width}x{height}): {entry}")
+                else:
+                    print(f"{platform} ({width}x{height}): Failed with status {response.status_code}")
+            except Exception as e:
+                print(f"{platform} ({width}x{height}): Request failed - {e}")
 
-for width, height in image_sizes:
-    # Build the image URL from Picsum with the current size
-    image_url = f"https://picsum.photos/{width}/{height}"
-    print(f"\nTesting with image size: {width}x{height}")
+    results_writer.close()
+    print(f"{results_writer.rows_written} results appended to the results store")
 
-    # Loop over both platforms
-    for platform, url in [("Azure", AZURE_FUNCTION_URL), ("OpenFaaS", OPENFAAS_FUNCTION_URL)]:
-        start_time = time.time()
-        try:
-            response = requests.get(url, params={"url": image_url})
-            elapsed_time = time.time() - start_time
+    # Save results to CSV file
+    csv_filename = "latency_breakdown_results.csv"
+    with open(csv_filename, "w", newline="") as csvfile:
+        fieldnames = ["platform", "image_size", "elapsed_time", "overall_duration", "network_duration", "overlap_duration",
+                      "cpu_duration", "ml_duration"]
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(results)
 
-            if response.status_code == 200:
-                data = response.json()
-                entry = {
-                    "platform": platform,
-                    "image_size": f"{width}x{height}",
-                    "elapsed_time": round(elapsed_time, 2),
-                    "overall_duration": data.get("overall_duration", None),
-                    "network_duration": data.get("network_duration", None),
-                    "cpu_duration": data.get("cpu_duration", None),
-                    "ml_duration": data.get("ml_duration", None)
-                }
-                results.append(entry)
-                print(f"{platform} ({width}x{height}): {entry}")
-            else:
-                print(f"{platform} ({width}x{height}): Failed with status {response.status_code}")
-        except Exception as e:
-            print(f"{platform} ({width}x{height}): Request failed - {e}")
+    print(f"Results saved to {csv_filename}")
 
-# Save results to CSV file
-csv_filename = "latency_breakdown_results.csv"
-with open(csv_filename, "w", newline="") as csvfile:
-    fieldnames = ["platform", "image_size", "elapsed_time", "overall_duration", "network_duration", "cpu_duration", "ml_duration"]
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(results)
 
-print(f"Results saved to {csv_filename}")
+if __name__ == "__main__":
+    main()
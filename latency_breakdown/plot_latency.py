@@ -1,8 +1,23 @@
+import os
+import sys
+
 import pandas as pd
 import matplotlib.pyplot as plt
 
-# Load CSV data
-df = pd.read_csv('latency_breakdown_results.csv')
+# The results store lives in benchmark/, shared with the other measurement scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmark"))
+from results_store import ResultsStore, aggregate
+
+# List of measurement columns to plot
+measurements = ['overall_duration', 'network_duration', 'cpu_duration', 'ml_duration']
+
+# Percentiles drawn for every point: a line at the median and a band between the outer two
+band_percentiles = (5, 50, 95)
+
+# Load every run from the results store, falling back to the single-run CSV file
+df = ResultsStore().load('latency_breakdown')
+if df.empty:
+    df = pd.read_csv('latency_breakdown_results.csv')
 
 # Extract the width (assuming images are square, e.g., "256x256") as a numeric value
 def extract_width(size_str):
@@ -13,22 +28,27 @@ def extract_width(size_str):
 
 df['width'] = df['image_size'].apply(extract_width)
 
-# List of measurement columns to plot
-measurements = ['overall_duration', 'network_duration', 'cpu_duration', 'ml_duration']
+# Decode time hidden behind the download, only reported since decoding is streamed
+if 'overlap_duration' in df.columns and df['overlap_duration'].notna().any():
+    measurements.append('overlap_duration')
+
+# Percentiles over all runs for each platform and image size
+summary = aggregate(df, ['platform', 'width'], measurements, percentiles=band_percentiles)
+low, median, high = (f"p{q}" for q in band_percentiles)
 
 # For each measurement, create a separate graph
 for measure in measurements:
     plt.figure(figsize=(8, 6))
-    
-    # Filter data for each platform
-    azure_df = df[df['platform'] == 'Azure']
-    openfaas_df = df[df['platform'] == 'OpenFaaS']
-    
-    # Plot Azure results
-    plt.plot(azure_df['width'], azure_df[measure], marker='o', linestyle='-', label='Azure Functions')
-    # Plot OpenFaaS results
-    plt.plot(openfaas_df['width'], openfaas_df[measure], marker='s', linestyle='-', label='OpenFaaS')
-    
+
+    for platform, label, marker in [('Azure', 'Azure Functions', 'o'), ('OpenFaaS', 'OpenFaaS', 's')]:
+        # Filter data for each platform
+        platform_df = summary[summary['platform'] == platform].sort_values('width')
+
+        # Plot the median, with a band showing the spread over runs
+        line, = plt.plot(platform_df['width'], platform_df[f"{measure}_{median}"], marker=marker, linestyle='-', label=label)
+        plt.fill_between(platform_df['width'], platform_df[f"{measure}_{low}"], platform_df[f"{measure}_{high}"],
+                         color=line.get_color(), alpha=0.2, label=f"{label} ({low}-{high})")
+
     plt.xlabel("Image Width (pixels)")
     plt.ylabel(f"{measure.replace('_', ' ').capitalize()} (seconds)")
     plt.title(f"{measure.replace('_', ' ').capitalize()} vs. Image Size")
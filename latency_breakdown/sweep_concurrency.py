@@ -0,0 +1,385 @@
+# SWEEP_CONCURRENCY.PY
+# Python script sweeping load levels to measure throughput-latency curves of both functions.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# measure_latency_breakdown.py sends a single request per platform and image size, which
+# shows where the time goes on an idle instance but not how latency degrades as load
+# rises. This script raises the load step by step for every platform and image size:
+#   - "closed" loop: `level` users each send requests back to back, so the offered load
+#     adapts to the response time (like Locust users without wait time).
+#   - "open" loop: requests arrive as a Poisson process at `level` requests per second,
+#     whether or not earlier ones have finished. Latency is measured from the scheduled
+#     arrival time, so a slow server cannot hold back the load (no coordinated omission).
+#
+# Every request is appended to the results store (experiment "concurrency_sweep") with its
+# step, latency, status and server-side durations. Per step, the script computes the
+# throughput (successful responses per second) and p50/p99 latency, then finds the
+# saturation knee of each curve: the step after which more load stops buying
+# proportionally more throughput (Kneedle algorithm on throughput vs load level). A
+# platform/size sweep stops early once most requests of a step fail.
+#
+# Outputs, next to the other latency_breakdown outputs:
+#   - concurrency_sweep_results.csv: one row per step.
+#   - concurrency_sweep_report.md: the step tables and the knee of every curve.
+#   - sweep_<mode>_<width>.png: throughput vs load and the throughput-latency curve per
+#     image size, with the knee marked.
+#
+# Every request asks for a different image (a new seed), so the URL, prediction and
+# near-duplicate caches cannot answer it.
+#
+# Usage:
+#   python sweep_concurrency.py --mode closed --levels 1 2 4 8 16 32 --sizes 256 1280 3200
+#   python sweep_concurrency.py --mode open --levels 0.5 1 2 4 8 --duration 60
+#   python sweep_concurrency.py --report-only            # rebuild outputs from the latest run
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import time
+
+import aiohttp
+import numpy as np
+
+from measure_latency_breakdown import AZURE_FUNCTION_URL, OPENFAAS_FUNCTION_URL, image_sizes
+
+# The results store lives in benchmark/, shared with the other measurement scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmark"))
+from results_store import ResultsStore, aggregate  # noqa: E402
+
+EXPERIMENT = "concurrency_sweep"
+
+PLATFORMS = {"Azure": AZURE_FUNCTION_URL, "OpenFaaS": OPENFAAS_FUNCTION_URL}
+
+# Unique images of the requested size, so no cache can answer a request
+IMAGE_URL_TEMPLATE = "https://picsum.photos/seed/{seed}/{width}/{height}"
+
+DEFAULT_LEVELS = {"closed": [1, 2, 4, 8, 16, 32, 64], "open": [0.5, 1, 2, 4, 8, 16]}
+LEVEL_UNITS = {"closed": "users", "open": "req/s"}
+
+# Server-side durations kept for every request
+SERVER_DURATIONS = ["overall_duration", "network_duration", "cpu_duration", "ml_duration", "queue_wait_duration"]
+
+STEP_KEYS = ["platform", "mode", "image_size", "width", "level"]
+
+COLUMNS = STEP_KEYS + ["requests", "errors", "elapsed", "throughput", "p50_latency", "p99_latency",
+           "mean_server_duration", "knee"]
+
+
+async def send(session, url, image_url):
+    """Send one classify request.
+
+    Returns:
+        tuple: `(end, status, data)`, where `end` is the perf_counter time the response
+        arrived, `status` the HTTP status (None if the request failed) and `data` the
+        JSON body of a 200 response.
+    """
+    status, data = None, None
+    try:
+        async with session.get(url, params={"url": image_url}) as response:
+            status = response.status
+            if status == 200:
+                data = await response.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        data = None
+    return time.perf_counter(), status, data
+
+
+def record(start, sent, end, status, data):
+    """Turn one response into a per-request row (without the step columns)."""
+    row = {
+        "sent_at": round(sent - start, 4),
+        "latency": round(end - sent, 4),
+        "status": status,
+        "ok": data is not None,
+    }
+    for name in SERVER_DURATIONS:
+        row[name] = data.get(name) if data is not None else None
+    return row
+
+
+async def closed_loop(session, url, users, duration, image_urls):
+    """Run `users` users sending requests back to back for `duration` seconds."""
+    rows = []
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            sent = time.perf_counter()
+            end, status, data = await send(session, url, next(image_urls))
+            rows.append(record(start, sent, end, status, data))
+
+    await asyncio.gather(*(user() for _ in range(users)))
+    return rows, time.perf_counter() - start
+
+
+async def open_loop(session, url, rate, duration, image_urls, rng):
+    """Send requests as a Poisson process of `rate` requests per second for `duration` seconds.
+
+    The step lasts until the last request has finished, so under overload the elapsed
+    time (and the throughput derived from it) includes draining the backlog.
+    """
+    rows = []
+    start = time.perf_counter()
+    arrivals = np.cumsum(rng.exponential(1.0 / rate, size=int(rate * duration * 2) + 10))
+    arrivals = arrivals[arrivals < duration]
+
+    async def request(sent, image_url):
+        end, status, data = await send(session, url, image_url)
+        rows.append(record(start, sent, end, status, data))
+
+    tasks = []
+    for arrival in arrivals:
+        delay = start + arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(request(start + arrival, next(image_urls))))
+    await asyncio.gather(*tasks)
+    return rows, time.perf_counter() - start
+
+
+def find_knee(levels, throughput, sensitivity=0.1):
+    """Find the saturation knee of a throughput curve with the Kneedle algorithm.
+
+    Both axes are scaled to [0, 1]. For a curve that flattens out, the knee is the point
+    furthest above the straight line from the first to the last point, i.e. where the
+    throughput gained per extra unit of load drops the most.
+
+    Args:
+        levels (array-like): Load levels in increasing order (users or requests per second).
+        throughput (array-like): Throughput measured at each level.
+        sensitivity (float): Smallest distance from the straight line counted as a knee.
+
+    Returns:
+        int: Index of the knee, or None if the curve does not flatten within the sweep
+        (throughput still grows roughly in proportion to the load).
+    """
+    x = np.asarray(levels, dtype=np.float64)
+    y = np.asarray(throughput, dtype=np.float64)
+    valid = ~np.isnan(y)
+    if valid.sum() < 3:
+        return None
+    x, y, positions = x[valid], y[valid], np.flatnonzero(valid)
+    if np.ptp(x) == 0 or np.ptp(y) == 0:
+        return None
+
+    difference = (y - y.min()) / np.ptp(y) - (x - x.min()) / np.ptp(x)
+    knee = int(np.argmax(difference))
+    if difference[knee] < sensitivity:
+        return None
+    return int(positions[knee])
+
+
+def summarize(df):
+    """Compute throughput, p50/p99 latency and the knee of every step from per-request rows.
+
+    Args:
+        df (pd.DataFrame): Per-request rows of one run, from the results store.
+
+    Returns:
+        pd.DataFrame: One row per step with the COLUMNS columns, `knee` True at the knee
+        step of each (platform, mode, image_size) curve.
+    """
+    df = df.assign(error=~df["ok"].astype(bool))
+    steps = df.groupby(STEP_KEYS, observed=True, sort=True).agg(
+        requests=("ok", "size"), errors=("error", "sum"), elapsed=("step_elapsed", "max"),
+    )
+
+    ok = df[~df["error"]]
+    latency = aggregate(ok, STEP_KEYS, ["latency", "overall_duration"], percentiles=(50, 99))
+    latency = latency.set_index(STEP_KEYS)[["latency_p50", "latency_p99", "latency_count", "overall_duration_mean"]]
+
+    summary = steps.join(latency).reset_index()
+    summary["latency_count"] = summary["latency_count"].fillna(0)
+    summary["throughput"] = (summary["latency_count"] / summary["elapsed"]).round(3)
+    summary = summary.rename(columns={
+        "latency_p50": "p50_latency", "latency_p99": "p99_latency", "overall_duration_mean": "mean_server_duration",
+    })
+    summary[["p50_latency", "p99_latency", "mean_server_duration"]] = \
+        summary[["p50_latency", "p99_latency", "mean_server_duration"]].round(4)
+    summary["elapsed"] = summary["elapsed"].round(2)
+
+    summary["knee"] = False
+    for _, curve in summary.groupby(["platform", "mode", "image_size"], sort=False):
+        curve = curve.sort_values("level")
+        knee = find_knee(curve["level"], curve["throughput"])
+        if knee is not None:
+            summary.loc[curve.index[knee], "knee"] = True
+    return summary.sort_values(STEP_KEYS)[COLUMNS].reset_index(drop=True)
+
+
+def write_report(summary, path, run_id):
+    """Write the step tables and knees as a Markdown report."""
+    lines = [f"# Concurrency sweep (run {run_id})", ""]
+    for (mode, width, image_size), size_steps in summary.groupby(["mode", "width", "image_size"], sort=True):
+        unit = LEVEL_UNITS[mode]
+        lines += [f"## {image_size}, {mode} loop", ""]
+        for platform, curve in size_steps.groupby("platform", sort=True):
+            lines += [
+                f"### {platform}", "",
+                f"| Load ({unit}) | Requests | Errors | Throughput (req/s) | p50 (s) | p99 (s) |",
+                "|---:|---:|---:|---:|---:|---:|",
+            ]
+            for step in curve.sort_values("level").itertuples():
+                marker = " (knee)" if step.knee else ""
+                lines.append(f"| {step.level:g}{marker} | {step.requests} | {step.errors} | {step.throughput} "
+                             f"| {step.p50_latency} | {step.p99_latency} |")
+            knees = curve[curve["knee"]]
+            if knees.empty:
+                lines.append(f"\nNo knee: throughput still grows with the load at {curve['level'].max():g} {unit}.")
+            else:
+                knee = knees.iloc[0]
+                lines.append(f"\nKnee at {knee['level']:g} {unit}: {knee['throughput']} req/s "
+                             f"with p50 {knee['p50_latency']}s and p99 {knee['p99_latency']}s.")
+            lines.append("")
+
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+
+
+def plot_sweep(summary):
+    """Plot throughput vs load and the throughput-latency curve for every image size and mode."""
+    import matplotlib.pyplot as plt
+
+    for (mode, width), size_steps in summary.groupby(["mode", "width"], sort=True):
+        fig, (load_axis, latency_axis) = plt.subplots(1, 2, figsize=(14, 6))
+
+        for platform, label, marker in [('Azure', 'Azure Functions', 'o'), ('OpenFaaS', 'OpenFaaS', 's')]:
+            curve = size_steps[size_steps['platform'] == platform].sort_values('level')
+            if curve.empty:
+                continue
+            line, = load_axis.plot(curve['level'], curve['throughput'], marker=marker, linestyle='-', label=label)
+            color = line.get_color()
+            latency_axis.plot(curve['throughput'], curve['p50_latency'], marker=marker, linestyle='--', color=color,
+                              label=f"{label} p50")
+            latency_axis.plot(curve['throughput'], curve['p99_latency'], marker=marker, linestyle='-', color=color,
+                              label=f"{label} p99")
+
+            # Mark the saturation knee on both graphs
+            knee = curve[curve['knee']]
+            load_axis.scatter(knee['level'], knee['throughput'], marker='*', s=250, color=color, zorder=3)
+            latency_axis.scatter(knee['throughput'], knee['p99_latency'], marker='*', s=250, color=color, zorder=3)
+
+        load_axis.set_xlabel(f"Load ({LEVEL_UNITS[mode]})")
+        load_axis.set_ylabel("Throughput (requests/second)")
+        load_axis.set_title(f"Throughput vs. Load ({width}x{width}, {mode} loop)")
+        latency_axis.set_xlabel("Throughput (requests/second)")
+        latency_axis.set_ylabel("Latency (seconds)")
+        latency_axis.set_title(f"Latency vs. Throughput ({width}x{width}, {mode} loop)")
+        for axis in (load_axis, latency_axis):
+            axis.legend()
+            axis.grid(True)
+
+        fig.tight_layout()
+        fig.savefig(f"sweep_{mode}_{width}.png")
+        plt.close(fig)
+
+
+def build_outputs(store, run_id, output):
+    """Summarise one run from the results store and write the CSV, report and plots."""
+    df = store.load(EXPERIMENT, run_ids=[run_id])
+    if df.empty:
+        sys.exit(f"No {EXPERIMENT} results for run {run_id}")
+    summary = summarize(df)
+
+    summary.to_csv(output, index=False)
+    print(f"Results saved to {output}")
+    write_report(summary, "concurrency_sweep_report.md", run_id)
+    print("Report saved to concurrency_sweep_report.md")
+    plot_sweep(summary)
+
+
+def latest_run_id(store):
+    df = store.load(EXPERIMENT, columns=["timestamp"])
+    if df.empty:
+        sys.exit(f"The results store has no {EXPERIMENT} runs")
+    return df.sort_values("timestamp")["run_id"].iloc[-1]
+
+
+async def sweep(args, results_writer):
+    seeds = itertools.count(int(time.time()))
+    rng = np.random.default_rng(args.seed)
+    sizes = [(width, height) for width, height in image_sizes if width in args.sizes]
+    levels = sorted(args.levels or DEFAULT_LEVELS[args.mode])
+    unit = LEVEL_UNITS[args.mode]
+
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=args.timeout)) as session:
+        for width, height in sizes:
+            image_urls = (args.image_url_template.format(seed=seed, width=width, height=height) for seed in seeds)
+            for platform in args.platforms:
+                url = args.azure_url if platform == "Azure" else args.openfaas_url
+                for level in levels:
+                    print(f"{platform} ({width}x{height}): {level:g} {unit} for {args.duration}s...")
+                    if args.mode == "closed":
+                        rows, elapsed = await closed_loop(session, url, int(level), args.duration, image_urls)
+                    else:
+                        rows, elapsed = await open_loop(session, url, level, args.duration, image_urls, rng)
+
+                    for row in rows:
+                        results_writer.append(dict(row, platform=platform, mode=args.mode, image_size=f"{width}x{height}",
+                                                   width=width, level=float(level), step_elapsed=elapsed))
+                    results_writer.flush()
+
+                    latencies = [row["latency"] for row in rows if row["ok"]]
+                    errors = len(rows) - len(latencies)
+                    if latencies:
+                        p50, p99 = np.percentile(latencies, [50, 99])
+                        print(f"  {len(latencies) / elapsed:.3f} req/s, p50 {p50:.3f}s, p99 {p99:.3f}s, {errors} errors")
+                    else:
+                        print(f"  No successful requests, {errors} errors")
+
+                    # Past saturation: more load only produces more errors
+                    if not rows or errors / len(rows) > args.max_error_rate:
+                        print(f"  More than {args.max_error_rate:.0%} errors, stopping this sweep")
+                        break
+                    # Let the instance drain queued work before the next step
+                    await asyncio.sleep(args.pause)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep load levels and find the throughput-latency knee.")
+    parser.add_argument("--mode", default="closed", choices=list(DEFAULT_LEVELS),
+                        help="closed: concurrent users; open: Poisson arrivals per second")
+    parser.add_argument("--levels", nargs="+", type=float,
+                        help="Users (closed) or requests per second (open) of each step")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[256, 1280, 3200],
+                        help="Image widths from measure_latency_breakdown.image_sizes")
+    parser.add_argument("--platforms", nargs="+", default=list(PLATFORMS), choices=list(PLATFORMS))
+    parser.add_argument("--azure-url", default=AZURE_FUNCTION_URL)
+    parser.add_argument("--openfaas-url", default=OPENFAAS_FUNCTION_URL)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load per step")
+    parser.add_argument("--pause", type=float, default=10, help="Seconds between steps")
+    parser.add_argument("--timeout", type=float, default=120, help="Timeout of each request (s)")
+    parser.add_argument("--max-error-rate", type=float, default=0.5,
+                        help="Stop raising the load once this fraction of a step's requests fail")
+    parser.add_argument("--image-url-template", default=IMAGE_URL_TEMPLATE,
+                        help="Image URL with {seed}, {width} and {height} placeholders")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the open-loop arrival times")
+    parser.add_argument("--report-only", action="store_true",
+                        help="Do not send requests, rebuild the outputs from the results store")
+    parser.add_argument("--run-id", help="Run to report with --report-only (default: the latest)")
+    parser.add_argument("--output", default="concurrency_sweep_results.csv")
+    args = parser.parse_args()
+
+    store = ResultsStore()
+    if args.report_only:
+        build_outputs(store, args.run_id or latest_run_id(store), args.output)
+        return
+
+    # Many requests per step, so write the store once per step rather than once per request
+    with store.writer(EXPERIMENT, flush_every=1000) as results_writer:
+        print(f"Run id: {results_writer.run_id}")
+        asyncio.run(sweep(args, results_writer))
+    print(f"{results_writer.rows_written} requests appended to the results store")
+    build_outputs(store, results_writer.run_id, args.output)
+
+
+if __name__ == "__main__":
+    main()
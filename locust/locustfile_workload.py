@@ -0,0 +1,48 @@
+# LOCUSTFILE_WORKLOAD.PY
+# Python file with Locust load testing script using the shared workload in workload.py.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Unlike locustfile_azure.py and locustfile_openfaas.py, which request one fixed 700x800
+# image, this locustfile requests a weighted mix of image sizes and can follow a load
+# shape. The target and shape are chosen from the environment (see workload.py), e.g.:
+#   TARGET=azure SHAPE=step locust -f locustfile_workload.py --headless --html azure_report_step.html
+#   TARGET=openfaas SHAPE=spike PEAK_USERS=200 locust -f locustfile_workload.py --headless
+#   TARGET=local SHAPE=idle-gap IDLE_GAPS=60,120 locust -f locustfile_workload.py
+# Without SHAPE, the number of users is set as usual with -u and -r.
+
+# Following is the MIT License for Locust:
+# 
+# The MIT License
+
+# Copyright (c) 2009-2025, Carl Byström, Jonatan Heyman, Lars Holmberg
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+
+from workload import ClassifyUser, shape_class  # noqa: F401 (ClassifyUser is found by Locust)
+
+# Locust picks up every LoadTestShape class in the locustfile, so only bind the selected one
+_shape = shape_class(os.environ.get("SHAPE"))
+if _shape is not None:
+    WorkloadShape = _shape
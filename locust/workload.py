@@ -0,0 +1,238 @@
+# WORKLOAD.PY
+# Python module with a shared Locust workload: image size mix, load shapes and server timings.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# Used by locustfile_workload.py. Everything is configured through environment variables,
+# so the same locustfile runs against every platform and load profile:
+#   - TARGET: "azure", "openfaas" or "local" (a `func start` / faas-cli local-run stand-in).
+#   - TARGET_HOST: Overrides the host of the chosen target.
+#   - IMAGE_URL_TEMPLATE: Where images come from, with {width} and {height} placeholders.
+#     Defaults to picsum.photos, or to benchmark/fixture_server.py for the local target.
+#   - SHAPE: "step", "spike", "diurnal" or "idle-gap". Unset runs a plain -u/-r test.
+#   - DEADLINE_MS: Sent as the X-Deadline-Ms header, so the function sheds requests it cannot
+#     answer in time (429 responses, reported as failures). Unset sends no deadline.
+#
+# Besides the normal request entries, every successful response reports its
+# network/cpu/ml/queue-wait durations as separate "SERVER" entries, so the Locust
+# statistics and HTML reports show how the server time is split under load.
+
+import math
+import os
+import random
+
+from locust import HttpUser, LoadTestShape, between, task
+
+# Deployed functions and their routes
+TARGETS = {
+    "azure": ("https://vin-image-processing-workflow.azurewebsites.net", "/api/classify_image"),
+    "openfaas": ("http://20.26.125.107:8080", "/function/process-image"),
+    "local": ("http://localhost:7071", "/api/classify_image"),
+}
+
+PICSUM_URL_TEMPLATE = "https://picsum.photos/{width}/{height}"
+FIXTURE_URL_TEMPLATE = "http://127.0.0.1:8765/image/{width}x{height}.jpg"
+
+# Weighted mix of image sizes, roughly matching photos uploaded from phones and the web:
+# mostly small and medium images with a long tail of large camera photos
+SIZE_MIX = [
+    ((256, 256), 20),
+    ((512, 512), 25),
+    ((700, 800), 25),
+    ((1024, 1024), 15),
+    ((1920, 1080), 10),
+    ((3200, 3200), 4),
+    ((4000, 3000), 1),
+]
+
+# Server-side timings reported in the response body
+SERVER_STAGES = ["network_duration", "cpu_duration", "ml_duration", "queue_wait_duration"]
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+def _env_list(name, default):
+    return [float(value) for value in os.environ.get(name, default).split(",") if value.strip()]
+
+
+def target():
+    """Return the (host, path) of the target selected by TARGET and TARGET_HOST."""
+    name = os.environ.get("TARGET", "azure").lower()
+    if name not in TARGETS:
+        raise ValueError(f"Unknown TARGET {name!r}, expected one of {', '.join(TARGETS)}")
+    host, path = TARGETS[name]
+    return os.environ.get("TARGET_HOST", host), path
+
+
+def image_url_template():
+    default = FIXTURE_URL_TEMPLATE if os.environ.get("TARGET", "azure").lower() == "local" else PICSUM_URL_TEMPLATE
+    return os.environ.get("IMAGE_URL_TEMPLATE", default)
+
+
+def pick_size(rng=random):
+    """Pick an image size from SIZE_MIX according to its weights."""
+    sizes, weights = zip(*SIZE_MIX)
+    return rng.choices(sizes, weights=weights)[0]
+
+
+class ClassifyUser(HttpUser):
+    """Classifies images of mixed sizes on the target selected by the environment."""
+
+    host, path = target()
+    wait_time = between(_env_float("WAIT_MIN", 1), _env_float("WAIT_MAX", 5))
+    url_template = image_url_template()
+    headers = {"X-Deadline-Ms": os.environ["DEADLINE_MS"]} if os.environ.get("DEADLINE_MS") else {}
+
+    @task
+    def classify_image(self):
+        width, height = pick_size()
+        image_url = self.url_template.format(width=width, height=height)
+
+        # Group by size, so the report shows how latency grows with the image
+        name = f"{self.path} [{width}x{height}]"
+        with self.client.get(self.path, params={"url": image_url}, headers=self.headers, name=name,
+                             catch_response=True) as response:
+            if response.status_code != 200:
+                response.failure(f"Status {response.status_code}")
+                return
+            try:
+                data = response.json()
+            except ValueError:
+                response.failure("Response is not JSON")
+                return
+            self.report_server_timings(data)
+
+    def report_server_timings(self, data):
+        """Fire one "SERVER" request event per stage timing found in a response body."""
+        prefix = "cold_start/" if data.get("cold_start") else ""
+        for stage in SERVER_STAGES:
+            duration = data.get(stage)
+            if duration is None:
+                continue
+            self.environment.events.request.fire(
+                request_type="SERVER",
+                name=prefix + stage,
+                response_time=duration * 1000,
+                response_length=0,
+                exception=None,
+                context={},
+            )
+
+
+class StepShape(LoadTestShape):
+    """Adds STEP_USERS users every STEP_DURATION seconds, for STEPS steps.
+
+    Shows at which concurrency the latency starts to climb.
+    """
+
+    step_users = _env_int("STEP_USERS", 10)
+    step_duration = _env_float("STEP_DURATION", 60)
+    steps = _env_int("STEPS", 10)
+    spawn_rate = _env_float("SPAWN_RATE", 10)
+
+    def tick(self):
+        run_time = self.get_run_time()
+        step = int(run_time // self.step_duration)
+        if step >= self.steps:
+            return None
+        return (step + 1) * self.step_users, self.spawn_rate
+
+
+class SpikeShape(LoadTestShape):
+    """Holds BASE_USERS users, jumps to PEAK_USERS for SPIKE_DURATION seconds, then drops back.
+
+    Shows how quickly the platform scales out for a sudden burst and recovers afterwards.
+    """
+
+    base_users = _env_int("BASE_USERS", 5)
+    peak_users = _env_int("PEAK_USERS", 100)
+    spike_start = _env_float("SPIKE_START", 120)
+    spike_duration = _env_float("SPIKE_DURATION", 60)
+    duration = _env_float("SHAPE_DURATION", 420)
+    spawn_rate = _env_float("SPAWN_RATE", 100)
+
+    def tick(self):
+        run_time = self.get_run_time()
+        if run_time >= self.duration:
+            return None
+        if self.spike_start <= run_time < self.spike_start + self.spike_duration:
+            return self.peak_users, self.spawn_rate
+        return self.base_users, self.spawn_rate
+
+
+class DiurnalShape(LoadTestShape):
+    """Follows a day/night cycle compressed into PERIOD seconds, for CYCLES cycles.
+
+    The user count rises smoothly from MIN_USERS to MAX_USERS and back, like daily traffic.
+    """
+
+    min_users = _env_int("MIN_USERS", 1)
+    max_users = _env_int("MAX_USERS", 50)
+    period = _env_float("PERIOD", 600)
+    cycles = _env_int("CYCLES", 2)
+    spawn_rate = _env_float("SPAWN_RATE", 5)
+
+    def tick(self):
+        run_time = self.get_run_time()
+        if run_time >= self.period * self.cycles:
+            return None
+        level = (1 - math.cos(2 * math.pi * run_time / self.period)) / 2
+        return self.min_users + round((self.max_users - self.min_users) * level), self.spawn_rate
+
+
+class IdleGapShape(LoadTestShape):
+    """Runs bursts of BURST_USERS users separated by idle gaps with no users at all.
+
+    The gaps (IDLE_GAPS, in seconds) should exceed the platform's idle timeout, so
+    the first requests of each burst hit cold instances and show up under the
+    "cold_start/" server timing entries.
+    """
+
+    burst_users = _env_int("BURST_USERS", 5)
+    burst_duration = _env_float("BURST_DURATION", 60)
+    idle_gaps = _env_list("IDLE_GAPS", "300,600,1200")
+    spawn_rate = _env_float("SPAWN_RATE", 5)
+
+    def tick(self):
+        run_time = self.get_run_time()
+        # Burst, gap, burst, gap, ..., ending with a final burst after the last gap
+        for gap in self.idle_gaps + [None]:
+            if run_time < self.burst_duration:
+                return self.burst_users, self.spawn_rate
+            run_time -= self.burst_duration
+            if gap is None:
+                return None
+            if run_time < gap:
+                return 0, self.spawn_rate
+            run_time -= gap
+        return None
+
+
+SHAPES = {
+    "step": StepShape,
+    "spike": SpikeShape,
+    "diurnal": DiurnalShape,
+    "idle-gap": IdleGapShape,
+}
+
+
+def shape_class(name):
+    """Return the LoadTestShape class for a SHAPE name, or None when no shape is selected.
+
+    Raises:
+        ValueError: If `name` is not a known shape.
+    """
+    if not name:
+        return None
+    if name not in SHAPES:
+        raise ValueError(f"Unknown SHAPE {name!r}, expected one of {', '.join(SHAPES)}")
+    return SHAPES[name]
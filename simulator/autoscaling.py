@@ -0,0 +1,210 @@
+# AUTOSCALING.PY
+# Python module with a discrete-event simulator of autoscaling and keep-warm policies.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# The simulator replays an arrival trace (see traces.py) against a pool of function
+# replicas and reports what a scaling policy costs in cold starts, latency and
+# replica-seconds (the time replicas are kept running, which is what is billed or
+# reserved). A policy has five settings:
+#   - `idle_timeout`: A replica that has been idle this long is removed (scale to zero,
+#     e.g. the OpenFaaS idler with com.openfaas.scale.zero, or Azure evicting an idle
+#     instance). `inf` never removes replicas.
+#   - `min_replicas`: Replicas that are always running and never removed
+#     (com.openfaas.scale.min, Azure always-ready instances).
+#   - `ping_interval`: A keep-warm request is sent every N seconds (0 = none). Pings are
+#     served like requests, so they keep a replica from going idle, but are left out of
+#     the latency and cold start statistics.
+#   - `concurrency`: Requests one replica serves at the same time.
+#   - `max_replicas`: Largest number of replicas (com.openfaas.scale.max).
+#
+# Each request, in arrival order:
+#   1. Replicas idle for longer than `idle_timeout` are removed.
+#   2. The request goes to a free slot of a running replica, the lowest-numbered replica
+#      first. Packing requests onto few replicas lets the others go idle and be removed.
+#   3. If no slot is free and fewer than `max_replicas` run, a new replica is started and
+#      the request pays a cold service time. The new replica's other slots become free
+#      once it has started.
+#   4. Otherwise the request waits for the earliest slot to free up (first come, first
+#      served) and is then served warm.
+#
+# The trace has to be processed in order, but thousands of policies can be simulated at
+# once: the state of every policy (the busy-until time of every slot of every replica) is
+# one (policies, replicas, slots) array, and every step updates all policies with a few
+# vectorized NumPy operations. Every request draws its warm and cold service time once
+# and all policies use the same draws, so differences between policies are not noise.
+
+import numpy as np
+import pandas as pd
+
+POLICY_COLUMNS = ["idle_timeout", "min_replicas", "ping_interval", "concurrency", "max_replicas"]
+
+RESULT_COLUMNS = POLICY_COLUMNS + [
+    "requests", "p50_latency", "p95_latency", "p99_latency", "mean_latency", "cold_start_rate", "cold_starts",
+    "pings", "ping_cold_starts", "replica_seconds", "peak_replicas",
+]
+
+
+def policy_grid(idle_timeouts, min_replicas, ping_intervals, concurrency, max_replicas):
+    """Build every combination of the given policy settings.
+
+    Returns:
+        pd.DataFrame: One row per policy with the POLICY_COLUMNS columns.
+    """
+    grid = pd.MultiIndex.from_product(
+        [idle_timeouts, min_replicas, ping_intervals, concurrency, max_replicas], names=POLICY_COLUMNS
+    ).to_frame(index=False)
+    grid = grid[grid["min_replicas"] <= grid["max_replicas"]]
+    return grid.astype({"idle_timeout": float, "ping_interval": float, "min_replicas": int, "concurrency": int,
+                        "max_replicas": int}).reset_index(drop=True)
+
+
+def _simulate_chunk(arrivals, warm, cold, horizon, policies):
+    """Simulate a group of policies over the same events.
+
+    Args:
+        arrivals (np.ndarray): Sorted event times, shape (N,).
+        warm (np.ndarray): Warm service time of every event, shape (N,).
+        cold (np.ndarray): Cold service time of every event, shape (N,).
+        horizon (float): End of the trace, for the replica-seconds of replicas still running.
+        policies (pd.DataFrame): The policies, with the POLICY_COLUMNS columns.
+
+    Returns:
+        tuple: `(latency, cold_start, replica_seconds, peak_replicas)`: the (policies, N)
+        latency and cold start matrices, and the per-policy totals.
+    """
+    count = len(policies)
+    idle_timeout = policies["idle_timeout"].to_numpy(dtype=np.float64)[:, np.newaxis]
+    min_replicas = policies["min_replicas"].to_numpy()
+    concurrency = policies["concurrency"].to_numpy()
+    max_replicas = policies["max_replicas"].to_numpy()
+    replicas, slots = int(max_replicas.max()), int(concurrency.max())
+    rows = np.arange(count)
+
+    index = np.arange(replicas)[np.newaxis, :]
+    pinned = index < min_replicas[:, np.newaxis]
+    allowed = index < max_replicas[:, np.newaxis]
+    # Slots beyond a policy's concurrency are never free
+    valid_slots = np.arange(slots)[np.newaxis, np.newaxis, :] < concurrency[:, np.newaxis, np.newaxis]
+
+    busy_until = np.where(valid_slots, 0.0, np.inf) * np.ones((count, replicas, slots))
+    flat_busy_until = busy_until.reshape(count, -1)
+    alive = pinned.copy()
+    born = np.zeros((count, replicas))
+    last_end = np.zeros((count, replicas))
+    replica_seconds = np.zeros(count)
+    peak_replicas = alive.sum(axis=1)
+
+    latency = np.empty((count, len(arrivals)), dtype=np.float32)
+    cold_start = np.zeros((count, len(arrivals)), dtype=bool)
+
+    for i, t in enumerate(arrivals):
+        # 1. Remove replicas idle for longer than the timeout
+        expired = alive & ~pinned & (last_end + idle_timeout < t)
+        if expired.any():
+            replica_seconds += np.where(expired, last_end + idle_timeout - born, 0.0).sum(axis=1)
+            alive &= ~expired
+
+        # 2. The first free slot of a running replica
+        running_busy_until = np.where(alive[:, :, np.newaxis], busy_until, np.inf).reshape(count, -1)
+        free = running_busy_until <= t
+        has_free = free.any(axis=1)
+        first_free = free.argmax(axis=1)
+
+        # 3. Or a new replica, 4. or the slot that frees up first
+        stopped = ~alive & allowed
+        start_new = ~has_free & stopped.any(axis=1)
+        new_replica = stopped.argmax(axis=1)
+        earliest = running_busy_until.argmin(axis=1)
+
+        slot = np.where(has_free, first_free, np.where(start_new, new_replica * slots, earliest))
+        start = np.where(has_free | start_new, t, running_busy_until[rows, earliest])
+        end = start + np.where(start_new, cold[i], warm[i])
+        latency[:, i] = end - t
+        cold_start[:, i] = start_new
+
+        flat_busy_until[rows, slot] = end
+        replica = slot // slots
+        last_end[rows, replica] = np.maximum(last_end[rows, replica], end)
+
+        if start_new.any():
+            started, new = rows[start_new], new_replica[start_new]
+            alive[started, new] = True
+            born[started, new] = t
+            last_end[started, new] = end[start_new]
+            # The other slots are usable once the replica has started
+            ready = t + cold[i] - warm[i]
+            busy_until[started, new, 1:] = np.where(valid_slots[started, 0, 1:], ready, np.inf)
+            peak_replicas = np.maximum(peak_replicas, alive.sum(axis=1))
+
+    # Replicas still running at the end of the trace, pinned ones for the whole trace
+    end_time = np.maximum(horizon, last_end)
+    still_running = alive & ~pinned
+    replica_seconds += np.where(still_running, np.minimum(last_end + idle_timeout, end_time) - born, 0.0).sum(axis=1)
+    replica_seconds += np.where(pinned, end_time, 0.0).sum(axis=1)
+    return latency, cold_start, replica_seconds, peak_replicas
+
+
+def simulate(arrivals, service_times, policies, rng, horizon=None, chunk_size=256):
+    """Simulate every policy on an arrival trace.
+
+    Args:
+        arrivals (np.ndarray): Sorted request arrival times in seconds.
+        service_times (ServiceTimes): Warm and cold service-time distributions.
+        policies (pd.DataFrame): Policies to simulate, e.g. from `policy_grid`.
+        rng (np.random.Generator): Source of randomness for the service times.
+        horizon (float, optional): Length of the trace in seconds. The last arrival if not given.
+        chunk_size (int): Policies simulated at once; bounds the memory of the latency matrix.
+
+    Returns:
+        pd.DataFrame: One row per policy with the RESULT_COLUMNS columns. Latencies are in
+        seconds, `cold_start_rate` is the fraction of requests (not pings) that started a
+        replica, and `replica_seconds` the total running time of all replicas.
+
+    Raises:
+        ValueError: If the trace is empty.
+    """
+    arrivals = np.asarray(arrivals, dtype=np.float64)
+    if len(arrivals) == 0:
+        raise ValueError("The arrival trace is empty")
+    horizon = float(arrivals[-1]) if horizon is None else float(horizon)
+    warm, cold = service_times.sample(len(arrivals), rng)
+
+    results = []
+    # Policies with the same ping interval see the same events, so they are simulated together
+    for ping_interval, group in policies.groupby("ping_interval", sort=False):
+        pings = np.arange(0.0, horizon, ping_interval) if ping_interval > 0 else np.empty(0)
+        ping_warm, ping_cold = service_times.sample(len(pings), rng)
+
+        events = np.concatenate([arrivals, pings])
+        order = np.argsort(events, kind="stable")
+        is_ping = (np.arange(len(events)) >= len(arrivals))[order]
+        event_warm = np.concatenate([warm, ping_warm])[order]
+        event_cold = np.concatenate([cold, ping_cold])[order]
+
+        for start in range(0, len(group), chunk_size):
+            chunk = group.iloc[start:start + chunk_size]
+            latency, cold_start, replica_seconds, peak_replicas = _simulate_chunk(
+                events[order], event_warm, event_cold, horizon, chunk)
+
+            request_latency = latency[:, ~is_ping]
+            percentiles = np.percentile(request_latency, [50, 95, 99], axis=1)
+            request_cold = cold_start[:, ~is_ping].sum(axis=1)
+            results.append(chunk.assign(
+                requests=len(arrivals),
+                p50_latency=percentiles[0],
+                p95_latency=percentiles[1],
+                p99_latency=percentiles[2],
+                mean_latency=request_latency.mean(axis=1),
+                cold_start_rate=request_cold / max(len(arrivals), 1),
+                cold_starts=request_cold,
+                pings=len(pings),
+                ping_cold_starts=cold_start[:, is_ping].sum(axis=1),
+                replica_seconds=replica_seconds,
+                peak_replicas=peak_replicas,
+            ))
+
+    return pd.concat(results).loc[policies.index, RESULT_COLUMNS]
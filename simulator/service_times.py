@@ -0,0 +1,115 @@
+# SERVICE_TIMES.PY
+# Python module fitting cold and warm service-time distributions from the cold start measurements.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# cold_start/cold_start_times.csv holds one row per call made by measure_cold_start.py,
+# with the client-side `elapsed_time` after increasing idle times. Calls that hit a
+# cold instance take far longer than the others (about 20s against 1s on Azure), so a
+# call is counted as cold when its elapsed time exceeds the platform's fastest call by
+# more than a margin. (Not the median: most of the long idle times ended in a cold start.)
+#
+# Both groups are fitted with a lognormal distribution (the mean and standard deviation
+# of the log times), which keeps samples positive and has the long right tail service
+# times show. There are only a handful of calls per platform, so the spread is kept
+# above a floor instead of trusting a standard deviation of two or three samples.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Measurements of measure_cold_start.py
+COLD_START_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cold_start", "cold_start_times.csv")
+
+
+class LogNormal:
+    """A lognormal distribution of durations in seconds.
+
+    Args:
+        mu (float): Mean of the log durations.
+        sigma (float): Standard deviation of the log durations.
+    """
+
+    def __init__(self, mu, sigma):
+        self.mu = mu
+        self.sigma = sigma
+
+    @classmethod
+    def fit(cls, samples, min_sigma=0.1):
+        """Fit the distribution to duration samples, with a spread of at least `min_sigma`."""
+        logs = np.log(np.asarray(samples, dtype=np.float64))
+        sigma = logs.std(ddof=1) if len(logs) > 1 else 0.0
+        return cls(float(logs.mean()), float(max(sigma, min_sigma)))
+
+    @property
+    def median(self):
+        return float(np.exp(self.mu))
+
+    @property
+    def mean(self):
+        return float(np.exp(self.mu + self.sigma ** 2 / 2))
+
+    def sample(self, size, rng):
+        return rng.lognormal(self.mu, self.sigma, size=size)
+
+    def __repr__(self):
+        return f"LogNormal(median={self.median:.3f}s, sigma={self.sigma:.3f})"
+
+
+class ServiceTimes:
+    """Warm and cold service-time distributions of one platform.
+
+    Args:
+        warm (LogNormal): Time to serve a request on a warm replica.
+        cold (LogNormal): Time to serve the request that starts a new replica, start-up included.
+    """
+
+    def __init__(self, warm, cold):
+        self.warm = warm
+        self.cold = cold
+
+    def sample(self, size, rng):
+        """Draw a warm and a cold service time for each of `size` requests.
+
+        Every request gets both, so configurations simulated together see the same random
+        times and differ only because of their policies (common random numbers).
+
+        Returns:
+            tuple: `(warm, cold)` arrays of shape (size,). The cold time is at least the warm time.
+        """
+        warm = self.warm.sample(size, rng)
+        cold = np.maximum(self.cold.sample(size, rng), warm)
+        return warm, cold
+
+    def __repr__(self):
+        return f"ServiceTimes(warm={self.warm}, cold={self.cold})"
+
+
+def fit_service_times(platform, path=COLD_START_CSV, margin=1.0, min_sigma=0.1):
+    """Fit the warm and cold service times of a platform from the cold start measurements.
+
+    Args:
+        platform (str): "Azure" or "OpenFaaS".
+        path (str): The CSV file written by measure_cold_start.py.
+        margin (float): Seconds above the platform's fastest call from which a call counts as cold.
+        min_sigma (float): Smallest spread of the fitted log times.
+
+    Returns:
+        ServiceTimes: The fitted distributions.
+
+    Raises:
+        ValueError: If the file has no calls of the platform, or no warm or no cold ones.
+    """
+    df = pd.read_csv(path)
+    elapsed = df.loc[df["platform"] == platform, "elapsed_time"].to_numpy(dtype=np.float64)
+    if len(elapsed) == 0:
+        raise ValueError(f"No measurements of {platform} in {path}")
+
+    cold = elapsed > elapsed.min() + margin
+    if cold.all() or not cold.any():
+        raise ValueError(f"Could not separate warm and cold calls of {platform} with a margin of {margin}s")
+    return ServiceTimes(LogNormal.fit(elapsed[~cold], min_sigma), LogNormal.fit(elapsed[cold], min_sigma))
@@ -0,0 +1,128 @@
+# SIMULATE_AUTOSCALING.PY
+# Python script sweeping autoscaling and keep-warm policies over an arrival trace.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# OpenFaaS/stack.yaml lets the idler scale process-image to zero, and Azure evicts idle
+# instances, but which idle timeout, minimum replicas or keep-warm ping interval is worth
+# its cost depends on the traffic. This script answers that offline, before deploying:
+#   1. Fits warm and cold service times of a platform from cold_start/cold_start_times.csv
+#      (see service_times.py).
+#   2. Builds an arrival trace: replayed from a Locust stats history CSV or generated
+#      (Poisson, diurnal or idle-gap, like the shapes of locust/workload.py).
+#   3. Simulates every combination of the given policy settings on the trace (see
+#      autoscaling.py) and reports latency percentiles, cold start rate and
+#      replica-seconds per policy.
+#   4. Prints the policies meeting the p99 latency target, cheapest (fewest
+#      replica-seconds) first.
+#
+# Output:
+#   - autoscaling_results.csv: one row per policy.
+#
+# Usage:
+#   python simulate_autoscaling.py --platform OpenFaaS --trace idle-gap --idle-gaps 300 600 1200
+#   python simulate_autoscaling.py --platform Azure --trace diurnal --min-rate 0.1 --max-rate 5 --slo-p99 3
+#   python simulate_autoscaling.py --trace locust --locust-csv ../locust/run_stats_history.csv \
+#       --idle-timeouts 60 300 900 inf --min-replicas 0 1 2 --ping-intervals 0 120 240
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from autoscaling import policy_grid, simulate
+from service_times import COLD_START_CSV, fit_service_times
+from traces import diurnal_arrivals, idle_gap_arrivals, locust_arrivals, poisson_arrivals
+
+TRACES = ["poisson", "diurnal", "idle-gap", "locust"]
+
+
+def build_trace(args, rng):
+    """Build the arrival trace selected with --trace.
+
+    Returns:
+        tuple: `(arrivals, horizon)`, the sorted arrival times and the trace length in seconds.
+    """
+    if args.trace == "poisson":
+        return poisson_arrivals(args.rate, args.duration, rng), args.duration
+    if args.trace == "diurnal":
+        return diurnal_arrivals(args.min_rate, args.max_rate, args.period, args.duration, rng), args.duration
+    if args.trace == "idle-gap":
+        arrivals = idle_gap_arrivals(args.rate, args.burst_duration, args.idle_gaps, rng)
+        return arrivals, args.burst_duration * (len(args.idle_gaps) + 1) + sum(args.idle_gaps)
+    if args.locust_csv is None:
+        sys.exit("--trace locust needs --locust-csv")
+    arrivals = locust_arrivals(args.locust_csv, rng)
+    return arrivals, float(arrivals[-1]) if len(arrivals) else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate autoscaling and keep-warm policies on an arrival trace.")
+    parser.add_argument("--platform", default="OpenFaaS", choices=["Azure", "OpenFaaS"],
+                        help="Platform whose service times are fitted")
+    parser.add_argument("--cold-start-csv", default=COLD_START_CSV)
+    parser.add_argument("--cold-margin", type=float, default=1.0,
+                        help="Seconds above the fastest call from which a call counts as cold")
+
+    parser.add_argument("--trace", default="idle-gap", choices=TRACES)
+    parser.add_argument("--rate", type=float, default=2.0, help="Requests per second (poisson, idle-gap)")
+    parser.add_argument("--min-rate", type=float, default=0.05, help="Lowest requests per second (diurnal)")
+    parser.add_argument("--max-rate", type=float, default=5.0, help="Highest requests per second (diurnal)")
+    parser.add_argument("--period", type=float, default=3600, help="Seconds of one cycle (diurnal)")
+    parser.add_argument("--duration", type=float, default=3600, help="Seconds of the trace (poisson, diurnal)")
+    parser.add_argument("--burst-duration", type=float, default=60, help="Seconds of each burst (idle-gap)")
+    parser.add_argument("--idle-gaps", nargs="+", type=float, default=[300, 600, 1200],
+                        help="Seconds of idle time between bursts (idle-gap)")
+    parser.add_argument("--locust-csv", help="Locust <prefix>_stats_history.csv to replay (locust)")
+
+    parser.add_argument("--idle-timeouts", nargs="+", type=float, default=[60, 300, 900, float("inf")],
+                        help="Idle seconds before a replica is removed; inf never scales down")
+    parser.add_argument("--min-replicas", nargs="+", type=int, default=[0, 1])
+    parser.add_argument("--ping-intervals", nargs="+", type=float, default=[0, 60, 240],
+                        help="Seconds between keep-warm pings; 0 sends none")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4], help="Requests per replica")
+    parser.add_argument("--max-replicas", nargs="+", type=int, default=[20])
+
+    parser.add_argument("--slo-p99", type=float, default=2.0, help="p99 latency target in seconds")
+    parser.add_argument("--top", type=int, default=10, help="Policies to print")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Policies simulated at once")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="autoscaling_results.csv")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    service_times = fit_service_times(args.platform, args.cold_start_csv, margin=args.cold_margin)
+    print(f"{args.platform} service times: {service_times}")
+
+    arrivals, horizon = build_trace(args, rng)
+    if len(arrivals) == 0:
+        sys.exit("The trace has no requests")
+    print(f"Trace: {len(arrivals)} requests over {horizon:.0f}s ({len(arrivals) / max(horizon, 1e-9):.3f} req/s)")
+
+    policies = policy_grid(args.idle_timeouts, args.min_replicas, args.ping_intervals, args.concurrency,
+                           args.max_replicas)
+    start = time.perf_counter()
+    results = simulate(arrivals, service_times, policies, rng, horizon=horizon, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"Simulated {len(policies)} policies in {elapsed:.2f}s ({len(policies) / elapsed:.1f} policies/s)")
+
+    results.to_csv(args.output, index=False)
+    print(f"Results saved to {args.output}")
+
+    meeting = results[results["p99_latency"] <= args.slo_p99].sort_values(["replica_seconds", "p99_latency"])
+    if meeting.empty:
+        best = results.sort_values("p99_latency").head(args.top)
+        print(f"No policy meets a p99 latency of {args.slo_p99:g}s; lowest p99 latencies:")
+    else:
+        best = meeting.head(args.top)
+        print(f"{len(meeting)} policies meet a p99 latency of {args.slo_p99:g}s; cheapest:")
+    print(best[["idle_timeout", "min_replicas", "ping_interval", "concurrency", "max_replicas", "p50_latency",
+                "p99_latency", "cold_start_rate", "replica_seconds"]].to_string(index=False, float_format="{:.3f}".format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# TRACES.PY
+# Python module with request arrival traces for the autoscaling simulator.
+#
+# Name of Student: Vindhyaa Saravanan
+# Module: Cloud Computing Systems
+# Student ID: 201542641
+# Username: sc21vs
+
+# A trace is a sorted NumPy array of request arrival times in seconds from the start.
+# Traces come either from a Locust run or from generators that mirror the load shapes of
+# locust/workload.py:
+#   - `locust_arrivals`: Replays the requests counted in a Locust stats history CSV
+#     (`locust ... --csv <prefix> --csv-full-history` writes <prefix>_stats_history.csv).
+#   - `poisson_arrivals`: A constant rate.
+#   - `diurnal_arrivals`: A rate rising and falling like daily traffic (DiurnalShape).
+#   - `idle_gap_arrivals`: Bursts separated by idle gaps (IdleGapShape), the case where
+#     scale-to-zero and keep-warm pings matter most.
+# The generators draw every arrival with vectorized NumPy operations, so traces of
+# millions of requests take milliseconds.
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Locust request types of real requests; locustfile_workload.py also reports "SERVER" timings
+REQUEST_TYPES = ("GET", "POST")
+
+
+def poisson_arrivals(rate, duration, rng):
+    """Requests arriving as a Poisson process at `rate` requests per second for `duration` seconds."""
+    count = rng.poisson(rate * duration)
+    return np.sort(rng.uniform(0.0, duration, size=count))
+
+
+def rate_arrivals(rate_fn, duration, max_rate, rng):
+    """Requests of a Poisson process with a time-varying rate, by thinning.
+
+    Args:
+        rate_fn (callable): Maps an array of times to the rate at those times (requests/s).
+        duration (float): Length of the trace in seconds.
+        max_rate (float): An upper bound of `rate_fn` over the trace.
+        rng (np.random.Generator): Source of randomness.
+
+    Returns:
+        np.ndarray: Sorted arrival times.
+    """
+    candidates = poisson_arrivals(max_rate, duration, rng)
+    keep = rng.uniform(0.0, max_rate, size=len(candidates)) < rate_fn(candidates)
+    return candidates[keep]
+
+
+def diurnal_arrivals(min_rate, max_rate, period, duration, rng):
+    """Requests whose rate rises from `min_rate` to `max_rate` and back every `period` seconds."""
+    def rate(t):
+        return min_rate + (max_rate - min_rate) * (1 - np.cos(2 * np.pi * t / period)) / 2
+
+    return rate_arrivals(rate, duration, max_rate, rng)
+
+
+def idle_gap_arrivals(rate, burst_duration, idle_gaps, rng):
+    """Bursts of `rate` requests per second lasting `burst_duration` seconds, separated by idle gaps.
+
+    Args:
+        rate (float): Request rate during a burst.
+        burst_duration (float): Length of every burst in seconds.
+        idle_gaps (list): Idle time after each burst but the last, in seconds.
+        rng (np.random.Generator): Source of randomness.
+
+    Returns:
+        np.ndarray: Sorted arrival times.
+    """
+    starts = np.concatenate([[0.0], np.cumsum(burst_duration + np.asarray(idle_gaps, dtype=np.float64))])
+    bursts = [start + poisson_arrivals(rate, burst_duration, rng) for start in starts]
+    return np.concatenate(bursts)
+
+
+def locust_arrivals(path, rng, request_types=REQUEST_TYPES):
+    """Replay the requests of a Locust run from its stats history CSV.
+
+    The history has one row per reporting interval (about a second) with the cumulative
+    request count. The requests of each interval are spread uniformly over it.
+
+    Args:
+        path (str): A <prefix>_stats_history.csv file.
+        rng (np.random.Generator): Source of randomness.
+        request_types (tuple): Request types counted. Without --csv-full-history only the
+            "Aggregated" row is written, which also counts the "SERVER" timing entries.
+
+    Returns:
+        np.ndarray: Sorted arrival times, starting at the first row of the history.
+    """
+    df = pd.read_csv(path)
+    rows = df[df["Type"].isin(request_types)]
+    if rows.empty:
+        logging.warning(f"{path} has no per-request rows, using the Aggregated rows "
+                        "(run Locust with --csv-full-history to leave out the SERVER timings)")
+        rows = df[df["Name"] == "Aggregated"]
+
+    counts = rows.groupby("Timestamp")["Total Request Count"].sum().sort_index()
+    timestamps = counts.index.to_numpy(dtype=np.float64)
+    new_requests = np.diff(counts.to_numpy(dtype=np.int64), prepend=0).clip(min=0)
+
+    # Interval k runs from the previous timestamp to timestamp k
+    ends = timestamps - timestamps[0]
+    starts = np.concatenate([[ends[0]], ends[:-1]])
+    widths = np.repeat(ends - starts, new_requests)
+    return np.sort(np.repeat(starts, new_requests) + rng.uniform(size=len(widths)) * widths)